@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.request
+
+# Répertoire des ressources embarquées avec l'application
+REPERTOIRE_ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Répertoire du cache local (adressé par le contenu)
+REPERTOIRE_CACHE = os.environ.get("DI_CACHE_ASSETS", os.path.join(REPERTOIRE_ASSETS, ".cache"))
+
+# Si DI_HORS_LIGNE=1, aucune ressource distante n'est jamais téléchargée (déploiement isolé)
+HORS_LIGNE = os.environ.get("DI_HORS_LIGNE", "0") == "1"
+
+# Délai maximal (en secondes) pour un téléchargement unique vers le cache
+DELAI_TELECHARGEMENT = 5
+
+# Budget par défaut d'octets de média envoyés au navigateur par rendu de page
+MEDIA_OCTETS_MAX_PAR_PAGE = 2 * 1024 * 1024
+
+# Images utilisées par l'application : fichier embarqué et, éventuellement, URL d'origine
+IMAGES = {
+    "illustration_diversite": {
+        "fichier": "diversite_inclusion.svg",
+        "url": None,
+    },
+}
+
+
+class BudgetMedia:
+    """
+    Compte les octets de média envoyés pendant un rendu de page.
+
+    Un nouveau budget doit être créé à chaque exécution du script Streamlit.
+    """
+
+    def __init__(self, octets_max=MEDIA_OCTETS_MAX_PAR_PAGE):
+        self.octets_max = octets_max
+        self.octets_utilises = 0
+
+    def consommer(self, nb_octets):
+        """
+        Réserve nb_octets dans le budget.
+
+        Returns:
+            True si le média tient dans le budget, False sinon (rien n'est réservé)
+        """
+        if self.octets_utilises + nb_octets > self.octets_max:
+            return False
+        self.octets_utilises += nb_octets
+        return True
+
+
+class CacheActifs:
+    """
+    Cache local de ressources adressé par le contenu.
+
+    Chaque ressource distante est stockée sur disque sous le nom <sha256>.<extension> et gardée en
+    mémoire après la première lecture. Un index JSON associe chaque URL à son empreinte, de sorte
+    qu'une URL n'est téléchargée qu'une seule fois. Les fichiers locaux ne passent pas par l'index :
+    ils sont gardés en mémoire tant que leur date de modification et leur taille ne changent pas, une
+    ressource modifiée est donc relue.
+    """
+
+    def __init__(self, repertoire=REPERTOIRE_CACHE, hors_ligne=HORS_LIGNE):
+        self.repertoire = repertoire
+        self.hors_ligne = hors_ligne
+        self._memoire = {}
+        # Fichiers locaux : chemin -> ((date de modification, taille), contenu)
+        self._fichiers = {}
+        self._verrou = threading.Lock()
+        self._chemin_index = os.path.join(repertoire, "index.json")
+        self._index = self._lire_index()
+
+    def _lire_index(self):
+        try:
+            with open(self._chemin_index, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _ecrire_index(self):
+        try:
+            os.makedirs(self.repertoire, exist_ok=True)
+            chemin_tmp = self._chemin_index + ".tmp"
+            with open(chemin_tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f, indent=2, sort_keys=True)
+            os.replace(chemin_tmp, self._chemin_index)
+        except OSError:
+            # Système de fichiers en lecture seule : le cache reste en mémoire
+            pass
+
+    def _stocker(self, source, contenu, extension):
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        nom_fichier = f"{empreinte}{extension}"
+        chemin = os.path.join(self.repertoire, nom_fichier)
+        if not os.path.exists(chemin):
+            try:
+                os.makedirs(self.repertoire, exist_ok=True)
+                with open(chemin, "wb") as f:
+                    f.write(contenu)
+            except OSError:
+                pass
+        self._memoire[nom_fichier] = contenu
+        self._index[source] = nom_fichier
+        self._ecrire_index()
+        return contenu
+
+    def _lire_depuis_cache(self, source):
+        nom_fichier = self._index.get(source)
+        if nom_fichier is None:
+            return None
+        if nom_fichier in self._memoire:
+            return self._memoire[nom_fichier]
+        try:
+            with open(os.path.join(self.repertoire, nom_fichier), "rb") as f:
+                contenu = f.read()
+        except OSError:
+            return None
+        self._memoire[nom_fichier] = contenu
+        return contenu
+
+    def _lire_fichier_local(self, chemin):
+        try:
+            stat = os.stat(chemin)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        en_memoire = self._fichiers.get(chemin)
+        if en_memoire is not None and en_memoire[0] == signature:
+            return en_memoire[1]
+        try:
+            with open(chemin, "rb") as f:
+                contenu = f.read()
+        except OSError:
+            return None
+        self._fichiers[chemin] = (signature, contenu)
+        return contenu
+
+    def obtenir(self, source):
+        """
+        Retourne le contenu d'une ressource : un fichier local depuis la mémoire ou le disque (relu s'il a
+        été modifié), une URL depuis la mémoire, le cache disque ou (une seule fois) le réseau.
+
+        Args:
+            source: Chemin d'un fichier local ou URL http(s)
+
+        Returns:
+            Les octets de la ressource, ou None si elle est indisponible
+        """
+        with self._verrou:
+            if not source.startswith(("http://", "https://")):
+                return self._lire_fichier_local(source)
+
+            contenu = self._lire_depuis_cache(source)
+            if contenu is not None:
+                return contenu
+            if self.hors_ligne:
+                return None
+            try:
+                with urllib.request.urlopen(source, timeout=DELAI_TELECHARGEMENT) as reponse:
+                    contenu = reponse.read()
+            except Exception:
+                return None
+            extension = os.path.splitext(source.split("?")[0])[1].lower()
+            return self._stocker(source, contenu, extension)
+
+
+def obtenir_image(cache, nom):
+    """
+    Retourne les octets d'une image déclarée dans IMAGES.
+
+    Le fichier embarqué est prioritaire ; l'URL d'origine n'est utilisée qu'en l'absence de fichier.
+
+    Args:
+        cache: Instance de CacheActifs
+        nom: Clé de l'image dans IMAGES
+
+    Returns:
+        Un tuple (octets, extension) ou (None, None) si l'image est indisponible
+    """
+    image = IMAGES.get(nom)
+    if image is None:
+        return None, None
+    if image.get("fichier"):
+        chemin = os.path.join(REPERTOIRE_ASSETS, image["fichier"])
+        contenu = cache.obtenir(chemin)
+        if contenu is not None:
+            return contenu, os.path.splitext(chemin)[1].lower()
+    if image.get("url"):
+        contenu = cache.obtenir(image["url"])
+        if contenu is not None:
+            return contenu, os.path.splitext(image["url"].split("?")[0])[1].lower()
+    return None, None
@@ -0,0 +1,171 @@
+"""
+Mesure du temps de démarrage et des reruns des applications Streamlit (sans navigateur).
+
+Chaque répétition est exécutée dans un processus neuf afin de mesurer un démarrage à froid :
+- import : temps d'import des dépendances déclarées en tête de script
+- premier_rendu : première exécution complète du script
+- rerun_saisie : rerun après modification d'une saisie manuelle (v6 uniquement)
+- resultats_evaluer : rerun après un clic sur "Évaluer" (v6 uniquement)
+- rss_max_mo : pic de mémoire résidente du processus
+
+Utilisation :
+    python benchmarks/bench_applications.py --repetitions 5 --sortie resultats.json
+    python benchmarks/bench_applications.py --comparer ancien.json --sortie nouveau.json
+"""
+import argparse
+import ast
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPLICATIONS = ["v6.py", "menu_principal.py"]
+
+# Délai maximal d'une exécution de script par AppTest (en secondes)
+DELAI_APPTEST = 120
+
+
+def _importer_dependances(chemin_script):
+    """
+    Importe les modules déclarés au niveau supérieur du script, sans exécuter le script.
+    """
+    with open(chemin_script, "r", encoding="utf-8") as f:
+        arbre = ast.parse(f.read())
+    for noeud in arbre.body:
+        if isinstance(noeud, ast.Import):
+            for alias in noeud.names:
+                __import__(alias.name)
+        elif isinstance(noeud, ast.ImportFrom) and noeud.module:
+            __import__(noeud.module)
+
+
+def _chronometrer(fonction):
+    debut = time.perf_counter()
+    fonction()
+    return time.perf_counter() - debut
+
+
+def mesurer_application(nom_script):
+    """
+    Mesure une application dans le processus courant (appelé dans un sous-processus neuf).
+
+    Returns:
+        Un dictionnaire {mesure: valeur}
+    """
+    chemin_script = os.path.join(RACINE, nom_script)
+    sys.path.insert(0, RACINE)
+    # Les dépendances sont importées avant AppTest pour que streamlit soit compté dans l'import
+    mesures = {"import": _chronometrer(lambda: _importer_dependances(chemin_script))}
+
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(chemin_script, default_timeout=DELAI_APPTEST)
+    mesures["premier_rendu"] = _chronometrer(app.run)
+    if app.exception:
+        raise RuntimeError(f"Erreur dans {nom_script} : {app.exception[0].message}")
+
+    if nom_script == "v6.py":
+        champ = next(n for n in app.number_input if n.label.startswith("Taux de féminisation global"))
+        champ.set_value(champ.value + 1)
+        mesures["rerun_saisie"] = _chronometrer(app.run)
+
+        bouton = next(b for b in app.button if b.label == "Évaluer")
+        bouton.click()
+        mesures["resultats_evaluer"] = _chronometrer(app.run)
+        if app.exception:
+            raise RuntimeError(f"Erreur dans {nom_script} : {app.exception[0].message}")
+
+    # ru_maxrss est exprimé en kilo-octets sous Linux et en octets sous macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    mesures["rss_max_mo"] = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    return mesures
+
+
+def _lancer_sous_processus(nom_script):
+    sortie = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--interne", nom_script],
+        capture_output=True, text=True, cwd=RACINE, check=False
+    )
+    if sortie.returncode != 0:
+        raise RuntimeError(f"Échec de la mesure de {nom_script} :\n{sortie.stderr}")
+    return json.loads(sortie.stdout.strip().splitlines()[-1])
+
+
+def _resumer(valeurs):
+    return {
+        "mediane": statistics.median(valeurs),
+        "min": min(valeurs),
+        "max": max(valeurs),
+    }
+
+
+def _commit_courant():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=RACINE, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(ancien, nouveau):
+    """
+    Affiche l'écart relatif des médianes entre deux fichiers de résultats.
+    """
+    for application, mesures in nouveau["applications"].items():
+        for mesure, resume in mesures.items():
+            reference = ancien.get("applications", {}).get(application, {}).get(mesure)
+            if not reference or not reference["mediane"]:
+                continue
+            ecart = (resume["mediane"] - reference["mediane"]) / reference["mediane"] * 100
+            print(f"{application:20} {mesure:20} {reference['mediane']:10.3f} -> {resume['mediane']:10.3f} ({ecart:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--applications", nargs="+", default=APPLICATIONS)
+    parser.add_argument("--sortie", default=os.path.join(RACINE, "bench_output.json"))
+    parser.add_argument("--comparer", help="Fichier de résultats de référence")
+    parser.add_argument("--interne", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interne:
+        print(json.dumps(mesurer_application(args.interne)))
+        return
+
+    resultats = {
+        "commit": _commit_courant(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "repetitions": args.repetitions,
+        "unites": {"rss_max_mo": "Mo", "autres": "secondes"},
+        "applications": {},
+    }
+    for nom_script in args.applications:
+        executions = [_lancer_sous_processus(nom_script) for _ in range(args.repetitions)]
+        resultats["applications"][nom_script] = {
+            mesure: _resumer([e[mesure] for e in executions]) for mesure in executions[0]
+        }
+        for mesure, resume in resultats["applications"][nom_script].items():
+            print(f"{nom_script:20} {mesure:20} médiane {resume['mediane']:.3f}")
+
+    with open(args.sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, indent=2, ensure_ascii=False)
+    print(f"Résultats écrits dans {args.sortie}")
+
+    if args.comparer:
+        with open(args.comparer, "r", encoding="utf-8") as f:
+            comparer(json.load(f), resultats)
+
+
+if __name__ == "__main__":
+    main()
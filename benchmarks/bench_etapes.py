@@ -0,0 +1,351 @@
+"""
+Benchmark de non-régression des étapes de la chaîne d'évaluation, sur des portefeuilles synthétiques
+fixes (1, 1k, 100k et 1M entités, tirés avec une graine constante) :
+- equilibre_age : calculer_equilibre_age sur les colonnes du portefeuille
+- notation_scalaire : attribuer_note appelée indicateur par indicateur, entité par entité
+- notation_entite : Evaluation.evaluer pour chaque entité (cache des évaluations vidé)
+- notation_portefeuille : evaluer_portefeuille, vectorisée
+- ingestion_csv, ingestion_excel : lecture du fichier d'import du portefeuille
+- export_excel : exporter_portefeuille_excel
+- rapport_pdf : rapport PDF de chaque entité (données, textes, rendu ReportLab, sans cache ni graphiques)
+- rapport_pdf_html : même rapport par le moteur par défaut de v6 (modèle Jinja rendu par wkhtmltopdf) ;
+  étape ignorée, avec un message, si wkhtmltopdf est introuvable ou ne produit pas un vrai PDF (script
+  de substitution). Le pic de mémoire ne compte que le processus Python, pas wkhtmltopdf
+
+Pour chaque étape et chaque taille, on mesure la durée (médiane des répétitions), le débit en entités
+par seconde et le pic de mémoire allouée (tracemalloc, mesuré lors d'une exécution séparée). Les étapes
+les plus lentes ne sont mesurées que jusqu'à une taille maximale.
+
+Les résultats sont comparés à la référence enregistrée dans le dépôt : le script se termine en erreur
+si une étape est plus lente ou consomme plus de mémoire que la référence au-delà de la tolérance, et
+d'un écart absolu supérieur au plancher de la mesure (ECARTS_MINIMAUX : le bruit sur les très petites
+valeurs n'est pas une régression). La référence dépend de la machine : la régénérer
+(--mettre-a-jour-reference) sur la machine de mesure.
+
+Utilisation :
+    python benchmarks/bench_etapes.py
+    python benchmarks/bench_etapes.py --tailles 1 1k 100k --etapes notation_portefeuille export_excel
+    python benchmarks/bench_etapes.py --tolerance 10
+    python benchmarks/bench_etapes.py --mettre-a-jour-reference
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from evaluations import Evaluation, Evaluations, vider_cache_evaluations  # noqa: E402
+from export_excel import exporter_portefeuille_excel  # noqa: E402
+from notation import (INDICATEURS, SEUILS, attribuer_note, calculer_equilibre_age, calculer_version_seuils,  # noqa: E402
+                      evaluer_portefeuille)
+from rapport import (PROFIL_STANDARD, PROFILS_RENDU, construire_donnees_modele, preparer_donnees_entite,  # noqa: E402
+                     rendre_html, rendre_pdf_reportlab)
+from rendu_pdf import OPTIONS_PDF, ServiceRendu, est_pdf  # noqa: E402
+
+# Tailles des portefeuilles synthétiques (nom : nombre d'entités)
+TAILLES = {"1": 1, "1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+# Graine du tirage : les portefeuilles sont identiques d'une exécution à l'autre
+GRAINE = 2022
+
+# Tolérance par défaut (en %) avant qu'un écart à la référence soit considéré comme une régression
+TOLERANCE_PCT = float(os.environ.get("DI_BENCH_TOLERANCE", 25))
+
+# Écart absolu en dessous duquel une mesure n'est jamais une régression (1 ms, 0,1 Mo)
+ECARTS_MINIMAUX = {"mediane_s": 0.001, "pic_memoire_mo": 0.1}
+
+# Référence versionnée dans le dépôt
+CHEMIN_REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "references_etapes.json")
+
+
+def portefeuille_synthetique(nombre):
+    """
+    Tire un portefeuille au format du fichier d'import (une ligne par entité).
+
+    Args:
+        nombre: Nombre d'entités
+
+    Returns:
+        Un DataFrame avec les colonnes nom_entreprise, annee, les taux et les tranches d'âge
+    """
+    rng = np.random.default_rng(GRAINE)
+    moins_30 = rng.uniform(5, 45, nombre)
+    entre_30_50 = rng.uniform(20, 60, nombre)
+    return pd.DataFrame({
+        "nom_entreprise": [f"Entité {i}" for i in range(nombre)],
+        "annee": rng.integers(2018, 2025, nombre),
+        "taux_feminisation": rng.uniform(10, 60, nombre).round(1),
+        "taux_femmes_cadres": rng.uniform(5, 50, nombre).round(1),
+        "ecart_salaire": rng.uniform(0, 20, nombre).round(1),
+        "taux_handicap": rng.uniform(0, 10, nombre).round(1),
+        "moins_30_ans": moins_30.round(1),
+        "entre_30_50_ans": entre_30_50.round(1),
+        "plus_50_ans": (100 - moins_30 - entre_30_50).round(1),
+        "taux_absenteisme": rng.uniform(1, 8, nombre).round(1),
+    })
+
+
+def _notation_scalaire(evaluations):
+    colonnes = [(evaluations[cle].tolist(), SEUILS[cle], ordre_croissant) for cle, _, ordre_croissant in INDICATEURS]
+    for valeurs, seuils, ordre_croissant in colonnes:
+        for valeur in valeurs:
+            attribuer_note(valeur, seuils, ordre_croissant)
+
+
+def _notation_entite(evaluations):
+    # Comme dans v6 : version du profil calculée une fois, cache vidé pour mesurer le calcul des notes
+    vider_cache_evaluations()
+    version_seuils = calculer_version_seuils(SEUILS)
+    cles = [cle for cle, _, _ in INDICATEURS]
+    for ligne in evaluations[["nom_entreprise", "annee"] + cles].itertuples(index=False):
+        Evaluation.evaluer(ligne[0], ligne[1], dict(zip(cles, ligne[2:])), SEUILS, version_seuils)
+
+
+def _rapports_pdf(evaluations):
+    for evaluation in Evaluations.depuis_dataframe(evaluations):
+        data = preparer_donnees_entite(evaluation, SEUILS)
+        rendre_pdf_reportlab(construire_donnees_modele(data, evaluation.nom_entreprise, evaluation.annee))
+
+
+_service_rendu = None
+
+
+def _obtenir_service_rendu():
+    # Un seul worker, comme pour un rapport demandé depuis v6 : mesure la latence d'un rendu
+    global _service_rendu
+    if _service_rendu is None:
+        _service_rendu = ServiceRendu(nb_workers=1)
+    return _service_rendu
+
+
+def _rapports_pdf_html(evaluations):
+    service = _obtenir_service_rendu()
+    options = {**OPTIONS_PDF, **PROFILS_RENDU[PROFIL_STANDARD]["options_pdf"]}
+    for evaluation in Evaluations.depuis_dataframe(evaluations):
+        data = preparer_donnees_entite(evaluation, SEUILS)
+        html = rendre_html(construire_donnees_modele(data, evaluation.nom_entreprise, evaluation.annee))
+        service.rendre(html, options)
+
+
+def _verifier_wkhtmltopdf():
+    service = _obtenir_service_rendu()
+    if not service.disponible:
+        return "wkhtmltopdf introuvable : étape ignorée"
+    try:
+        pdf_data = service.rendre("<html><body><p>Test</p></body></html>", OPTIONS_PDF, delai=60)
+    except Exception as e:
+        return f"wkhtmltopdf en échec ({e}) : étape ignorée"
+    if not est_pdf(pdf_data):
+        return f"{service.chemin_wkhtmltopdf} ne produit pas un vrai PDF : étape ignorée"
+    return None
+
+
+class Jeu:
+    """Données d'une taille de portefeuille, préparées à la demande (hors mesure) et gardées en mémoire."""
+
+    def __init__(self, nombre, repertoire):
+        self.nombre = nombre
+        self.repertoire = repertoire
+        self._donnees = None
+        self._evaluations = None
+        self._fichiers = {}
+
+    @property
+    def donnees(self):
+        if self._donnees is None:
+            self._donnees = portefeuille_synthetique(self.nombre)
+        return self._donnees
+
+    @property
+    def evaluations(self):
+        if self._evaluations is None:
+            self._evaluations = evaluer_portefeuille(self.donnees, SEUILS)
+        return self._evaluations
+
+    def fichier(self, format_):
+        if format_ not in self._fichiers:
+            chemin = os.path.join(self.repertoire, f"portefeuille_{self.nombre}.{format_}")
+            if format_ == "csv":
+                self.donnees.to_csv(chemin, index=False)
+            else:
+                self.donnees.to_excel(chemin, index=False, engine="xlsxwriter")
+            self._fichiers[format_] = chemin
+        return self._fichiers[format_]
+
+
+# Étapes mesurées : (fabrique de la fonction mesurée à partir du jeu de données, taille maximale)
+ETAPES = {
+    "equilibre_age": (lambda jeu: lambda: calculer_equilibre_age(
+        jeu.donnees["moins_30_ans"], jeu.donnees["entre_30_50_ans"], jeu.donnees["plus_50_ans"]), None),
+    "notation_scalaire": (lambda jeu: lambda: _notation_scalaire(jeu.evaluations), None),
+    "notation_entite": (lambda jeu: lambda: _notation_entite(jeu.evaluations), 100_000),
+    "notation_portefeuille": (lambda jeu: lambda: evaluer_portefeuille(jeu.donnees, SEUILS), None),
+    "ingestion_csv": (lambda jeu: lambda: pd.read_csv(jeu.fichier("csv")), None),
+    "ingestion_excel": (lambda jeu: lambda: pd.read_excel(jeu.fichier("xlsx")), 100_000),
+    "export_excel": (lambda jeu: lambda: exporter_portefeuille_excel(jeu.evaluations, io.BytesIO()), 100_000),
+    "rapport_pdf": (lambda jeu: lambda: _rapports_pdf(jeu.evaluations), 1_000),
+    # Environ 0,2 s par rapport : mesuré sur un seul rapport (un lot de 1k durerait plus d'un quart d'heure)
+    "rapport_pdf_html": (lambda jeu: lambda: _rapports_pdf_html(jeu.evaluations), 1),
+}
+
+# Prérequis des étapes qui dépendent d'un outil externe : fonction qui retourne la raison de
+# l'ignorer (ou None si l'étape peut être mesurée)
+PREREQUIS = {
+    "rapport_pdf_html": _verifier_wkhtmltopdf,
+}
+
+
+def mesurer(fonction, nombre, repetitions):
+    """
+    Mesure une étape sur un portefeuille.
+
+    La fonction est répétée dans une même mesure tant qu'elle dure moins de 0,2 s (voir timeit), ce qui
+    rend les mesures des petits portefeuilles stables ; la première série sert aussi de préchauffage.
+
+    Returns:
+        Un dictionnaire avec mediane_s, min_s, debit_par_s (entités par seconde) et pic_memoire_mo
+    """
+    minuteur = timeit.Timer(fonction)
+    nb_boucles, _ = minuteur.autorange()
+    durees = [duree / nb_boucles for duree in minuteur.repeat(repetitions, nb_boucles)]
+
+    # Le suivi des allocations ralentit l'exécution : pic mesuré à part, sur une seule exécution
+    tracemalloc.start()
+    try:
+        fonction()
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mediane = statistics.median(durees)
+    return {
+        "mediane_s": mediane,
+        "min_s": min(durees),
+        "debit_par_s": nombre / mediane if mediane else None,
+        "pic_memoire_mo": pic / (1024 * 1024),
+    }
+
+
+def comparer(reference, resultats, tolerance_pct):
+    """
+    Compare les résultats à la référence et affiche l'écart de chaque mesure.
+
+    Une mesure régresse si elle dépasse la référence de plus de tolerance_pct et de plus de son
+    plancher absolu (ECARTS_MINIMAUX).
+
+    Returns:
+        La liste des régressions, sous forme de (étape, taille, mesure, écart en %)
+    """
+    regressions = []
+    for etape, tailles in resultats["etapes"].items():
+        for taille, mesure in tailles.items():
+            ancienne = reference.get("etapes", {}).get(etape, {}).get(taille)
+            if not ancienne:
+                print(f"{etape:22} {taille:>5}  pas de référence")
+                continue
+            for cle in ("mediane_s", "pic_memoire_mo"):
+                if not ancienne.get(cle):
+                    continue
+                ecart = (mesure[cle] - ancienne[cle]) / ancienne[cle] * 100
+                regression = ecart > tolerance_pct and mesure[cle] - ancienne[cle] > ECARTS_MINIMAUX[cle]
+                if regression:
+                    regressions.append((etape, taille, cle, ecart))
+                print(f"{etape:22} {taille:>5} {cle:15} {ancienne[cle]:12.6f} -> {mesure[cle]:12.6f} "
+                      f"({ecart:+6.1f}%){'  RÉGRESSION' if regression else ''}")
+    return regressions
+
+
+def _commit_courant():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=RACINE, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tailles", nargs="+", choices=list(TAILLES), default=list(TAILLES))
+    parser.add_argument("--etapes", nargs="+", choices=list(ETAPES), default=list(ETAPES))
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_PCT,
+                        help="Écart maximal à la référence, en %% (DI_BENCH_TOLERANCE)")
+    parser.add_argument("--reference", default=CHEMIN_REFERENCE)
+    parser.add_argument("--sortie", default=os.path.join(RACINE, "bench_output.json"))
+    parser.add_argument("--mettre-a-jour-reference", action="store_true",
+                        help="Écrit les résultats dans le fichier de référence au lieu de les comparer")
+    args = parser.parse_args()
+
+    etapes = []
+    for etape in args.etapes:
+        raison = PREREQUIS[etape]() if etape in PREREQUIS else None
+        if raison:
+            print(f"{etape:22}        {raison}")
+        else:
+            etapes.append(etape)
+
+    resultats = {
+        "commit": _commit_courant(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "repetitions": args.repetitions,
+        "etapes": {etape: {} for etape in etapes},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_etapes_") as repertoire:
+        for taille in args.tailles:
+            jeu = Jeu(TAILLES[taille], repertoire)
+            for etape in etapes:
+                fabrique, taille_max = ETAPES[etape]
+                if taille_max is not None and jeu.nombre > taille_max:
+                    continue
+                mesure = mesurer(fabrique(jeu), jeu.nombre, args.repetitions)
+                resultats["etapes"][etape][taille] = mesure
+                print(f"{etape:22} {taille:>5}  médiane {mesure['mediane_s'] * 1000:12.3f} ms  "
+                      f"débit {mesure['debit_par_s']:14,.0f} entités/s  pic {mesure['pic_memoire_mo']:9.1f} Mo")
+
+    with open(args.sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, indent=2, ensure_ascii=False)
+    print(f"Résultats écrits dans {args.sortie}")
+
+    if args.mettre_a_jour_reference:
+        reference = {}
+        if os.path.exists(args.reference):
+            with open(args.reference, "r", encoding="utf-8") as f:
+                reference = json.load(f)
+        # Seules les étapes et tailles mesurées remplacent celles de la référence
+        for etape, tailles in resultats["etapes"].items():
+            reference.setdefault("etapes", {}).setdefault(etape, {}).update(tailles)
+        reference.update({cle: resultats[cle] for cle in ("commit", "date", "python", "plateforme", "repetitions")})
+        with open(args.reference, "w", encoding="utf-8") as f:
+            json.dump(reference, f, indent=2, ensure_ascii=False)
+        print(f"Référence mise à jour : {args.reference}")
+        return
+
+    if not os.path.exists(args.reference):
+        print(f"Aucune référence ({args.reference}) : lancer avec --mettre-a-jour-reference")
+        return
+    with open(args.reference, "r", encoding="utf-8") as f:
+        regressions = comparer(json.load(f), resultats, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.tolerance:.0f} %")
+        sys.exit(1)
+    print(f"Aucune régression au-delà de {args.tolerance:.0f} %")
+
+
+if __name__ == "__main__":
+    main()
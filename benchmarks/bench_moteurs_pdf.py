@@ -0,0 +1,116 @@
+"""
+Comparaison des moteurs de rendu PDF (HTML avec wkhtmltopdf, ReportLab natif) et des profils de rendu
+(aperçu écran, standard, impression).
+
+Pour chaque moteur et chaque profil, le même rapport est rendu plusieurs fois ; on mesure le temps de
+rendu (médiane, min, max) et la taille du PDF produit. Le moteur HTML est ignoré si wkhtmltopdf
+n'est pas installé ou ne produit pas un vrai PDF (script de substitution), les graphiques si kaleido
+ne trouve pas de navigateur.
+
+Utilisation :
+    python benchmarks/bench_moteurs_pdf.py --repetitions 20 --sortie moteurs.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from notation import SEUILS  # noqa: E402
+from cache_rapports import CacheRapports  # noqa: E402
+from evaluations import Evaluation  # noqa: E402
+from rapport import (MOTEUR_HTML, MOTEUR_REPORTLAB, PROFIL_STANDARD, PROFILS, PROFILS_RENDU,  # noqa: E402
+                     construire_donnees_modele, construire_graphiques, preparer_donnees_entite, rendre_html,
+                     rendre_pdf_reportlab)
+from rendu_images import RenduImages  # noqa: E402
+from rendu_pdf import OPTIONS_PDF, ServiceRendu, est_pdf  # noqa: E402
+
+# Indicateurs de l'exemple EDF 2022 utilisés par défaut dans l'application
+INDICATEURS_EXEMPLE = {
+    "taux_feminisation": 30.0,
+    "taux_femmes_cadres": 28.0,
+    "taux_handicap": 5.5,
+    "ecart_salaire": 5.0,
+    "equilibre_age": 75.68,
+    "taux_absenteisme": 4.2,
+}
+
+
+def donnees_exemple():
+    """
+    Construit les données d'un rapport (format de preparer_donnees_entite) pour l'exemple EDF 2022.
+    """
+    return preparer_donnees_entite(Evaluation.evaluer("EDF SA", 2022, INDICATEURS_EXEMPLE), SEUILS)
+
+
+def mesurer(rendu, repetitions):
+    durees = []
+    pdf_data = None
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        pdf_data = rendu()
+        durees.append(time.perf_counter() - debut)
+    return {
+        "mediane_s": statistics.median(durees),
+        "min_s": min(durees),
+        "max_s": max(durees),
+        "taille_octets": len(pdf_data),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=10)
+    parser.add_argument("--sortie", help="Fichier JSON de résultats")
+    args = parser.parse_args()
+
+    data = donnees_exemple()
+    # Les images des graphiques sont rendues une fois (hors mesure) puis lues depuis le cache
+    rendu_images = RenduImages(CacheRapports(tempfile.mkdtemp(prefix="bench_images_")))
+    if not rendu_images.disponible:
+        print("Navigateur introuvable pour kaleido : rapports sans graphiques")
+
+    service = ServiceRendu(nb_workers=1)
+    moteur_html = service.disponible
+    if not moteur_html:
+        print("wkhtmltopdf introuvable : moteur HTML ignoré")
+    elif not est_pdf(service.rendre("<html><body><p>Test</p></body></html>", OPTIONS_PDF)):
+        print(f"{service.chemin_wkhtmltopdf} ne produit pas un vrai PDF : moteur HTML ignoré")
+        moteur_html = False
+
+    resultats = {}
+    for moteur in [MOTEUR_REPORTLAB, MOTEUR_HTML]:
+        if moteur == MOTEUR_HTML and not moteur_html:
+            continue
+        resultats[moteur] = {}
+        for profil in PROFILS:
+            graphiques = construire_graphiques(data, rendu_images, moteur, profil=profil)
+            template_data = construire_donnees_modele(data, "EDF SA", 2022, graphiques)
+            if moteur == MOTEUR_REPORTLAB:
+                rendu = lambda: rendre_pdf_reportlab(template_data, profil)  # noqa: E731
+            else:
+                options = {**OPTIONS_PDF, **PROFILS_RENDU[profil]["options_pdf"]}
+                rendu = lambda: service.rendre(rendre_html(template_data), options)  # noqa: E731
+            resultats[moteur][profil] = mesurer(rendu, args.repetitions)
+
+    for moteur, profils in resultats.items():
+        for profil, mesure in profils.items():
+            print(f"{moteur:10} {profil:11} médiane {mesure['mediane_s'] * 1000:8.1f} ms   "
+                  f"taille {mesure['taille_octets'] / 1024:8.1f} Ko")
+    if len(resultats) == 2:
+        rapport = resultats[MOTEUR_HTML][PROFIL_STANDARD]["mediane_s"] / resultats[MOTEUR_REPORTLAB][PROFIL_STANDARD]["mediane_s"]
+        print(f"ReportLab est {rapport:.1f} fois plus rapide que HTML (profil standard)")
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump({"repetitions": args.repetitions, "graphiques": rendu_images.disponible, "moteurs": resultats},
+                      f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Répertoire du cache des rapports rendus (PDF, HTML, Excel)
+REPERTOIRE_CACHE_RAPPORTS = os.environ.get(
+    "DI_CACHE_RAPPORTS", os.path.join(tempfile.gettempdir(), "di_cache_rapports")
+)
+
+# Taille maximale du cache sur disque (en Mo)
+TAILLE_MAX_CACHE_MO = int(os.environ.get("DI_CACHE_RAPPORTS_MO", 500))
+
+
+def cle_rapport(*elements):
+    """
+    Calcule la clé de cache d'un rapport à partir de son contenu.
+
+    Args:
+        elements: Valeurs sérialisables en JSON (données de preparer_donnees_entite, entreprise, année,
+                  format, version du modèle, ...)
+
+    Returns:
+        L'empreinte SHA-256 de la représentation JSON canonique des éléments
+    """
+    contenu = json.dumps(elements, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _verrou_fichier(chemin):
+    # Verrou exclusif entre processus, libéré à la fermeture du fichier (même si le processus s'arrête)
+    with open(chemin, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class CacheRapports:
+    """
+    Cache sur disque des rapports rendus, borné en taille avec éviction LRU.
+
+    Chaque artefact est stocké dans un fichier <clé>.<format> ; l'ordre d'utilisation est la date de
+    modification des fichiers, mise à jour à chaque lecture. Le répertoire est la seule référence : la
+    taille est recalculée depuis le répertoire avant chaque éviction, sous un verrou de fichier, si bien
+    que la borne vaut pour tous les processus qui partagent le répertoire (applications, processus de
+    rendu des lots). Les écritures sont atomiques.
+    """
+
+    # Fichier de verrou du répertoire (exclu des artefacts)
+    NOM_VERROU = ".verrou"
+
+    def __init__(self, repertoire=REPERTOIRE_CACHE_RAPPORTS, taille_max_octets=TAILLE_MAX_CACHE_MO * 1024 * 1024):
+        self.repertoire = repertoire
+        self.taille_max_octets = taille_max_octets
+        self.nb_hits = 0
+        self.nb_miss = 0
+        self._verrou = threading.Lock()
+        try:
+            os.makedirs(repertoire, exist_ok=True)
+            self.actif = True
+        except OSError:
+            # Système de fichiers en lecture seule : pas de cache
+            self.actif = False
+
+    def _chemin(self, nom):
+        return os.path.join(self.repertoire, nom)
+
+    def _artefacts(self):
+        # (date de modification, nom, taille) des artefacts présents, du moins au plus récemment utilisé
+        artefacts = []
+        for entree in os.scandir(self.repertoire):
+            if entree.name.endswith(".tmp") or entree.name == self.NOM_VERROU:
+                continue
+            try:
+                if entree.is_file():
+                    stat = entree.stat()
+                    artefacts.append((stat.st_mtime_ns, entree.name, stat.st_size))
+            except OSError:
+                # Artefact supprimé entre-temps par un autre processus
+                continue
+        return sorted(artefacts)
+
+    def lire(self, cle, format_):
+        """
+        Retourne l'artefact en cache, ou None s'il est absent.
+        """
+        if not self.actif:
+            return None
+        chemin = self._chemin(f"{cle}.{format_}")
+        try:
+            with open(chemin, "rb") as f:
+                contenu = f.read()
+        except OSError:
+            with self._verrou:
+                self.nb_miss += 1
+            return None
+        try:
+            os.utime(chemin)
+        except OSError:
+            pass
+        with self._verrou:
+            self.nb_hits += 1
+        return contenu
+
+    def ecrire(self, cle, format_, contenu):
+        """
+        Stocke un artefact puis évince les moins récemment utilisés si le cache dépasse sa taille maximale.
+        """
+        if not self.actif or len(contenu) > self.taille_max_octets:
+            return
+        nom = f"{cle}.{format_}"
+        try:
+            descripteur, chemin_tmp = tempfile.mkstemp(dir=self.repertoire, suffix=".tmp")
+            with os.fdopen(descripteur, "wb") as f:
+                f.write(contenu)
+            os.replace(chemin_tmp, self._chemin(nom))
+            self._evincer(nom)
+        except OSError:
+            return
+
+    def _evincer(self, nom_ecrit):
+        # Taille lue sur le disque : elle comprend les artefacts écrits par les autres processus
+        with _verrou_fichier(self._chemin(self.NOM_VERROU)):
+            artefacts = self._artefacts()
+            taille_totale = sum(taille for _, _, taille in artefacts)
+            for _, nom, taille in artefacts:
+                if taille_totale <= self.taille_max_octets:
+                    break
+                if nom == nom_ecrit:
+                    continue
+                try:
+                    os.unlink(self._chemin(nom))
+                except OSError:
+                    pass
+                taille_totale -= taille
+
+    def obtenir_ou_creer(self, cle, format_, fabrique):
+        """
+        Retourne l'artefact en cache, ou le crée avec fabrique() et le met en cache.
+
+        Args:
+            cle: Clé calculée par cle_rapport
+            format_: Extension de l'artefact (pdf, html, xlsx)
+            fabrique: Fonction sans argument qui produit l'artefact (bytes ou str)
+
+        Returns:
+            L'artefact, du même type que celui produit par fabrique
+        """
+        contenu = self.lire(cle, format_)
+        if contenu is not None:
+            return contenu.decode("utf-8") if format_ == "html" else contenu
+        contenu = fabrique()
+        if contenu is not None:
+            self.ecrire(cle, format_, contenu.encode("utf-8") if isinstance(contenu, str) else contenu)
+        return contenu
+
+    def statistiques(self):
+        """
+        Retourne le nombre d'artefacts et la taille occupée (tous processus confondus), ainsi que
+        les compteurs de hits/miss de cette instance.
+        """
+        artefacts = self._artefacts() if self.actif else []
+        with self._verrou:
+            return {
+                "nb_artefacts": len(artefacts),
+                "taille_octets": sum(taille for _, _, taille in artefacts),
+                "nb_hits": self.nb_hits,
+                "nb_miss": self.nb_miss,
+            }
@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import pandas as pd
+
+from metriques import REGISTRE
+
+# Nombre maximal de mesures gardées par session (les plus anciennes sont oubliées)
+MAX_MESURES = int(os.environ.get("DI_CHRONO_MESURES", 2000))
+
+# Nombre maximal de sessions suivies par le processus (la moins récemment utilisée est oubliée)
+MAX_SESSIONS = int(os.environ.get("DI_CHRONO_SESSIONS", 256))
+
+# Étapes de la chaîne d'évaluation, dans l'ordre d'affichage de la synthèse
+INGESTION = "ingestion"
+VALIDATION = "validation"
+NOTATION = "notation"
+NARRATION = "narration"
+GRAPHIQUES = "graphiques"
+EXPORTS = "exports"
+PDF = "pdf"
+ETAPES = [INGESTION, VALIDATION, NOTATION, NARRATION, GRAPHIQUES, EXPORTS, PDF]
+
+# Durées des étapes, toutes sessions confondues
+_DUREES_ETAPES = REGISTRE.histogramme("di_etape_duree_secondes", "Durée des étapes de la chaîne d'évaluation",
+                                      ("etape",))
+
+
+class Chronometre:
+    """
+    Durées des étapes de la chaîne d'évaluation mesurées pour une session.
+
+    Une mesure coûte deux lectures d'horloge et un ajout dans une file bornée : le chronométrage
+    reste actif en permanence, seul l'affichage est facultatif. Les mesures peuvent venir de
+    plusieurs threads (session Streamlit, file des travaux).
+    """
+
+    def __init__(self, max_mesures=MAX_MESURES):
+        # Mesures (étape, début en ns, durée en ns, thread), dans l'ordre de fin
+        self._mesures = deque(maxlen=max_mesures)
+        self._verrou = threading.Lock()
+
+    def etape(self, nom):
+        """Retourne un gestionnaire de contexte qui mesure la durée du bloc (exception comprise)."""
+        return _Mesure(self, nom)
+
+    def enregistrer(self, nom, debut_ns, duree_ns):
+        with self._verrou:
+            self._mesures.append((nom, debut_ns, duree_ns, threading.get_ident()))
+        _DUREES_ETAPES.observe(duree_ns / 1e9, etape=nom)
+
+    def mesures(self):
+        with self._verrou:
+            return list(self._mesures)
+
+    def vider(self):
+        with self._verrou:
+            self._mesures.clear()
+
+    def synthese(self):
+        """
+        Agrège les mesures par étape.
+
+        Returns:
+            Un DataFrame avec une ligne par étape mesurée (dans l'ordre de ETAPES) : Étape, Nombre,
+            Total (ms), Moyenne (ms), Max (ms) et Dernière (ms)
+        """
+        mesures = pd.DataFrame(self.mesures(), columns=["etape", "debut_ns", "duree_ns", "thread"])
+        durees = mesures.assign(duree_ms=mesures["duree_ns"] / 1e6).groupby("etape", sort=False)["duree_ms"]
+        synthese = pd.DataFrame({
+            "Nombre": durees.count(),
+            "Total (ms)": durees.sum(),
+            "Moyenne (ms)": durees.mean(),
+            "Max (ms)": durees.max(),
+            "Dernière (ms)": durees.last(),
+        })
+        ordre = [etape for etape in ETAPES if etape in synthese.index]
+        ordre += [etape for etape in synthese.index if etape not in ETAPES]
+        return synthese.loc[ordre].rename_axis("Étape").reset_index()
+
+    def trace_chrome(self):
+        """
+        Exporte les mesures au format Trace Event de Chrome (chrome://tracing, Perfetto).
+
+        Returns:
+            Le document JSON (str) : un événement complet (ph "X") par mesure, horodaté en microsecondes
+            depuis la première mesure, un fil d'exécution par thread
+        """
+        mesures = self.mesures()
+        origine = min((debut for _, debut, _, _ in mesures), default=0)
+        processus = os.getpid()
+        evenements = [
+            {"name": nom, "cat": "evaluateur", "ph": "X", "ts": (debut - origine) / 1000, "dur": duree / 1000,
+             "pid": processus, "tid": thread}
+            for nom, debut, duree, thread in mesures
+        ]
+        return json.dumps({"traceEvents": evenements, "displayTimeUnit": "ms"})
+
+
+class _Mesure:
+    # Gestionnaire de contexte écrit à la main : pas de générateur, moins coûteux que contextlib.contextmanager
+    __slots__ = ("chronometre", "nom", "debut")
+
+    def __init__(self, chronometre, nom):
+        self.chronometre = chronometre
+        self.nom = nom
+
+    def __enter__(self):
+        self.debut = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.chronometre.enregistrer(self.nom, self.debut, time.perf_counter_ns() - self.debut)
+        return False
+
+
+_chronometres = OrderedDict()
+_verrou_chronometres = threading.Lock()
+
+
+def chronometre(session):
+    """
+    Retourne le Chronometre d'une session, créé à la première utilisation.
+
+    Les chronomètres sont gardés au niveau du processus (et non dans st.session_state) pour que les
+    travaux exécutés en arrière-plan puissent y ajouter leurs mesures.
+
+    Args:
+        session: Identifiant de la session
+
+    Returns:
+        Le Chronometre de la session
+    """
+    with _verrou_chronometres:
+        if session in _chronometres:
+            _chronometres.move_to_end(session)
+        else:
+            _chronometres[session] = Chronometre()
+            while len(_chronometres) > MAX_SESSIONS:
+                _chronometres.popitem(last=False)
+        return _chronometres[session]
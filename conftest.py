@@ -0,0 +1 @@
+# Les modules de l'application sont à la racine du dépôt : ce fichier la place dans sys.path pour pytest
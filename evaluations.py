@@ -0,0 +1,394 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from metriques import REGISTRE
+from notation import (CODE_ABSENT, CODES_NOTES, INDICATEURS, NOTES, SEUILS, SEUILS_SCORE_GLOBAL, attribuer_note,
+                      calculer_version_seuils, coder_portefeuille, coder_score, codes_vers_chiffres, codes_vers_lettres,
+                      lettres_vers_codes)
+
+# Clés des indicateurs, dans l'ordre des valeurs et des notes des évaluations
+CLES = tuple(cle for cle, _, _ in INDICATEURS)
+
+# Position de chaque indicateur dans les valeurs et les notes
+POSITIONS = {cle: position for position, cle in enumerate(CLES)}
+
+
+# Catégories de la classification : points forts (A, B), à consolider (C), à améliorer (D, E)
+FORTS = "forts"
+A_CONSOLIDER = "a_consolider"
+A_AMELIORER = "a_ameliorer"
+
+# Hausse du score global quand un indicateur gagne une note (un palier franchi)
+GAIN_PALIER = 1 / len(CLES)
+
+# Sens de chaque indicateur (True : une valeur plus élevée est meilleure), dans l'ordre de CLES
+_CROISSANTS = np.array([ordre_croissant for _, _, ordre_croissant in INDICATEURS])
+
+# Nombre maximal de vecteurs d'indicateurs dont la notation est gardée en mémoire (éviction LRU)
+TAILLE_CACHE_EVALUATIONS = int(os.environ.get("DI_CACHE_EVALUATIONS", 1024))
+
+# Profils de seuils rencontrés, par version : seule la version entre dans la clé du cache
+_PROFILS = {}
+
+# Entités évaluées seules (Evaluation.evaluer) ou en portefeuille (Evaluations.evaluer, import de portefeuille)
+_EVALUATIONS = REGISTRE.compteur("di_evaluations_total", "Entités évaluées", ("mode",))
+
+
+def _scalaire(valeur):
+    # Scalaire numpy -> valeur Python (sérialisable en JSON, pickle plus léger)
+    return valeur.item() if isinstance(valeur, np.generic) else valeur
+
+
+def _canoniser(indicateurs):
+    # Tuple de flottants dans l'ordre de CLES ; + 0.0 ramène -0.0 à 0.0 (même clé pour deux saisies égales)
+    return tuple(float(indicateurs[cle]) + 0.0 for cle in CLES)
+
+
+@lru_cache(maxsize=TAILLE_CACHE_EVALUATIONS)
+def _noter(valeurs, version_seuils):
+    # Notation d'un vecteur canonique : (codes, score global, code de la note globale)
+    seuils = _PROFILS[version_seuils]
+    codes = tuple(
+        CODES_NOTES[attribuer_note(valeur, seuils[cle], ordre_croissant)]
+        for valeur, (cle, _, ordre_croissant) in zip(valeurs, INDICATEURS)
+    )
+    score_global = sum(len(NOTES) - code for code in codes) / len(codes)
+    return codes, score_global, coder_score(score_global)
+
+
+def statistiques_cache_evaluations():
+    """
+    Retourne l'état du cache des évaluations du processus.
+
+    Returns:
+        Un dictionnaire avec nb_entrees, taille_max et les compteurs nb_hits, nb_miss
+    """
+    info = _noter.cache_info()
+    return {"nb_entrees": info.currsize, "taille_max": info.maxsize, "nb_hits": info.hits, "nb_miss": info.misses}
+
+
+def vider_cache_evaluations():
+    """Vide le cache des évaluations et remet ses compteurs à zéro."""
+    _noter.cache_clear()
+
+
+REGISTRE.compteur("di_cache_evaluations_hits_total", "Évaluations servies par le cache",
+                  fonction=lambda: _noter.cache_info().hits)
+REGISTRE.compteur("di_cache_evaluations_miss_total", "Évaluations absentes du cache",
+                  fonction=lambda: _noter.cache_info().misses)
+
+
+class Evaluation:
+    """
+    Évaluation d'une entité : identité, valeur et note de chaque indicateur, score et note globale.
+
+    Les valeurs et les codes de notes (voir notation.CODES_NOTES) sont des tuples rangés dans l'ordre de
+    notation.INDICATEURS ; les lettres ne sont calculées qu'à la lecture de notes et note_globale.
+    Les attributs sont déclarés dans __slots__ (pas de dictionnaire par instance).
+    """
+
+    __slots__ = ("nom_entreprise", "annee", "valeurs", "codes", "score_global", "code_global")
+
+    def __init__(self, nom_entreprise, annee, valeurs, codes, score_global, code_global):
+        self.nom_entreprise = nom_entreprise
+        self.annee = annee
+        self.valeurs = tuple(valeurs)
+        self.codes = tuple(codes)
+        self.score_global = score_global
+        self.code_global = code_global
+
+    @classmethod
+    def evaluer(cls, nom_entreprise, annee, indicateurs, seuils=SEUILS, version_seuils=None):
+        """
+        Note une entité à partir de la valeur de ses indicateurs.
+
+        La notation est mémorisée par (valeurs des indicateurs, version du profil) : un même vecteur
+        noté plusieurs fois (tableau de bord, exports, rapport, reruns) n'est calculé qu'une fois.
+
+        Args:
+            nom_entreprise, annee: Identité de l'entité
+            indicateurs: Dictionnaire {clé d'indicateur: valeur}
+            seuils: Profil de seuils à appliquer
+            version_seuils: Version du profil (calculée par notation.calculer_version_seuils si absente)
+
+        Returns:
+            Une Evaluation
+        """
+        if version_seuils is None:
+            version_seuils = calculer_version_seuils(seuils)
+        _PROFILS.setdefault(version_seuils, seuils)
+        valeurs = _canoniser(indicateurs)
+        codes, score_global, code_global = _noter(valeurs, version_seuils)
+        _EVALUATIONS.inc(mode="entite")
+        return cls(nom_entreprise, annee, valeurs, codes, score_global, code_global)
+
+    @property
+    def notes(self):
+        """Lettres des notes, dans l'ordre de notation.INDICATEURS."""
+        return tuple(NOTES[code] for code in self.codes)
+
+    @property
+    def note_globale(self):
+        return NOTES[self.code_global]
+
+    def valeur(self, cle):
+        return self.valeurs[POSITIONS[cle]]
+
+    def note(self, cle):
+        return NOTES[self.codes[POSITIONS[cle]]]
+
+    def classer(self):
+        """Retourne la Classification des indicateurs de l'entité."""
+        return Classification(self.codes)
+
+    def prioriser(self, seuils=SEUILS):
+        """Retourne les Priorites d'amélioration des indicateurs de l'entité."""
+        return Priorites(self.valeurs, self.codes, seuils)
+
+    def notes_par_libelle(self):
+        """Retourne {libellé de l'indicateur: note}, dans l'ordre de notation.INDICATEURS."""
+        return {libelle: note for (_, libelle, _), note in zip(INDICATEURS, self.notes)}
+
+    def __repr__(self):
+        return (f"Evaluation({self.nom_entreprise!r}, {self.annee!r}, score_global={self.score_global:.2f}, "
+                f"note_globale={self.note_globale!r})")
+
+
+class Evaluations:
+    """
+    Évaluations d'un portefeuille, rangées par colonnes dans des tableaux numpy.
+
+    Les valeurs (float64) et les codes de notes (uint8) de tous les indicateurs forment chacun un seul
+    tableau à deux dimensions (une ligne par entité) ; une Evaluation n'est créée qu'à la lecture d'une
+    entité.
+    """
+
+    __slots__ = ("noms", "annees", "valeurs", "codes", "scores", "codes_globaux")
+
+    def __init__(self, noms, annees, valeurs, codes, scores, codes_globaux):
+        self.noms = noms
+        self.annees = annees
+        self.valeurs = valeurs
+        self.codes = codes
+        self.scores = scores
+        self.codes_globaux = codes_globaux
+
+    @classmethod
+    def evaluer(cls, donnees, seuils=SEUILS):
+        """
+        Évalue un portefeuille directement en codes de notes, sans produire de lettres.
+
+        Args:
+            donnees: DataFrame au format de notation.evaluer_portefeuille (equilibre_age déjà calculé)
+            seuils: Profil de seuils à appliquer
+
+        Returns:
+            Un conteneur Evaluations
+        """
+        codes, scores, codes_globaux = coder_portefeuille(donnees, seuils)
+        _EVALUATIONS.inc(len(donnees), mode="portefeuille")
+        return cls(
+            donnees["nom_entreprise"].to_numpy(dtype=object),
+            donnees["annee"].to_numpy(),
+            donnees[list(CLES)].to_numpy(dtype=np.float64),
+            codes,
+            scores,
+            codes_globaux,
+        )
+
+    @classmethod
+    def depuis_dataframe(cls, evaluations):
+        """
+        Range les évaluations d'un DataFrame par colonnes.
+
+        Args:
+            evaluations: DataFrame produit par notation.evaluer_portefeuille (ou lu depuis le portefeuille)
+
+        Returns:
+            Un conteneur Evaluations
+        """
+        return cls(
+            evaluations["nom_entreprise"].to_numpy(dtype=object),
+            evaluations["annee"].to_numpy(),
+            evaluations[list(CLES)].to_numpy(dtype=np.float64),
+            np.column_stack([lettres_vers_codes(evaluations[f"note_{cle}"]) for cle in CLES]).astype(np.uint8),
+            evaluations["score_global"].to_numpy(dtype=np.float64),
+            lettres_vers_codes(evaluations["note_globale"]),
+        )
+
+    def vers_dataframe(self):
+        """Retourne les évaluations au format de notation.evaluer_portefeuille."""
+        colonnes = {"nom_entreprise": self.noms, "annee": self.annees}
+        colonnes.update({cle: self.valeurs[:, position] for position, cle in enumerate(CLES)})
+        colonnes.update({f"note_{cle}": codes_vers_lettres(self.codes[:, position]) for position, cle in enumerate(CLES)})
+        colonnes.update({"score_global": self.scores, "note_globale": codes_vers_lettres(self.codes_globaux)})
+        return pd.DataFrame(colonnes)
+
+    def valeurs_indicateur(self, cle):
+        return self.valeurs[:, POSITIONS[cle]]
+
+    def codes_indicateur(self, cle):
+        return self.codes[:, POSITIONS[cle]]
+
+    def classer(self):
+        """Retourne la Classification des indicateurs de toutes les entités (une seule passe)."""
+        return Classification(self.codes)
+
+    def prioriser(self, seuils=SEUILS):
+        """Retourne les Priorites d'amélioration de toutes les entités (une seule passe)."""
+        return Priorites(self.valeurs, self.codes, seuils)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par les tableaux (hors chaînes des noms), en octets."""
+        return sum(tableau.nbytes for tableau in (self.noms, self.annees, self.valeurs, self.codes, self.scores,
+                                                   self.codes_globaux))
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __getitem__(self, position):
+        # Tranche, masque booléen ou tableau de positions (par exemple Classification.entites) : sous-ensemble
+        if isinstance(position, (slice, np.ndarray, list)):
+            return Evaluations(self.noms[position], self.annees[position], self.valeurs[position],
+                               self.codes[position], self.scores[position], self.codes_globaux[position])
+        return Evaluation(
+            self.noms[position],
+            _scalaire(self.annees[position]),
+            self.valeurs[position].tolist(),
+            self.codes[position].tolist(),
+            _scalaire(self.scores[position]),
+            _scalaire(self.codes_globaux[position]),
+        )
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+
+class Classification:
+    """
+    Classement de chaque indicateur de chaque entité en point fort, à consolider ou à améliorer.
+
+    Les trois masques booléens (une ligne par entité, une colonne par indicateur) sont calculés en une
+    seule passe vectorisée.
+    """
+
+    __slots__ = ("masques",)
+
+    def __init__(self, codes):
+        codes = np.asarray(codes, dtype=np.uint8)
+        if codes.ndim == 1:
+            codes = codes[None, :]
+        presentes = codes != CODE_ABSENT
+        self.masques = {
+            FORTS: codes <= CODES_NOTES["B"],
+            A_CONSOLIDER: codes == CODES_NOTES["C"],
+            A_AMELIORER: (codes >= CODES_NOTES["D"]) & presentes,
+        }
+
+    def __len__(self):
+        return len(self.masques[FORTS])
+
+    def entites(self, forts=(), a_consolider=(), a_ameliorer=()):
+        """
+        Retourne les entités qui remplissent toutes les conditions, par exemple celles qui sont
+        à améliorer à la fois sur l'écart de salaire et sur le taux de handicap.
+
+        Args:
+            forts, a_consolider, a_ameliorer: Clés des indicateurs qui doivent être dans la catégorie
+
+        Returns:
+            Un tableau des positions des entités
+        """
+        selection = np.ones(len(self), dtype=bool)
+        for categorie, cles in ((FORTS, forts), (A_CONSOLIDER, a_consolider), (A_AMELIORER, a_ameliorer)):
+            for cle in cles:
+                selection &= self.masques[categorie][:, POSITIONS[cle]]
+        return np.flatnonzero(selection)
+
+    def libelles(self, categorie, position=0):
+        """Retourne les libellés des indicateurs d'une entité classés dans une catégorie."""
+        return [libelle for (_, libelle, _), dedans in zip(INDICATEURS, self.masques[categorie][position]) if dedans]
+
+
+class Priorites:
+    """
+    Ordre dans lequel améliorer les indicateurs de chaque entité, du levier le moins coûteux au plus coûteux.
+
+    Pour chaque indicateur qui n'est pas noté A, l'écart est la distance entre la valeur et le seuil de la
+    note supérieure. Franchir ce seuil rapporte toujours GAIN_PALIER au score global ; le coût est donc
+    mesuré par l'effort, c'est-à-dire l'écart rapporté à la largeur de la tranche de la note actuelle (ce
+    qui rend comparables des indicateurs d'échelles différentes). À effort égal, la note la plus basse
+    passe en premier. Tous les calculs portent sur le portefeuille entier.
+    """
+
+    __slots__ = ("ecarts", "efforts", "ordre", "paliers_note_globale", "_codes")
+
+    def __init__(self, valeurs, codes, seuils=SEUILS):
+        valeurs = np.asarray(valeurs, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.uint8)
+        if codes.ndim == 1:
+            valeurs, codes = valeurs[None, :], codes[None, :]
+        bornes = np.array([seuils[cle] for cle in CLES], dtype=np.float64)
+        colonnes = np.arange(len(CLES))[None, :]
+
+        # Seuil de la note supérieure (A ou note absente : aucun seuil à franchir)
+        ameliorables = (codes > 0) & (codes != CODE_ABSENT)
+        rangs = np.where(ameliorables, codes, 1).astype(np.intp)
+        seuils_cibles = bornes[colonnes, rangs - 1]
+        ecarts = np.where(_CROISSANTS, seuils_cibles - np.nan_to_num(valeurs), np.nan_to_num(valeurs) - seuils_cibles)
+
+        # Largeur de la tranche de la note actuelle (la tranche E, ouverte, prend la largeur de la tranche D)
+        largeurs = np.abs(np.diff(bornes, axis=1))[colonnes, np.minimum(rangs, len(NOTES) - 2) - 1]
+        efforts = ecarts / np.where(largeurs > 0, largeurs, 1.0)
+
+        self.ecarts = np.where(ameliorables, ecarts, np.nan)
+        self.efforts = np.where(ameliorables, efforts, np.inf)
+        # Tri par effort croissant puis, à effort égal, par note décroissante (la dernière clé est la principale)
+        self.ordre = np.lexsort((-codes.astype(np.int16), self.efforts), axis=1)
+        self._codes = codes
+
+        # Nombre de paliers à franchir pour gagner une note globale (0 pour une note globale A)
+        scores = codes_vers_chiffres(codes).sum(axis=1, dtype=np.float64) / len(CLES)
+        codes_globaux = (scores[:, None] < np.asarray(SEUILS_SCORE_GLOBAL)[None, :]).sum(axis=1)
+        seuils_globaux = np.asarray([0.0] + SEUILS_SCORE_GLOBAL)[codes_globaux]
+        self.paliers_note_globale = np.where(
+            codes_globaux > 0, np.ceil(np.round((seuils_globaux - scores) / GAIN_PALIER, 9)), 0
+        ).astype(np.uint8)
+
+    def __len__(self):
+        return len(self.ordre)
+
+    def _masque(self, toutes):
+        # Indicateurs retenus : à améliorer (D, E) ou, avec toutes, tous ceux qui ont un seuil à franchir
+        if toutes:
+            return np.isfinite(self.efforts)
+        return (self._codes >= CODES_NOTES["D"]) & (self._codes != CODE_ABSENT)
+
+    def positions(self, position=0, toutes=False):
+        """Retourne les positions des indicateurs d'une entité, par ordre de priorité."""
+        masque = self._masque(toutes)[position]
+        return [int(colonne) for colonne in self.ordre[position] if masque[colonne]]
+
+    def cles(self, position=0, toutes=False):
+        """Retourne les clés des indicateurs à améliorer d'une entité, par ordre de priorité."""
+        return [CLES[colonne] for colonne in self.positions(position, toutes)]
+
+    def libelles(self, position=0, toutes=False):
+        """Retourne les libellés des indicateurs à améliorer d'une entité, par ordre de priorité."""
+        return [INDICATEURS[colonne][1] for colonne in self.positions(position, toutes)]
+
+    def prioritaires(self, toutes=False):
+        """
+        Retourne le levier prioritaire de chaque entité.
+
+        Returns:
+            Un tableau des positions de l'indicateur le moins coûteux à améliorer (-1 si aucun)
+        """
+        masque = np.take_along_axis(self._masque(toutes), self.ordre, axis=1)
+        premiers = self.ordre[np.arange(len(self)), masque.argmax(axis=1)]
+        return np.where(masque.any(axis=1), premiers, -1)
@@ -0,0 +1,231 @@
+import re
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from notation import COULEURS_NOTES, INDICATEURS
+from stockage import CHEMIN_BASE, compter_evaluations, iterer_evaluations, ouvrir_base
+from travaux import chemin_resultat
+
+# Nombre de lignes lues et converties en objets Python à la fois : borne la mémoire quel que soit le portefeuille
+TAILLE_BLOC = 10_000
+
+# Nombre maximal de lignes de données par feuille (limite d'Excel, en-tête exclu)
+MAX_LIGNES_FEUILLE = 1_048_575
+
+# Largeur maximale d'une colonne (en caractères)
+LARGEUR_MAX = 60
+
+FEUILLE_SYNTHESE = "Synthèse"
+
+
+def _nom_feuille(libelle):
+    # Excel interdit []:*?/\ dans les noms de feuilles et les limite à 31 caractères
+    return re.sub(r"[\[\]:*?/\\]", "-", libelle)[:31]
+
+
+def _largeur(serie, en_tete, decimales=None):
+    """
+    Estime la largeur d'une colonne sans formater chaque cellule.
+
+    Args:
+        serie: Colonne à écrire
+        en_tete: Titre de la colonne
+        decimales: Nombre de décimales affichées pour une colonne numérique, None pour du texte
+
+    Returns:
+        La largeur de colonne (en caractères)
+    """
+    if len(serie) == 0:
+        largeur = 0
+    elif decimales is None:
+        largeur = int(serie.astype(str).str.len().max())
+    else:
+        # Le texte le plus long est celui de la valeur minimale (signe) ou maximale
+        valeurs = serie.to_numpy(dtype=float)
+        valeurs = valeurs[np.isfinite(valeurs)]
+        largeur = max((len(f"{v:.{decimales}f}") for v in valeurs[[valeurs.argmin(), valeurs.argmax()]]),
+                      default=0) if len(valeurs) else 0
+    return min(max(largeur, len(en_tete)) + 2, LARGEUR_MAX)
+
+
+def _creer_formats(classeur):
+    """
+    Crée une seule fois les formats de cellule partagés par toutes les feuilles.
+    """
+    formats = {
+        "en_tete": classeur.add_format({
+            'bold': True,
+            'bg_color': '#007BFF',
+            'color': 'white',
+            'align': 'center',
+            'valign': 'vcenter',
+            'border': 1
+        }),
+        "annee": classeur.add_format({'num_format': '0'}),
+        "valeur": classeur.add_format({'num_format': '0.0'}),
+        "score": classeur.add_format({'num_format': '0.00'}),
+    }
+    formats["notes"] = {
+        note: classeur.add_format({'bg_color': couleur, 'align': 'center', 'bold': True})
+        for note, couleur in COULEURS_NOTES.items()
+    }
+    return formats
+
+
+def _colonnes_feuilles(bloc):
+    """
+    Prépare les colonnes de chaque feuille pour un bloc d'évaluations.
+
+    Returns:
+        Une liste (une entrée par feuille, dans l'ordre de NOMS_FEUILLES) de listes de (titre, série, type)
+        avec type parmi "texte", "annee", "valeur", "score", "note"
+    """
+    # Les notes manquantes sont écrites comme des cellules vides
+    def notes(colonne):
+        return bloc[colonne].astype(object).where(bloc[colonne].notna(), None)
+
+    entreprises = bloc["nom_entreprise"].astype(str)
+    annees = bloc["annee"].astype(float)
+
+    feuilles = [[
+        ("Entreprise", entreprises, "texte"),
+        ("Année", annees, "annee"),
+        ("Score global", bloc["score_global"].astype(float), "score"),
+        ("Note globale", notes("note_globale"), "note"),
+    ] + [(libelle, notes(f"note_{cle}"), "note") for cle, libelle, _ in INDICATEURS]]
+    for cle, libelle, _ in INDICATEURS:
+        feuilles.append([
+            ("Entreprise", entreprises, "texte"),
+            ("Année", annees, "annee"),
+            ("Valeur", bloc[cle].astype(float), "valeur"),
+            ("Note", notes(f"note_{cle}"), "note"),
+        ])
+    return feuilles
+
+
+# Feuilles du classeur : synthèse puis une feuille par indicateur
+NOMS_FEUILLES = [FEUILLE_SYNTHESE] + [_nom_feuille(libelle) for _, libelle, _ in INDICATEURS]
+
+# Titres des colonnes de chaque feuille (indépendants des données)
+TITRES_FEUILLES = [
+    ["Entreprise", "Année", "Score global", "Note globale"] + [libelle for _, libelle, _ in INDICATEURS]
+] + [["Entreprise", "Année", "Valeur", "Note"] for _ in INDICATEURS]
+
+# Nombre de décimales affichées par type de colonne numérique
+DECIMALES = {"annee": 0, "valeur": 1, "score": 2}
+
+
+def _ecrire_lignes(feuille, formats, colonnes, premiere_ligne):
+    """
+    Écrit un bloc de lignes à la suite des précédentes (les lignes d'une feuille sont écrites dans l'ordre).
+
+    Args:
+        feuille: Feuille xlsxwriter (en mode mémoire constante)
+        formats: Formats créés par _creer_formats
+        colonnes: Liste de (titre, série, type) du bloc
+        premiere_ligne: Numéro (0 pour l'en-tête) de la première ligne du bloc
+    """
+    formats_notes = formats["notes"]
+    types = [type_ for _, _, type_ in colonnes]
+    for decalage, ligne in enumerate(zip(*(serie.tolist() for _, serie, _ in colonnes))):
+        num_ligne = premiere_ligne + decalage
+        for num_col, (type_, valeur) in enumerate(zip(types, ligne)):
+            # Cellule vide pour les valeurs manquantes (None ou NaN)
+            if valeur is None or valeur != valeur:
+                continue
+            if type_ == "note":
+                feuille.write_string(num_ligne, num_col, valeur, formats_notes.get(valeur))
+            elif type_ == "texte":
+                feuille.write_string(num_ligne, num_col, str(valeur))
+            else:
+                feuille.write_number(num_ligne, num_col, valeur, formats[type_])
+
+
+def exporter_portefeuille_excel(evaluations, destination, progression=None, nb_lignes=None):
+    """
+    Exporte les évaluations d'un portefeuille dans un classeur Excel.
+
+    Le classeur contient une feuille de synthèse (score et notes de chaque entité) puis une feuille par
+    indicateur (valeur et note). Les évaluations sont traitées par blocs et les lignes sont écrites en flux
+    (mode mémoire constante de xlsxwriter) : la mémoire utilisée ne dépend pas du nombre d'entités.
+
+    Args:
+        evaluations: DataFrame produit par notation.evaluer_portefeuille (ou lu depuis le portefeuille), ou
+                     itérable de DataFrames consécutifs (par exemple stockage.iterer_evaluations)
+        destination: Chemin du fichier .xlsx ou fichier binaire ouvert en écriture
+        progression: Fonction optionnelle appelée avec (nb_lignes_ecrites, nb_lignes) après chaque bloc
+        nb_lignes: Nombre total d'évaluations, obligatoire pour un itérable de blocs
+
+    Raises:
+        ValueError: si le portefeuille dépasse le nombre de lignes d'une feuille Excel
+    """
+    if isinstance(evaluations, pd.DataFrame):
+        nb_lignes = len(evaluations)
+        blocs = (evaluations.iloc[debut:debut + TAILLE_BLOC] for debut in range(0, nb_lignes, TAILLE_BLOC))
+    else:
+        blocs = evaluations
+    if nb_lignes > MAX_LIGNES_FEUILLE:
+        raise ValueError(f"Trop d'évaluations pour une feuille Excel ({nb_lignes} > {MAX_LIGNES_FEUILLE})")
+
+    classeur = xlsxwriter.Workbook(destination, {'constant_memory': True})
+    try:
+        formats = _creer_formats(classeur)
+        feuilles = [classeur.add_worksheet(nom) for nom in NOMS_FEUILLES]
+        largeurs = [[min(len(titre) + 2, LARGEUR_MAX) for titre in titres] for titres in TITRES_FEUILLES]
+        for feuille, titres in zip(feuilles, TITRES_FEUILLES):
+            for num_col, titre in enumerate(titres):
+                feuille.write_string(0, num_col, titre, formats["en_tete"])
+            feuille.freeze_panes(1, 0)
+
+        # Chaque bloc est écrit à la suite dans toutes les feuilles (chacune a son propre flux)
+        nb_ecrites = 0
+        for bloc in blocs:
+            for feuille, colonnes, largeurs_feuille in zip(feuilles, _colonnes_feuilles(bloc), largeurs):
+                _ecrire_lignes(feuille, formats, colonnes, nb_ecrites + 1)
+                for num_col, (titre, serie, type_) in enumerate(colonnes):
+                    largeurs_feuille[num_col] = max(largeurs_feuille[num_col],
+                                                    _largeur(serie, titre, DECIMALES.get(type_)))
+            nb_ecrites += len(bloc)
+            if progression:
+                progression(nb_ecrites, nb_lignes)
+
+        # Largeurs connues une fois toutes les lignes vues (les colonnes sont écrites à la fermeture)
+        for feuille, largeurs_feuille in zip(feuilles, largeurs):
+            for num_col, largeur in enumerate(largeurs_feuille):
+                feuille.set_column(num_col, num_col, largeur)
+    finally:
+        classeur.close()
+
+
+def traiter_export_excel(id_travail, parametres, suivi):
+    """
+    Traitement de la file des travaux (voir travaux.py) : exporte une sélection du portefeuille dans un
+    classeur Excel propre au travail.
+
+    Les évaluations sont lues dans la base par blocs de TAILLE_BLOC lignes : ni le portefeuille ni le
+    classeur ne sont chargés en entier en mémoire.
+
+    Args:
+        id_travail: Identifiant du travail (nomme le classeur produit)
+        parametres: Dictionnaire avec filtres (et chemin_base, optionnel)
+        suivi: Objet travaux.Suivi, qui interrompt l'export si l'annulation est demandée
+
+    Returns:
+        Le chemin du classeur produit
+    """
+    chemin = chemin_resultat(id_travail, "xlsx")
+    conn = ouvrir_base(parametres.get("chemin_base") or CHEMIN_BASE)
+    try:
+        nb_lignes = compter_evaluations(conn, parametres["filtres"])
+
+        def publier_progression(nb_ecrites, nb_total):
+            suivi.progression(nb_ecrites / max(1, nb_total), f"{nb_ecrites} / {nb_total} lignes")
+
+        exporter_portefeuille_excel(iterer_evaluations(conn, parametres["filtres"], TAILLE_BLOC), chemin,
+                                    publier_progression, nb_lignes)
+    finally:
+        conn.close()
+    suivi.progression(1.0, f"{nb_lignes} évaluations exportées")
+    return chemin
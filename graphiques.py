@@ -0,0 +1,157 @@
+from functools import lru_cache
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+from notation import COULEURS_NOTES
+
+# Thèmes de couleurs disponibles pour les graphiques
+THEMES = {
+    "clair": {
+        "notes": COULEURS_NOTES,
+        "axe": "darkblue",
+        "seuil": "red",
+        "radar_ligne": "rgba(32, 128, 255, 0.8)",
+        "radar_remplissage": "rgba(32, 128, 255, 0.3)",
+    },
+}
+
+# Nombre maximal de figures sérialisées gardées en mémoire par type de graphique
+TAILLE_CACHE_FIGURES = 256
+
+# Les fonctions ci-dessous sont pures : elles ne dépendent que de leurs arguments (hachables)
+# et retournent la figure sérialisée en JSON. Le cache est partagé par toutes les sessions du processus.
+
+@lru_cache(maxsize=TAILLE_CACHE_FIGURES)
+def figure_jauge(score_global, note_globale, profil, theme="clair"):
+    """
+    Construit la jauge du score global.
+
+    Args:
+        score_global: Score global entre 1 et 5
+        note_globale: Note globale (A à E)
+        profil: Version du profil de seuils
+        theme: Nom du thème dans THEMES
+
+    Returns:
+        La spécification JSON de la figure
+    """
+    couleurs = THEMES[theme]
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=score_global,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': f"Score Global: {note_globale}", 'font': {'size': 24}},
+        gauge={
+            'axis': {'range': [0, 5], 'tickwidth': 1, 'tickcolor': couleurs["axe"]},
+            'bar': {'color': couleurs["notes"].get(note_globale, "#888888")},
+            'steps': [
+                {'range': [0, 1.5], 'color': couleurs["notes"]["E"]},
+                {'range': [1.5, 2.5], 'color': couleurs["notes"]["D"]},
+                {'range': [2.5, 3.5], 'color': couleurs["notes"]["C"]},
+                {'range': [3.5, 4.5], 'color': couleurs["notes"]["B"]},
+                {'range': [4.5, 5], 'color': couleurs["notes"]["A"]}
+            ],
+            'threshold': {
+                'line': {'color': couleurs["seuil"], 'width': 4},
+                'thickness': 0.75,
+                'value': score_global
+            }
+        }
+    ))
+
+    fig.update_layout(
+        height=300,
+        margin=dict(l=20, r=20, t=50, b=20),
+    )
+    return fig.to_json()
+
+@lru_cache(maxsize=TAILLE_CACHE_FIGURES)
+def figure_radar(scores, profil, theme="clair"):
+    """
+    Construit le graphique radar des scores par dimension.
+
+    Args:
+        scores: Tuple de triplets (indicateur, note, score)
+        profil: Version du profil de seuils
+        theme: Nom du thème dans THEMES
+
+    Returns:
+        La spécification JSON de la figure
+    """
+    couleurs = THEMES[theme]
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatterpolar(
+        r=[score for _, _, score in scores],
+        theta=[indicateur for indicateur, _, _ in scores],
+        fill='toself',
+        name='Scores par dimension',
+        line_color=couleurs["radar_ligne"],
+        fillcolor=couleurs["radar_remplissage"]
+    ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 5]
+            )
+        ),
+        showlegend=False,
+        height=300,
+        margin=dict(l=70, r=70, t=20, b=20),
+    )
+    return fig.to_json()
+
+@lru_cache(maxsize=TAILLE_CACHE_FIGURES)
+def figure_barres(scores, profil, theme="clair"):
+    """
+    Construit le graphique à barres des scores par indicateur, triés du plus élevé au plus bas.
+
+    Args:
+        scores: Tuple de triplets (indicateur, note, score)
+        profil: Version du profil de seuils
+        theme: Nom du thème dans THEMES
+
+    Returns:
+        La spécification JSON de la figure
+    """
+    df_sorted = pd.DataFrame(list(scores), columns=["Indicateur", "Note", "Score"])
+    df_sorted = df_sorted.sort_values("Score", ascending=False)
+
+    fig = px.bar(
+        df_sorted,
+        x="Indicateur",
+        y="Score",
+        color="Note",
+        color_discrete_map=THEMES[theme]["notes"],
+        text="Note",
+        labels={"Score": "Score (1-5)", "Indicateur": ""},
+        height=400
+    )
+
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        yaxis=dict(range=[0, 5.5]),
+        margin=dict(l=20, r=20, t=20, b=80),
+    )
+
+    fig.update_traces(textposition='outside')
+    return fig.to_json()
+
+def styles_notes(colonne, theme="clair"):
+    """
+    Calcule le style CSS d'une colonne de notes en une seule opération vectorisée.
+
+    À utiliser avec Styler.apply(styles_notes, subset=[...]) (application colonne par colonne).
+
+    Args:
+        colonne: Série pandas de notes (A à E)
+        theme: Nom du thème dans THEMES
+
+    Returns:
+        Une série de chaînes CSS alignée sur la colonne
+    """
+    couleurs = colonne.map(THEMES[theme]["notes"]).fillna("#888888")
+    return "background-color: " + couleurs + "; color: white; font-weight: bold"
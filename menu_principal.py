@@ -58,8 +58,8 @@ st.markdown("""
 st.markdown('<h1 class="title">🏢 Diversité & Inclusion</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">Plateforme d\'évaluation et d\'analyse de la diversité et inclusion en entreprise</p>', unsafe_allow_html=True)
 
-# Création de deux colonnes pour les boutons
-col1, col2 = st.columns(2)
+# Création de trois colonnes pour les boutons
+col1, col2, col3 = st.columns(3)
 
 # Fonction pour lancer une application
 def launch_app(app_name):
@@ -76,6 +76,12 @@ def launch_app(app_name):
                 st.error(f"Le fichier {script_path} n'existe pas.")
                 return
             subprocess.Popen([sys.executable, "-m", "streamlit", "run", script_path])
+        elif app_name == "portefeuille":
+            script_path = os.path.join(os.path.dirname(__file__), "portefeuille.py")
+            if not os.path.exists(script_path):
+                st.error(f"Le fichier {script_path} n'existe pas.")
+                return
+            subprocess.Popen([sys.executable, "-m", "streamlit", "run", script_path])
     except Exception as e:
         st.error(f"Erreur lors du lancement de l'application : {str(e)}")
         st.error("Veuillez vérifier que tous les fichiers nécessaires sont présents et que les dépendances sont installées.")
@@ -102,6 +108,17 @@ with col2:
         launch_app("evaluation")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Bouton pour le Portefeuille
+with col3:
+    st.markdown('<div class="card">', unsafe_allow_html=True)
+    st.markdown("""
+    ### 🗂️ Portefeuille D&I
+    Comparez les évaluations de toutes vos entités et filiales.
+    """)
+    if st.button("Lancer le Portefeuille", key="portefeuille"):
+        launch_app("portefeuille")
+    st.markdown('</div>', unsafe_allow_html=True)
+
 # Section d'aide
 st.markdown("---")
 st.markdown("""
@@ -117,6 +134,10 @@ st.markdown("""
    - Consultez les analyses détaillées
    - Téléchargez le rapport PDF
 
+3. **Portefeuille D&I**
+   - Importez un fichier avec une ligne par entité
+   - Filtrez, triez et comparez les évaluations enregistrées
+
 ### 🔧 Prérequis
 - Python 3.7 ou supérieur
 - Packages requis : streamlit, pandas, numpy, matplotlib, altair, plotly, reportlab, kaleido
@@ -0,0 +1,268 @@
+import bisect
+import math
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Adresse de l'endpoint Prometheus (local uniquement par défaut)
+HOTE_METRIQUES = os.environ.get("DI_METRIQUES_HOTE", "127.0.0.1")
+PORT_METRIQUES = int(os.environ.get("DI_METRIQUES_PORT", 9464))
+
+# Une session est comptée comme active si elle a exécuté son script depuis moins de ce délai (en secondes)
+DELAI_SESSION_ACTIVE = int(os.environ.get("DI_METRIQUES_SESSION_ACTIVE_S", 1800))
+
+# Bornes par défaut des histogrammes de durées (en secondes)
+BORNES_DUREES = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+TYPE_CONTENU = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_valeur(valeur):
+    if isinstance(valeur, int):
+        return str(valeur)
+    # Valeurs non finies au format Prometheus (NaN, +Inf, -Inf) et non celui de Python (nan, inf)
+    valeur = float(valeur)
+    if math.isnan(valeur):
+        return "NaN"
+    if math.isinf(valeur):
+        return "+Inf" if valeur > 0 else "-Inf"
+    return repr(valeur)
+
+
+def _echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_etiquettes(noms, valeurs, supplementaires=()):
+    paires = list(zip(noms, valeurs)) + list(supplementaires)
+    if not paires:
+        return ""
+    return "{" + ",".join(f'{nom}="{_echapper(valeur)}"' for nom, valeur in paires) + "}"
+
+
+class _Metrique:
+    type_ = None
+
+    def __init__(self, nom, aide, etiquettes=(), fonction=None):
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        # Valeur lue à l'exposition : un nombre, ou {tuple des valeurs d'étiquettes: nombre}
+        self.fonction = fonction
+        self._valeurs = {}
+        self._verrou = threading.Lock()
+
+    def _cle(self, etiquettes):
+        return tuple(str(etiquettes[nom]) for nom in self.etiquettes)
+
+    def _echantillons(self):
+        if self.fonction is None:
+            with self._verrou:
+                return list(self._valeurs.items())
+        valeur = self.fonction()
+        return list(valeur.items()) if isinstance(valeur, dict) else [((), valeur)]
+
+    def exposer(self):
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type_}"]
+        for cle, valeur in self._echantillons():
+            lignes.append(f"{self.nom}{_format_etiquettes(self.etiquettes, cle)} {_format_valeur(valeur)}")
+        return lignes
+
+
+class Compteur(_Metrique):
+    """Valeur croissante (nombre d'évaluations, de rapports, ...), par combinaison d'étiquettes."""
+
+    type_ = "counter"
+
+    def inc(self, valeur=1, **etiquettes):
+        cle = self._cle(etiquettes)
+        with self._verrou:
+            self._valeurs[cle] = self._valeurs.get(cle, 0) + valeur
+
+
+class Jauge(_Metrique):
+    """Valeur instantanée (profondeur de file, mémoire, ...), fixée par set ou lue par une fonction."""
+
+    type_ = "gauge"
+
+    def set(self, valeur, **etiquettes):
+        cle = self._cle(etiquettes)
+        with self._verrou:
+            self._valeurs[cle] = valeur
+
+
+class Histogramme(_Metrique):
+    """Répartition de valeurs observées (latences) dans des tranches cumulées, avec somme et nombre."""
+
+    type_ = "histogram"
+
+    def __init__(self, nom, aide, etiquettes=(), bornes=BORNES_DUREES):
+        super().__init__(nom, aide, etiquettes)
+        self.bornes = tuple(sorted(bornes))
+
+    def observe(self, valeur, **etiquettes):
+        cle = self._cle(etiquettes)
+        # Une seule tranche incrémentée par observation ; le cumul est calculé à l'exposition
+        position = bisect.bisect_left(self.bornes, valeur)
+        with self._verrou:
+            serie = self._valeurs.get(cle)
+            if serie is None:
+                serie = self._valeurs[cle] = [[0] * (len(self.bornes) + 1), 0.0, 0]
+            serie[0][position] += 1
+            serie[1] += valeur
+            serie[2] += 1
+
+    def exposer(self):
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type_}"]
+        with self._verrou:
+            series = [(cle, list(tranches), somme, nombre) for cle, (tranches, somme, nombre) in self._valeurs.items()]
+        for cle, tranches, somme, nombre in series:
+            cumul = 0
+            for borne, effectif in zip(self.bornes + (math.inf,), tranches):
+                cumul += effectif
+                etiquettes = _format_etiquettes(self.etiquettes, cle, [("le", _format_valeur(borne))])
+                lignes.append(f"{self.nom}_bucket{etiquettes} {cumul}")
+            etiquettes = _format_etiquettes(self.etiquettes, cle)
+            lignes.append(f"{self.nom}_sum{etiquettes} {_format_valeur(somme)}")
+            lignes.append(f"{self.nom}_count{etiquettes} {nombre}")
+        return lignes
+
+
+class Registre:
+    """
+    Ensemble des métriques d'un processus, exposées au format texte de Prometheus.
+
+    La déclaration d'une métrique est idempotente : un script Streamlit réexécuté à chaque rerun
+    retrouve la métrique existante (et ses valeurs) au lieu d'en créer une nouvelle.
+    """
+
+    def __init__(self):
+        self._metriques = {}
+        self._verrou = threading.Lock()
+
+    def _declarer(self, classe, nom, *args, **kwargs):
+        with self._verrou:
+            metrique = self._metriques.get(nom)
+            if metrique is None:
+                metrique = self._metriques[nom] = classe(nom, *args, **kwargs)
+            elif kwargs.get("fonction") is not None:
+                # Fonction redéclarée (par exemple par un nouveau service) : la plus récente est lue
+                metrique.fonction = kwargs["fonction"]
+            return metrique
+
+    def compteur(self, nom, aide, etiquettes=(), fonction=None):
+        return self._declarer(Compteur, nom, aide, etiquettes, fonction=fonction)
+
+    def jauge(self, nom, aide, etiquettes=(), fonction=None):
+        return self._declarer(Jauge, nom, aide, etiquettes, fonction=fonction)
+
+    def histogramme(self, nom, aide, etiquettes=(), bornes=BORNES_DUREES):
+        return self._declarer(Histogramme, nom, aide, etiquettes, bornes=bornes)
+
+    def exposer(self):
+        """
+        Retourne toutes les métriques au format texte de Prometheus (version 0.0.4).
+
+        Une métrique dont la fonction échoue est omise, sans empêcher l'exposition des autres.
+        """
+        with self._verrou:
+            metriques = list(self._metriques.values())
+        lignes = []
+        for metrique in metriques:
+            try:
+                lignes.extend(metrique.exposer())
+            except Exception:
+                continue
+        return "\n".join(lignes) + "\n"
+
+
+# Registre unique du processus, partagé par tous les modules et toutes les sessions
+REGISTRE = Registre()
+
+# Sessions vues récemment : identifiant -> instant de la dernière exécution du script
+_sessions = {}
+_verrou_sessions = threading.Lock()
+
+
+def signaler_session(session):
+    """Note l'activité d'une session (appelé à chaque exécution du script de l'application)."""
+    with _verrou_sessions:
+        _sessions[session] = time.monotonic()
+
+
+def _sessions_actives():
+    limite = time.monotonic() - DELAI_SESSION_ACTIVE
+    with _verrou_sessions:
+        for session in [s for s, instant in _sessions.items() if instant < limite]:
+            del _sessions[session]
+        return len(_sessions)
+
+
+def _memoire_processus():
+    # Mémoire résidente actuelle (Linux), sinon pic de mémoire résidente (Unix), sinon 0 (Windows)
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        if resource is None:
+            return 0
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+REGISTRE.jauge("di_sessions_actives", "Sessions actives sur la période DI_METRIQUES_SESSION_ACTIVE_S",
+               fonction=_sessions_actives)
+REGISTRE.jauge("di_memoire_processus_octets", "Mémoire résidente du processus", fonction=_memoire_processus)
+REGISTRE.jauge("di_memoire_par_session_octets", "Mémoire résidente du processus par session active",
+               fonction=lambda: _memoire_processus() / max(1, _sessions_actives()))
+
+
+class _GestionnaireMetriques(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        corps = REGISTRE.exposer().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", TYPE_CONTENU)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        # Pas de journal par requête (une requête à chaque collecte)
+        pass
+
+
+_serveur = None
+_verrou_serveur = threading.Lock()
+
+
+def demarrer_serveur(hote=HOTE_METRIQUES, port=PORT_METRIQUES):
+    """
+    Démarre l'endpoint /metrics dans un thread, une seule fois par processus.
+
+    Args:
+        hote, port: Adresse d'écoute (port 0 : port libre choisi par le système)
+
+    Returns:
+        L'adresse (hôte, port) de l'endpoint, ou None si le port est déjà utilisé (par exemple par une
+        autre application lancée sur la même machine)
+    """
+    global _serveur
+    with _verrou_serveur:
+        if _serveur is None:
+            try:
+                _serveur = ThreadingHTTPServer((hote, port), _GestionnaireMetriques)
+            except OSError:
+                return None
+            _serveur.daemon_threads = True
+            threading.Thread(target=_serveur.serve_forever, name="metriques", daemon=True).start()
+        return _serveur.server_address[:2]
@@ -0,0 +1,166 @@
+import functools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from notation import CLES_PAR_LIBELLE, INDICATEURS
+
+# Répertoire des catalogues de textes, un fichier <langue>.json par langue
+REPERTOIRE_LOCALES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+
+# Langues disponibles (code : nom affiché) et langue par défaut
+LANGUES = {"fr": "Français", "en": "English"}
+LANGUE_PAR_DEFAUT = "fr"
+
+
+class Catalogue:
+    """
+    Textes des rapports et du tableau de bord dans une langue, compilés en tables de correspondance.
+
+    Les textes paramétrés sont stockés sous forme de méthodes format déjà analysées, indexées par
+    (clé d'indicateur, note) : seule la cellule demandée est formatée.
+    """
+
+    def __init__(self, langue, messages):
+        self.langue = langue
+        self.libelles = dict(messages["indicateurs"])
+        self._cles = {**CLES_PAR_LIBELLE, **{libelle: cle for cle, libelle in self.libelles.items()}}
+        self._analyses = {
+            (cle, note): texte.format
+            for cle, textes in messages["analyses"].items()
+            for note, texte in textes.items()
+        }
+        self._recommandations = {
+            (cle, note): "\n".join(lignes)
+            for cle, textes in messages["recommandations"].items()
+            for note, lignes in textes.items()
+        }
+        self._conclusions = dict(messages["conclusions"])
+        self.analyse_donnees_absentes = messages["analyse_donnees_absentes"]
+        self.analyse_indisponible = messages["analyse_indisponible"]
+        self.recommandation_indisponible = messages["recommandation_indisponible"]
+        self.conclusion_par_defaut = messages["conclusion_par_defaut"]
+        self._point_fort = messages["point_fort"].format
+        self._axe_amelioration = messages["axe_amelioration"].format
+
+        tableau_de_bord = messages["tableau_de_bord"]
+        self.tableau_de_bord_point_fort = tableau_de_bord["point_fort"]
+        self.tableau_de_bord_a_consolider = tableau_de_bord["a_consolider"]
+        self._ecart_seuil = tableau_de_bord["ecart_seuil"].format
+        self._paliers_note_globale = tableau_de_bord["paliers_note_globale"].format
+        self._priorites = dict(tableau_de_bord["priorites"])
+        self._conclusions_tableau_de_bord = {note: texte.format for note, texte in tableau_de_bord["conclusions"].items()}
+
+        # Titres des rapports, passés tels quels aux modèles
+        self.rapport = dict(messages["rapport"])
+
+    def cle(self, indicateur):
+        """Retourne la clé d'un indicateur désigné par sa clé ou par son libellé (français ou de la langue)."""
+        return self._cles.get(indicateur, indicateur)
+
+    def libelle(self, indicateur):
+        """Retourne le libellé d'un indicateur dans la langue du catalogue."""
+        cle = self.cle(indicateur)
+        return self.libelles.get(cle, indicateur)
+
+    def modele_analyse(self, indicateur, note):
+        """Retourne la méthode format du texte d'analyse, ou None si le catalogue ne le contient pas."""
+        return self._analyses.get((self.cle(indicateur), note))
+
+    def analyse(self, indicateur, valeur, note):
+        if valeur == 0:
+            return self.analyse_donnees_absentes
+        modele = self.modele_analyse(indicateur, note)
+        return modele(valeur=valeur) if modele else self.analyse_indisponible
+
+    def recommandations(self, indicateur, note, defaut=None):
+        return self._recommandations.get(
+            (self.cle(indicateur), note), self.recommandation_indisponible if defaut is None else defaut
+        )
+
+    def conclusion(self, note):
+        return self._conclusions.get(note, self.conclusion_par_defaut)
+
+    def point_fort(self, indicateur, note):
+        return self._point_fort(indicateur=self.libelle(indicateur), note=note)
+
+    def axe_amelioration(self, indicateur, note):
+        return self._axe_amelioration(indicateur=self.libelle(indicateur), note=note)
+
+    def priorite(self, indicateur):
+        """Action prioritaire affichée dans le tableau de bord pour un indicateur noté D ou E."""
+        return self._priorites.get(self.cle(indicateur), "")
+
+    def ecart_seuil(self, ecart, note):
+        """Distance au seuil de la note supérieure, affichée avec les priorités."""
+        return self._ecart_seuil(ecart=ecart, note=note)
+
+    def paliers_note_globale(self, nombre, note):
+        """Nombre total de notes à gagner sur les indicateurs pour que la note globale passe à note."""
+        return self._paliers_note_globale(nombre=nombre, note=note)
+
+    def conclusion_tableau_de_bord(self, note_globale, score_global):
+        modele = self._conclusions_tableau_de_bord.get(note_globale)
+        return modele(note_globale=note_globale, score_global=score_global) if modele else ""
+
+
+@functools.lru_cache(maxsize=None)
+def catalogue(langue=LANGUE_PAR_DEFAUT):
+    """
+    Charge et compile le catalogue d'une langue, une seule fois par processus (à la première utilisation).
+
+    Args:
+        langue: Code de la langue (clé de LANGUES)
+
+    Returns:
+        Le Catalogue de la langue
+
+    Raises:
+        ValueError: si la langue n'est pas disponible
+    """
+    if langue not in LANGUES:
+        raise ValueError(f"Langue inconnue : {langue}")
+    with open(os.path.join(REPERTOIRE_LOCALES, f"{langue}.json"), "r", encoding="utf-8") as f:
+        return Catalogue(langue, json.load(f))
+
+
+def narratifs_portefeuille(evaluations, langue=LANGUE_PAR_DEFAUT):
+    """
+    Produit en une passe les textes des rapports de toutes les entités d'un portefeuille.
+
+    Les entités sont regroupées par note : chaque modèle n'est recherché qu'une fois par
+    (indicateur, note), puis appliqué aux valeurs du groupe.
+
+    Args:
+        evaluations: DataFrame produit par notation.evaluer_portefeuille
+        langue: Code de la langue des textes (clé de LANGUES)
+
+    Returns:
+        Un DataFrame de même index avec, pour chaque indicateur, les colonnes analyse_<clé> et
+        recommandations_<clé> (vide pour les notes sans recommandation), puis la colonne conclusion
+    """
+    textes = catalogue(langue)
+    narratifs = pd.DataFrame(index=evaluations.index)
+    for cle, _, _ in INDICATEURS:
+        # Valeurs manquantes traitées comme absentes, comme la valeur 0 dans Catalogue.analyse
+        valeurs = evaluations[cle].fillna(0).to_numpy()
+        notes = evaluations[f"note_{cle}"].to_numpy()
+        absentes = valeurs == 0
+
+        analyses = np.full(len(evaluations), textes.analyse_indisponible, dtype=object)
+        analyses[absentes] = textes.analyse_donnees_absentes
+        for note in pd.unique(notes[~absentes]):
+            modele = textes.modele_analyse(cle, note)
+            if modele is None:
+                continue
+            masque = (notes == note) & ~absentes
+            analyses[masque] = [modele(valeur=v) for v in valeurs[masque].tolist()]
+        narratifs[f"analyse_{cle}"] = analyses
+
+        recommandations = {note: textes.recommandations(cle, note, defaut="") for note in pd.unique(notes)}
+        narratifs[f"recommandations_{cle}"] = pd.Series(notes, index=evaluations.index).map(recommandations)
+
+    narratifs["conclusion"] = evaluations["note_globale"].map(textes.conclusion)
+    return narratifs
@@ -0,0 +1,259 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+# Correction des seuils pour le secteur énergie/industrie
+SEUILS = {
+    "taux_feminisation": [40, 35, 30, 25],  # % (augmenté pour refléter les objectifs du secteur)
+    "taux_femmes_cadres": [35, 30, 25, 20],  # % (ajusté selon les objectifs 2025)
+    "taux_handicap": [6, 5, 4, 3],  # % (maintenu avec le seuil légal de 6%)
+    "ecart_salaire": [2, 4, 8, 12],  # % (réduit pour plus d'ambition)
+    "equilibre_age": [85, 75, 65, 55],  # % (augmenté pour favoriser la diversité des âges)
+    "taux_absenteisme": [2.5, 3.5, 4.5, 5.5]  # % (ajusté selon les standards du secteur)
+}
+
+# Indicateurs évalués : (clé, libellé affiché, une valeur plus élevée est meilleure)
+INDICATEURS = [
+    ("taux_feminisation", "Taux de féminisation global", True),
+    ("taux_femmes_cadres", "Taux de femmes cadres", True),
+    ("taux_handicap", "Taux d'emploi handicap", True),
+    ("ecart_salaire", "Écart de salaire H/F", False),
+    ("equilibre_age", "Équilibre des âges", True),
+    ("taux_absenteisme", "Taux d'absentéisme", False),
+]
+
+# Libellé affiché -> clé de l'indicateur (les résultats des rapports sont indexés par libellé)
+CLES_PAR_LIBELLE = {libelle: cle for cle, libelle, _ in INDICATEURS}
+
+NOTES = ["A", "B", "C", "D", "E"]
+
+# Couleur associée à chaque note
+COULEURS_NOTES = {
+    "A": "#4CAF50",  # Vert
+    "B": "#8BC34A",  # Vert clair
+    "C": "#FFC107",  # Jaune
+    "D": "#FF9800",  # Orange
+    "E": "#F44336"   # Rouge
+}
+
+# Seuils de conversion d'un score moyen (1 à 5) en note globale
+SEUILS_SCORE_GLOBAL = [4.5, 3.5, 2.5, 1.5]
+
+# Codes entiers des notes, utilisés dans les calculs (0 -> A, ..., 4 -> E) ; les lettres ne sont
+# produites qu'à l'affichage. CODE_ABSENT désigne une note manquante.
+CODES_NOTES = {note: code for code, note in enumerate(NOTES)}
+CODE_ABSENT = 255
+
+# Valeur numérique de chaque note (A -> 5, ..., E -> 1)
+CHIFFRES_NOTES = {note: len(NOTES) - code for note, code in CODES_NOTES.items()}
+
+# Tables de correspondance indexées par code (256 entrées : tout code uint8 est valide)
+_TABLE_LETTRES = np.array(NOTES + [""] * (256 - len(NOTES)), dtype="U1")
+_TABLE_CHIFFRES = np.array([CHIFFRES_NOTES[note] for note in NOTES] + [0] * (256 - len(NOTES)), dtype=np.uint8)
+_TABLE_COULEURS = np.array([COULEURS_NOTES[note] for note in NOTES] + ["#888888"] * (256 - len(NOTES)), dtype="U7")
+
+# Fonction pour attribuer une note (A-E) selon les seuils définis
+def attribuer_note(valeur, seuils, ordre_croissant=True):
+    """
+    Attribue une note de A à E selon les seuils définis.
+
+    Args:
+        valeur: La valeur à évaluer
+        seuils: Liste de 4 seuils [seuil_A, seuil_B, seuil_C, seuil_D]
+        ordre_croissant: Si True, une valeur plus élevée donne une meilleure note
+                        Si False, une valeur plus basse donne une meilleure note
+
+    Returns:
+        Une lettre entre A et E correspondant à la note
+    """
+    if ordre_croissant:
+        if valeur >= seuils[0]:
+            return "A"
+        elif valeur >= seuils[1]:
+            return "B"
+        elif valeur >= seuils[2]:
+            return "C"
+        elif valeur >= seuils[3]:
+            return "D"
+        else:
+            return "E"
+    else:  # Ordre décroissant (plus petit = meilleur)
+        if valeur <= seuils[0]:
+            return "A"
+        elif valeur <= seuils[1]:
+            return "B"
+        elif valeur <= seuils[2]:
+            return "C"
+        elif valeur <= seuils[3]:
+            return "D"
+        else:
+            return "E"
+
+# Fonction pour convertir les notes en valeurs numériques
+def note_vers_chiffre(note):
+    """
+    Convertit une note de A à E en valeur numérique.
+
+    Args:
+        note: Une lettre entre A et E
+
+    Returns:
+        Un entier entre 1 et 5
+    """
+    return CHIFFRES_NOTES.get(note, 0)
+
+# Fonction pour convertir un score numérique en note de A à E
+def chiffre_vers_note(score):
+    """
+    Convertit un score numérique en note de A à E.
+
+    Args:
+        score: Un nombre entre 1 et 5
+
+    Returns:
+        Une lettre entre A et E
+    """
+    return NOTES[coder_score(score)]
+
+def coder_score(score):
+    """
+    Convertit un score numérique en code de note globale (0 pour A, ..., 4 pour E).
+    """
+    # Nombre de seuils non atteints
+    return sum(not score >= seuil for seuil in SEUILS_SCORE_GLOBAL)
+
+# Fonction pour calculer la répartition équilibrée des âges
+def calculer_equilibre_age(moins_30, entre_30_50, plus_50):
+    """
+    Calcule un score d'équilibre des âges entre 0 et 1.
+    Un score de 1 représente une distribution parfaitement équilibrée (33.33% dans chaque catégorie).
+    Fonctionne aussi bien sur des nombres que sur des tableaux numpy ou des colonnes pandas.
+
+    Args:
+        moins_30, entre_30_50, plus_50: Pourcentages dans chaque tranche d'âge
+
+    Returns:
+        Un score entre 0 et 1
+    """
+    # Distribution idéale: 33.33% dans chaque catégorie
+    distribution_ideale = 33.33
+
+    # Calculer l'écart pour chaque catégorie
+    ecart_moins_30 = abs(moins_30 - distribution_ideale)
+    ecart_entre_30_50 = abs(entre_30_50 - distribution_ideale)
+    ecart_plus_50 = abs(plus_50 - distribution_ideale)
+
+    # Calculer l'écart moyen
+    ecart_moyen = (ecart_moins_30 + ecart_entre_30_50 + ecart_plus_50) / 3
+
+    # Convertir l'écart en score (0 = écart max possible de 66.67, 1 = écart de 0)
+    score = 1 - (ecart_moyen / 66.67)
+    return score * 100  # Transformer en pourcentage
+
+# Fonction pour calculer la version d'un profil de seuils
+def calculer_version_seuils(seuils):
+    """
+    Calcule une empreinte stable du profil de seuils.
+
+    Args:
+        seuils: Dictionnaire {indicateur: [seuil_A, seuil_B, seuil_C, seuil_D]}
+
+    Returns:
+        Une chaîne courte qui ne change que si les seuils changent
+    """
+    contenu = json.dumps(seuils, sort_keys=True)
+    return hashlib.sha1(contenu.encode("utf-8")).hexdigest()[:12]
+
+# Conversions vectorisées entre codes, lettres, valeurs numériques et couleurs des notes
+def codes_vers_lettres(codes):
+    """Retourne le tableau des lettres de notes (chaîne vide pour CODE_ABSENT)."""
+    return _TABLE_LETTRES[np.asarray(codes, dtype=np.uint8)]
+
+def lettres_vers_codes(lettres):
+    """Retourne le tableau uint8 des codes de notes (CODE_ABSENT pour une lettre inconnue ou manquante)."""
+    codes = pd.Series(np.asarray(lettres, dtype=object)).map(CODES_NOTES)
+    return codes.fillna(CODE_ABSENT).to_numpy(dtype=np.uint8)
+
+def codes_vers_chiffres(codes):
+    """Retourne le tableau uint8 des valeurs numériques (5 pour A, ..., 1 pour E, 0 si absente)."""
+    return _TABLE_CHIFFRES[np.asarray(codes, dtype=np.uint8)]
+
+def codes_vers_couleurs(codes):
+    """Retourne le tableau des couleurs des notes (gris pour CODE_ABSENT)."""
+    return _TABLE_COULEURS[np.asarray(codes, dtype=np.uint8)]
+
+# Fonction pour coder une colonne entière de valeurs
+def coder_valeurs(valeurs, seuils, ordre_croissant=True):
+    """
+    Version vectorisée de attribuer_note, qui retourne des codes de notes plutôt que des lettres.
+
+    Args:
+        valeurs: Tableau numpy ou colonne pandas de valeurs
+        seuils: Liste de 4 seuils [seuil_A, seuil_B, seuil_C, seuil_D]
+        ordre_croissant: Même signification que dans attribuer_note
+
+    Returns:
+        Un tableau numpy uint8 de codes entre 0 (A) et 4 (E) ; une valeur manquante (NaN) n'atteint
+        aucun seuil et reçoit E, comme dans attribuer_note
+    """
+    valeurs = np.asarray(valeurs, dtype=float)[:, None]
+    bornes = np.asarray(seuils, dtype=float)[None, :]
+    # Nombre de seuils non atteints : 0 -> A, 4 -> E (comparaisons niées pour que NaN n'en atteigne aucun)
+    if ordre_croissant:
+        rang = (~(valeurs >= bornes)).sum(axis=1)
+    else:
+        rang = (~(valeurs <= bornes)).sum(axis=1)
+    return rang.astype(np.uint8)
+
+# Fonction pour coder toutes les notes d'un portefeuille
+def coder_portefeuille(donnees, seuils=SEUILS):
+    """
+    Calcule les codes de notes, le score et le code de la note globale de toutes les entités.
+
+    Args:
+        donnees: DataFrame au format de evaluer_portefeuille (equilibre_age déjà calculé)
+        seuils: Profil de seuils à appliquer
+
+    Returns:
+        Un tuple (codes, scores, codes_globaux) : tableau uint8 de forme (nb_entités, nb_indicateurs)
+        dans l'ordre de INDICATEURS, scores globaux (float) et codes des notes globales (uint8)
+    """
+    codes = np.empty((len(donnees), len(INDICATEURS)), dtype=np.uint8)
+    for position, (cle, _, ordre_croissant) in enumerate(INDICATEURS):
+        codes[:, position] = coder_valeurs(donnees[cle].to_numpy(dtype=float), seuils[cle], ordre_croissant)
+    scores = codes_vers_chiffres(codes).sum(axis=1, dtype=np.float64) / len(INDICATEURS)
+    return codes, scores, coder_valeurs(scores, SEUILS_SCORE_GLOBAL)
+
+# Fonction pour évaluer un portefeuille d'entités en une seule passe
+def evaluer_portefeuille(donnees, seuils=SEUILS):
+    """
+    Évalue toutes les entités d'un portefeuille de façon vectorisée.
+
+    Args:
+        donnees: DataFrame avec une ligne par entité et les colonnes du modèle de fichier
+                 (nom_entreprise, annee, taux_feminisation, ..., moins_30_ans, entre_30_50_ans,
+                 plus_50_ans, taux_absenteisme)
+        seuils: Profil de seuils à appliquer
+
+    Returns:
+        Une copie de donnees complétée par equilibre_age, une colonne note_<clé> par indicateur,
+        score_global et note_globale
+    """
+    resultat = donnees.copy()
+    if "equilibre_age" not in resultat.columns:
+        resultat["equilibre_age"] = calculer_equilibre_age(
+            resultat["moins_30_ans"].astype(float),
+            resultat["entre_30_50_ans"].astype(float),
+            resultat["plus_50_ans"].astype(float)
+        )
+
+    # Calculs sur les codes entiers, lettres produites pour les colonnes du DataFrame
+    codes, scores, codes_globaux = coder_portefeuille(resultat, seuils)
+    for position, (cle, _, _) in enumerate(INDICATEURS):
+        resultat[f"note_{cle}"] = codes_vers_lettres(codes[:, position])
+
+    resultat["score_global"] = scores
+    resultat["note_globale"] = codes_vers_lettres(codes_globaux)
+    return resultat
@@ -0,0 +1,251 @@
+import streamlit as st
+import pandas as pd
+import os
+import numpy as np
+import plotly.graph_objects as go
+import plotly.express as px
+from evaluations import Evaluations
+from export_excel import traiter_export_excel
+from graphiques import THEMES, styles_notes
+from metriques import REGISTRE, demarrer_serveur
+from narratifs import LANGUE_PAR_DEFAUT, LANGUES
+from notation import INDICATEURS, NOTES, SEUILS, calculer_version_seuils, evaluer_portefeuille
+from rapport import MOTEUR_HTML, MOTEUR_REPORTLAB, MOTEURS, PROFIL_STANDARD, PROFILS, PROFILS_RENDU
+from rapports_lot import traiter_lot
+from stockage import (CHEMIN_BASE, COLONNES_NOTES, COLONNES_TRIABLES, distribution_notes_globales,
+                      enregistrer_evaluations, lister_annees, matrice_notes_indicateurs, ouvrir_base, rechercher_evaluations)
+from travaux import FileTravaux, LimiteTravauxAtteinte
+from ui_travaux import afficher_travail, identifiant_utilisateur
+
+# Configuration de la page Streamlit
+st.set_page_config(
+    page_title="Portefeuille D&I",
+    page_icon="🗂️",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Nombre maximal de lignes envoyées au navigateur
+TAILLES_PAGE = [25, 50, 100, 200]
+
+# Libellés affichés pour les colonnes de la base
+LIBELLES_COLONNES = {
+    "nom_entreprise": "Entreprise",
+    "annee": "Année",
+    "score_global": "Score global",
+    "note_globale": "Note globale",
+}
+LIBELLES_COLONNES.update({cle: libelle for cle, libelle, _ in INDICATEURS})
+LIBELLES_COLONNES.update({f"note_{cle}": f"Note - {libelle}" for cle, libelle, _ in INDICATEURS})
+LIBELLES_COLONNES["levier_prioritaire"] = "Levier prioritaire"
+
+# Connexion à la base partagée par toutes les sessions
+@st.cache_resource(show_spinner=False)
+def obtenir_connexion():
+    return ouvrir_base()
+
+# File des travaux de génération des archives de rapports et des exports Excel (partagée par les sessions)
+@st.cache_resource(show_spinner=False)
+def obtenir_file_travaux():
+    file_travaux = FileTravaux({"lot_rapports": traiter_lot, "export_excel": traiter_export_excel})
+    REGISTRE.jauge("di_travaux", "Travaux de génération par type et par statut", ("type", "statut"),
+                   fonction=file_travaux.statistiques)
+    return file_travaux
+
+# Endpoint Prometheus du processus (voir metriques.py ; DI_METRIQUES_PORT distinct de celui de
+# l'évaluateur si les deux applications tournent sur la même machine)
+@st.cache_resource(show_spinner=False)
+def obtenir_endpoint_metriques():
+    return demarrer_serveur()
+
+obtenir_endpoint_metriques()
+imports_fichiers = REGISTRE.compteur("di_imports_total", "Fichiers d'indicateurs importés", ("application", "format"))
+evaluations_entites = REGISTRE.compteur("di_evaluations_total", "Entités évaluées", ("mode",))
+
+conn = obtenir_connexion()
+version_seuils = calculer_version_seuils(SEUILS)
+
+st.title("🗂️ Portefeuille Diversité et Inclusion")
+st.markdown("""
+Vue consolidée des évaluations enregistrées. Le filtrage, le tri, la pagination et les agrégations
+sont calculés côté serveur : seule la page affichée est envoyée au navigateur.
+""")
+
+# Import d'un portefeuille (une ligne par entité)
+with st.expander("📥 Importer des évaluations"):
+    st.markdown(
+        "Fichier CSV ou Excel avec une ligne par entité et les colonnes : "
+        "`nom_entreprise`, `annee`, `taux_feminisation`, `taux_femmes_cadres`, `ecart_salaire`, "
+        "`taux_handicap`, `moins_30_ans`, `entre_30_50_ans`, `plus_50_ans`, `taux_absenteisme`"
+    )
+    fichier = st.file_uploader("Choisir un fichier", type=['csv', 'xlsx', 'xls'])
+    if fichier is not None and st.button("Évaluer et enregistrer", type="primary"):
+        try:
+            if fichier.name.endswith('.csv'):
+                donnees = pd.read_csv(fichier)
+            else:  # Excel
+                donnees = pd.read_excel(fichier)
+            extension = os.path.splitext(fichier.name)[1].lstrip(".").lower()
+            imports_fichiers.inc(application="portefeuille", format=extension)
+            evaluations = evaluer_portefeuille(donnees, SEUILS)
+            evaluations_entites.inc(len(evaluations), mode="portefeuille")
+            nombre = enregistrer_evaluations(conn, evaluations, version_seuils)
+            st.success(f"{nombre} évaluations enregistrées.")
+        except KeyError as e:
+            st.error(f"Colonne manquante dans le fichier : {e}")
+        except Exception as e:
+            st.error(f"Erreur lors de l'import : {e}")
+
+# Filtres (barre latérale)
+with st.sidebar:
+    st.header("Filtres")
+    filtres = {
+        "entreprise": st.text_input("Entreprise contient"),
+        "annees": st.multiselect("Années", lister_annees(conn)),
+        "notes_globales": st.multiselect("Notes globales", NOTES),
+    }
+    score_min, score_max = st.slider("Score global", 1.0, 5.0, (1.0, 5.0), step=0.1)
+    if (score_min, score_max) != (1.0, 5.0):
+        filtres["score_min"] = score_min
+        filtres["score_max"] = score_max
+    for cle, libelle, _ in INDICATEURS:
+        notes = st.multiselect(libelle, NOTES, key=f"filtre_{cle}")
+        if notes:
+            filtres[f"note_{cle}"] = notes
+
+    st.header("Tri et pagination")
+    tri = st.selectbox(
+        "Trier par", COLONNES_TRIABLES,
+        index=COLONNES_TRIABLES.index("score_global"),
+        format_func=lambda c: LIBELLES_COLONNES.get(c, c)
+    )
+    decroissant = st.toggle("Ordre décroissant", value=True)
+    taille_page = st.selectbox("Lignes par page", TAILLES_PAGE, index=1)
+
+# Agrégations calculées par la base
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("Distribution des notes globales")
+    distribution = distribution_notes_globales(conn, filtres)
+    fig = px.bar(
+        distribution,
+        x="Note",
+        y="Nombre",
+        color="Note",
+        color_discrete_map=THEMES["clair"]["notes"],
+        height=350
+    )
+    fig.update_layout(showlegend=False, margin=dict(l=20, r=20, t=20, b=20))
+    st.plotly_chart(fig, use_container_width=True)
+
+with col2:
+    st.subheader("Notes par indicateur")
+    matrice = matrice_notes_indicateurs(conn, filtres)
+    fig = go.Figure(go.Heatmap(
+        z=matrice.values,
+        x=matrice.columns.tolist(),
+        y=matrice.index.tolist(),
+        colorscale="Blues",
+        text=matrice.values,
+        texttemplate="%{text}"
+    ))
+    fig.update_layout(height=350, margin=dict(l=20, r=20, t=20, b=20))
+    st.plotly_chart(fig, use_container_width=True)
+
+# Page courante des évaluations
+st.subheader("Évaluations")
+total = int(distribution["Nombre"].sum())
+nb_pages = max(1, -(-total // taille_page))
+page = st.number_input(f"Page (sur {nb_pages})", min_value=1, max_value=nb_pages, value=1)
+
+df_page, total = rechercher_evaluations(conn, filtres, tri, decroissant, page, taille_page)
+st.caption(f"{total} évaluations correspondent aux filtres — lignes {(page - 1) * taille_page + 1 if total else 0} "
+           f"à {min(page * taille_page, total)}")
+
+# Levier prioritaire de chaque entité de la page : indicateur noté D ou E le plus proche de la note supérieure
+leviers = Evaluations.depuis_dataframe(df_page).prioriser(SEUILS).prioritaires()
+# Position -1 (aucun indicateur à améliorer) : dernier élément, vide
+libelles_leviers = np.array([libelle for _, libelle, _ in INDICATEURS] + [""], dtype=object)
+df_page["levier_prioritaire"] = libelles_leviers[leviers]
+
+colonnes_affichees = ["nom_entreprise", "annee", "score_global", "note_globale"] + COLONNES_NOTES + ["levier_prioritaire"]
+df_affiche = df_page[colonnes_affichees].rename(columns=LIBELLES_COLONNES)
+colonnes_notes_affichees = [LIBELLES_COLONNES[c] for c in ["note_globale"] + COLONNES_NOTES]
+
+# Coloration vectorisée colonne par colonne (aucune boucle Python par ligne)
+st.dataframe(
+    df_affiche.style.apply(styles_notes, subset=colonnes_notes_affichees).format({"Score global": "{:.2f}"}),
+    use_container_width=True,
+    hide_index=True
+)
+
+# Génération des rapports PDF de toutes les évaluations filtrées
+st.subheader("📦 Rapports PDF du portefeuille")
+st.markdown(
+    f"Génère un rapport PDF pour chacune des {total} évaluations correspondant aux filtres, en parallèle "
+    "sur tous les cœurs, dans une archive ZIP. Une génération interrompue reprend là où elle s'était arrêtée."
+)
+moteur_lot = st.radio(
+    "Moteur de rendu",
+    MOTEURS,
+    index=MOTEURS.index(MOTEUR_REPORTLAB),
+    format_func=lambda m: {MOTEUR_HTML: "HTML (wkhtmltopdf)", MOTEUR_REPORTLAB: "ReportLab (natif)"}[m],
+    horizontal=True
+)
+profil_lot = st.radio(
+    "Profil de rendu",
+    PROFILS,
+    index=PROFILS.index(PROFIL_STANDARD),
+    format_func=lambda p: PROFILS_RENDU[p]["libelle"],
+    horizontal=True,
+    key="profil_lot"
+)
+langues_lot = st.multiselect(
+    "Langues des rapports",
+    list(LANGUES),
+    default=[LANGUE_PAR_DEFAUT],
+    format_func=lambda l: LANGUES[l],
+    help="Un rapport par entité et par langue."
+)
+if st.button("Générer les rapports (ZIP)", disabled=total == 0 or not langues_lot):
+    # La génération est confiée à la file des travaux : elle se poursuit même si la page est fermée.
+    # Chaque travail écrit sa propre archive, reprise en cas de nouvelle tentative ou de relance
+    try:
+        st.session_state["travail_lot"] = obtenir_file_travaux().soumettre(
+            identifiant_utilisateur(),
+            "lot_rapports",
+            {"filtres": filtres, "moteur": moteur_lot, "profil": profil_lot, "langues": langues_lot,
+             "chemin_base": CHEMIN_BASE}
+        )
+    except LimiteTravauxAtteinte as e:
+        st.warning(str(e))
+
+if st.session_state.get("travail_lot"):
+    afficher_travail(
+        obtenir_file_travaux(), st.session_state["travail_lot"], "rapports_diversite_inclusion.zip",
+        "application/zip", "📥 Télécharger l'archive des rapports"
+    )
+
+# Export Excel du portefeuille : confié à la file des travaux, qui lit la base par blocs et écrit
+# le classeur en flux dans un fichier propre au travail
+st.subheader("📊 Export Excel du portefeuille")
+st.markdown(
+    f"Exporte les {total} évaluations correspondant aux filtres dans un classeur Excel : une feuille de synthèse "
+    "et une feuille par indicateur."
+)
+if st.button("Exporter en Excel", disabled=total == 0):
+    try:
+        st.session_state["travail_export"] = obtenir_file_travaux().soumettre(
+            identifiant_utilisateur(),
+            "export_excel",
+            {"filtres": filtres, "chemin_base": CHEMIN_BASE}
+        )
+    except LimiteTravauxAtteinte as e:
+        st.warning(str(e))
+
+if st.session_state.get("travail_export"):
+    afficher_travail(
+        obtenir_file_travaux(), st.session_state["travail_export"], "portefeuille_diversite_inclusion.xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "📥 Télécharger le classeur Excel"
+    )
@@ -0,0 +1,502 @@
+import base64
+import functools
+import hashlib
+import io
+import os
+import tempfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+import jinja2
+from reportlab.graphics.shapes import Circle, Drawing, Rect, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Image, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from graphiques import figure_barres, figure_jauge, figure_radar
+from narratifs import LANGUE_PAR_DEFAUT, LANGUES, REPERTOIRE_LOCALES, catalogue
+from notation import (CLES_PAR_LIBELLE, CODES_NOTES, COULEURS_NOTES, INDICATEURS, NOTES, SEUILS, calculer_version_seuils,
+                      note_vers_chiffre)
+
+# Répertoire des modèles de rapport (HTML/CSS)
+REPERTOIRE_MODELES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Répertoire du cache de bytecode Jinja (partagé entre les processus)
+REPERTOIRE_CACHE_MODELES = os.environ.get(
+    "DI_CACHE_MODELES", os.path.join(tempfile.gettempdir(), "di_cache_modeles")
+)
+
+# Modèle utilisé pour le rapport PDF
+MODELE_RAPPORT = "rapport.html"
+
+# Moteurs de rendu PDF disponibles
+MOTEUR_HTML = "html"  # HTML/CSS rendu par wkhtmltopdf (voir rendu_pdf.py)
+MOTEUR_REPORTLAB = "reportlab"  # Rendu natif en Python, sans processus externe
+MOTEURS = [MOTEUR_HTML, MOTEUR_REPORTLAB]
+
+# Profils de rendu : compromis entre temps de rendu, taille du fichier et qualité d'impression
+PROFIL_APERCU = "apercu"
+PROFIL_STANDARD = "standard"
+PROFIL_IMPRESSION = "impression"
+PROFILS_RENDU = {
+    PROFIL_APERCU: {
+        "libelle": "Aperçu écran",
+        # Options wkhtmltopdf, ajoutées à rendu_pdf.OPTIONS_PDF
+        "options_pdf": {"dpi": 96, "image-dpi": 96, "image-quality": 60, "lowquality": None},
+        # Format des graphiques du moteur HTML (ReportLab utilise toujours le PNG)
+        "format_graphiques": "png",
+        # Résolution des graphiques PNG (multiple de leurs dimensions en pixels)
+        "echelle_graphiques": 1,
+        # Police TrueType intégrée au PDF (moteur ReportLab) plutôt que les polices standard du lecteur
+        "polices_integrees": False,
+    },
+    PROFIL_STANDARD: {
+        "libelle": "Standard",
+        "options_pdf": {"dpi": 150, "image-dpi": 150, "image-quality": 85},
+        "format_graphiques": "svg",
+        "echelle_graphiques": 2,
+        "polices_integrees": False,
+    },
+    PROFIL_IMPRESSION: {
+        "libelle": "Impression",
+        "options_pdf": {"dpi": 300, "image-dpi": 600, "image-quality": 100},
+        "format_graphiques": "svg",
+        "echelle_graphiques": 3,
+        "polices_integrees": True,
+    },
+}
+PROFILS = list(PROFILS_RENDU)
+
+# Graphiques insérés dans les rapports, dans l'ordre d'affichage, avec leurs dimensions en pixels
+DIMENSIONS_GRAPHIQUES = {"jauge": (500, 300), "radar": (500, 450), "barres": (700, 400)}
+
+# Polices des rapports ReportLab : standard (non intégrées) ou Vera, fournie avec ReportLab (intégrée)
+POLICES = {
+    False: {"normal": "Helvetica", "gras": "Helvetica-Bold", "italique": "Helvetica-Oblique"},
+    True: {"normal": "Vera", "gras": "VeraBd", "italique": "VeraIt"},
+}
+
+# Couleur principale des rapports
+BLEU_RAPPORT = colors.HexColor('#1E3A8A')
+
+
+def _creer_cache_bytecode(repertoire):
+    try:
+        os.makedirs(repertoire, exist_ok=True)
+    except OSError:
+        # Système de fichiers en lecture seule : compilation en mémoire uniquement
+        return None
+    return jinja2.FileSystemBytecodeCache(repertoire)
+
+
+def _uri_donnees(image):
+    # Filtre Jinja : image intégrée au document (aucun fichier à charger par wkhtmltopdf)
+    mime = {"svg": "image/svg+xml", "png": "image/png"}[image["format"]]
+    return f"data:{mime};base64,{base64.b64encode(image['contenu']).decode('ascii')}"
+
+
+# Environnement unique par processus : chaque modèle est compilé une seule fois, son bytecode
+# est gardé sur disque, et il n'est recompilé que si le fichier du modèle a changé.
+environnement = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(REPERTOIRE_MODELES),
+    bytecode_cache=_creer_cache_bytecode(REPERTOIRE_CACHE_MODELES),
+    auto_reload=True,
+)
+environnement.filters["uri_donnees"] = _uri_donnees
+
+
+def version_modele(nom_modele=MODELE_RAPPORT):
+    """
+    Calcule la version d'un modèle de rapport, pour invalider les rapports mis en cache.
+
+    La version couvre le fichier du modèle ainsi que le code et les catalogues de textes qui produisent
+    le contenu du rapport, notes, couleurs et graphiques compris : toute modification de l'un d'eux
+    change la version.
+
+    Args:
+        nom_modele: Nom du fichier de modèle
+
+    Returns:
+        Les 12 premiers caractères de l'empreinte SHA-1 des sources
+    """
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    sources = [
+        os.path.join(REPERTOIRE_MODELES, nom_modele),
+        os.path.join(dossier, "rapport.py"),
+        os.path.join(dossier, "narratifs.py"),
+        os.path.join(dossier, "evaluations.py"),
+        os.path.join(dossier, "notation.py"),
+        os.path.join(dossier, "graphiques.py"),
+        os.path.join(dossier, "rendu_images.py"),
+    ] + [os.path.join(REPERTOIRE_LOCALES, f"{langue}.json") for langue in LANGUES]
+    signature = tuple((chemin, os.stat(chemin).st_mtime_ns) for chemin in sources)
+    return _empreinte_sources(signature)
+
+
+@functools.lru_cache(maxsize=16)
+def _empreinte_sources(signature):
+    # La signature (chemins et dates de modification) évite de relire les fichiers à chaque appel
+    empreinte = hashlib.sha1()
+    for chemin, _ in signature:
+        with open(chemin, "rb") as f:
+            empreinte.update(f.read())
+    return empreinte.hexdigest()[:12]
+
+
+def preparer_donnees_entite(evaluation, seuils=SEUILS, position=0, priorites=None):
+    """
+    Prépare les données du PDF d'une entité, directement depuis son évaluation.
+
+    Args:
+        evaluation: evaluations.Evaluation de l'entité
+        seuils: Profil de seuils utilisé pour l'évaluation
+        position: Position de l'entité dans priorites
+        priorites: Priorites déjà calculées pour tout le portefeuille (optionnel)
+
+    Returns:
+        Un dictionnaire avec resultats (note, valeur et seuils par libellé d'indicateur), note_globale,
+        score_global, priorites (libellés des indicateurs à améliorer, du moins coûteux au plus coûteux)
+        et paliers_note_globale. Points forts et axes d'amélioration sont rédigés par
+        construire_donnees_modele dans la langue du rapport : ils n'entrent pas dans la clé du cache
+    """
+    if priorites is None:
+        priorites, position = evaluation.prioriser(seuils), 0
+    return {
+        "resultats": {
+            libelle: {"note": note, "valeur": float(valeur), "seuils": seuils.get(cle, [0, 0, 0, 0])}
+            for (cle, libelle, _), valeur, note in zip(INDICATEURS, evaluation.valeurs, evaluation.notes)
+        },
+        "note_globale": evaluation.note_globale,
+        "score_global": float(evaluation.score_global),
+        "priorites": priorites.libelles(position),
+        "paliers_note_globale": int(priorites.paliers_note_globale[position])
+    }
+
+
+def construire_graphiques(data, rendu_images, moteur=MOTEUR_HTML, theme="clair", profil=PROFIL_STANDARD):
+    """
+    Rend les graphiques du rapport (jauge, radar et barres) en images statiques.
+
+    Les spécifications des figures sont celles affichées par l'application ; les images sont
+    mises en cache par rendu_images, un graphique identique n'est donc rendu qu'une seule fois.
+
+    Args:
+        data: Données produites par preparer_donnees_entite
+        rendu_images: Instance de rendu_images.RenduImages (ou None pour un rapport sans graphiques)
+        moteur: Moteur de rendu du rapport, qui détermine le format des images
+        theme: Nom du thème dans graphiques.THEMES
+        profil: Profil de rendu (clé de PROFILS_RENDU), qui détermine le format et la résolution
+
+    Returns:
+        Un dictionnaire {nom: {"format": ..., "contenu": bytes}}, vide si le rendu est impossible
+    """
+    if rendu_images is None or not rendu_images.disponible:
+        return {}
+
+    scores = tuple((k, v['note'], note_vers_chiffre(v['note'])) for k, v in data['resultats'].items())
+    # Version des seuils (clé de cache des figures), à ne pas confondre avec le profil de rendu
+    version_seuils = calculer_version_seuils({k: v['seuils'] for k, v in data['resultats'].items()})
+    specs = {
+        "jauge": figure_jauge(float(data['score_global']), data['note_globale'], version_seuils, theme),
+        "radar": figure_radar(scores, version_seuils, theme),
+        "barres": figure_barres(scores, version_seuils, theme),
+    }
+
+    # ReportLab n'intègre pas le SVG
+    format_ = PROFILS_RENDU[profil]["format_graphiques"] if moteur == MOTEUR_HTML else "png"
+    echelle = PROFILS_RENDU[profil]["echelle_graphiques"] if format_ == "png" else 1
+    graphiques = {}
+    for nom, spec in specs.items():
+        largeur, hauteur = DIMENSIONS_GRAPHIQUES[nom]
+        contenu = rendu_images.rendre(spec, format_, largeur, hauteur, echelle)
+        if contenu:
+            graphiques[nom] = {"format": format_, "contenu": contenu}
+    return graphiques
+
+
+def construire_donnees_modele(data, company_name, year, graphiques=None, langue=LANGUE_PAR_DEFAUT):
+    """
+    Prépare les variables du rapport, communes à tous les moteurs de rendu.
+
+    Args:
+        data: Données produites par preparer_donnees_entite, avec éventuellement narratifs : la ligne de
+              narratifs.narratifs_portefeuille de l'entité (textes déjà rédigés dans la langue du rapport)
+        company_name: Nom de l'entreprise
+        year: Année évaluée
+        graphiques: Images produites par construire_graphiques (optionnel)
+        langue: Langue des textes du rapport (clé de narratifs.LANGUES)
+
+    Returns:
+        Un dictionnaire de variables pour le modèle
+    """
+    textes = catalogue(langue)
+    resultats = data['resultats']
+    narratifs = data.get('narratifs')
+    if narratifs:
+        def analyse(libelle, resultat):
+            return narratifs[f"analyse_{CLES_PAR_LIBELLE[libelle]}"]
+
+        def recommandations(libelle):
+            return narratifs[f"recommandations_{CLES_PAR_LIBELLE[libelle]}"] or textes.recommandation_indisponible
+
+        conclusion = narratifs['conclusion']
+    else:
+        def analyse(libelle, resultat):
+            return textes.analyse(libelle, resultat['valeur'], resultat['note'])
+
+        def recommandations(libelle):
+            return textes.recommandations(libelle, resultats[libelle]['note'])
+
+        conclusion = textes.conclusion(data['note_globale'])
+    # Indicateurs à améliorer, du plus proche de la note supérieure au plus éloigné
+    priorites, paliers = data['priorites'], data['paliers_note_globale']
+    code_global = CODES_NOTES.get(data['note_globale'], 0)
+    # Préparation des données pour le template avec les valeurs réelles
+    return {
+        'nom_entreprise': company_name,
+        'annee': year,
+        'score_global': round(float(data['score_global']), 2),
+        'note_globale': data['note_globale'],
+        'resultats': [
+            {
+                'indicateur': textes.libelle(k),
+                'valeur': f"{round(float(v['valeur']), 1)}%",
+                'note': v['note'],
+                'analyse': analyse(k, v)
+            }
+            for k, v in data['resultats'].items()
+        ],
+        # Points forts et axes d'amélioration rédigés dans la langue du rapport
+        'points_forts': [textes.point_fort(k, v['note']) for k, v in data['resultats'].items() if v['note'] in ['A', 'B']],
+        'axes_amelioration': [textes.axe_amelioration(k, resultats[k]['note']) for k in priorites],
+        'recommandations': [
+            reco for indicateur in priorites
+            for reco in recommandations(indicateur).split('\n')
+            if reco.strip()
+        ],
+        'objectif_note_globale': (
+            textes.paliers_note_globale(paliers, NOTES[code_global - 1]) if paliers and code_global > 0 else ''
+        ),
+        'conclusion': conclusion,
+        'graphiques': graphiques or {},
+        'langue': langue,
+        'textes': textes.rapport,
+        'date_generation': datetime.now().strftime(textes.rapport['format_date'])
+    }
+
+
+def rendre_html(template_data, nom_modele=MODELE_RAPPORT):
+    """
+    Génère le HTML d'un rapport à partir d'un modèle du répertoire templates.
+
+    Args:
+        template_data: Variables passées au modèle
+        nom_modele: Nom du fichier de modèle
+
+    Returns:
+        Le document HTML
+    """
+    return environnement.get_template(nom_modele).render(**template_data)
+
+
+@functools.lru_cache(maxsize=None)
+def _styles(polices_integrees=False):
+    """
+    Crée (une seule fois par famille de polices) les styles ReportLab des rapports.
+
+    Args:
+        polices_integrees: Si True, utilise la police TrueType Vera, intégrée au PDF
+
+    Returns:
+        Un dictionnaire {nom: ParagraphStyle}
+    """
+    polices = POLICES[polices_integrees]
+    if polices_integrees:
+        for nom, fichier in [("Vera", "Vera.ttf"), ("VeraBd", "VeraBd.ttf"), ("VeraIt", "VeraIt.ttf"),
+                             ("VeraBI", "VeraBI.ttf")]:
+            pdfmetrics.registerFont(TTFont(nom, fichier))
+        # Famille de polices pour les balises <b> et <i> des paragraphes
+        pdfmetrics.registerFontFamily("Vera", normal="Vera", bold="VeraBd", italic="VeraIt", boldItalic="VeraBI")
+
+    base = getSampleStyleSheet()
+    normal = ParagraphStyle('RapportNormal', parent=base['Normal'], fontName=polices["normal"])
+    cellule = ParagraphStyle('RapportCellule', parent=normal, fontSize=9, leading=11)
+    return {
+        "normal": normal,
+        "titre": ParagraphStyle(
+            'RapportTitre',
+            parent=base['Heading1'],
+            fontName=polices["gras"],
+            fontSize=20,
+            alignment=1,
+            spaceAfter=6,
+            textColor=BLEU_RAPPORT
+        ),
+        "sous_titre": ParagraphStyle(
+            'RapportSousTitre',
+            parent=base['Heading2'],
+            fontName=polices["gras"],
+            fontSize=15,
+            alignment=1,
+            spaceAfter=18,
+            textColor=BLEU_RAPPORT
+        ),
+        "section": ParagraphStyle(
+            'RapportSection',
+            parent=base['Heading3'],
+            fontName=polices["gras"],
+            fontSize=14,
+            spaceBefore=12,
+            spaceAfter=8,
+            textColor=BLEU_RAPPORT
+        ),
+        "cellule": cellule,
+        "analyse": ParagraphStyle('RapportAnalyse', parent=cellule, fontName=polices["italique"]),
+        "pied": ParagraphStyle(
+            'RapportPied', parent=normal, fontSize=8, alignment=1, textColor=colors.HexColor('#666666')
+        ),
+    }
+
+
+def _pastille_note(note, police_grasse, diametre=28 * mm):
+    """Dessine la pastille de type nutriscore de la note globale."""
+    dessin = Drawing(diametre, diametre)
+    dessin.hAlign = 'CENTER'
+    dessin.add(Circle(diametre / 2, diametre / 2, diametre / 2,
+                      fillColor=colors.HexColor(COULEURS_NOTES.get(note, "#888888")), strokeColor=None))
+    dessin.add(String(diametre / 2, diametre / 2 - 11, note, fontName=police_grasse, fontSize=32,
+                      fillColor=colors.white, textAnchor='middle'))
+    return dessin
+
+
+def _barre_progression(score_global, largeur=170 * mm, hauteur=5 * mm):
+    """Dessine la barre de progression du score global (sur 5)."""
+    dessin = Drawing(largeur, hauteur)
+    dessin.add(Rect(0, 0, largeur, hauteur, rx=hauteur / 2, ry=hauteur / 2,
+                    fillColor=colors.HexColor('#f0f0f0'), strokeColor=None))
+    dessin.add(Rect(0, 0, largeur * max(0, min(score_global, 5)) / 5, hauteur, rx=hauteur / 2, ry=hauteur / 2,
+                    fillColor=BLEU_RAPPORT, strokeColor=None))
+    return dessin
+
+
+def _liste(elements, style, puce="•"):
+    return [Paragraph(escape(element), style, bulletText=puce if not element.startswith("•") else None)
+            for element in elements]
+
+
+def rendre_pdf_reportlab(template_data, profil=PROFIL_STANDARD):
+    """
+    Génère le rapport PDF directement avec ReportLab (aucun processus externe).
+
+    Le contenu est le même que celui du modèle HTML : score, pastille de note, graphiques, tableau des
+    résultats, points forts, axes d'amélioration, recommandations et conclusion.
+
+    Args:
+        template_data: Variables produites par construire_donnees_modele
+        profil: Profil de rendu (clé de PROFILS_RENDU), qui détermine les polices
+
+    Returns:
+        Le contenu du PDF (bytes)
+    """
+    polices_integrees = PROFILS_RENDU[profil]["polices_integrees"]
+    styles = _styles(polices_integrees)
+    polices = POLICES[polices_integrees]
+    textes = template_data['textes']
+    with io.BytesIO() as buffer:
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=A4,
+            rightMargin=20 * mm,
+            leftMargin=20 * mm,
+            topMargin=20 * mm,
+            bottomMargin=20 * mm,
+            title=textes['titre_document'].format(nom_entreprise=template_data['nom_entreprise'])
+        )
+        elements = []
+
+        # En-tête
+        elements.append(Paragraph(escape(textes['titre']), styles['titre']))
+        elements.append(Paragraph(escape(f"{template_data['nom_entreprise']} - {template_data['annee']}"), styles['sous_titre']))
+
+        # Score global
+        note_globale = template_data['note_globale']
+        elements.append(Paragraph(escape(textes['score_global']), styles['section']))
+        elements.append(Paragraph(f"{escape(textes['score'])} : {template_data['score_global']}/5", styles['normal']))
+        elements.append(Paragraph(
+            f"{escape(textes['note'])} : <font color='{COULEURS_NOTES.get(note_globale, '#888888')}'><b>{note_globale}</b></font>",
+            styles['normal']
+        ))
+        elements.append(Spacer(1, 6 * mm))
+        elements.append(_pastille_note(note_globale, polices['gras']))
+        elements.append(Spacer(1, 6 * mm))
+        elements.append(_barre_progression(template_data['score_global']))
+
+        # Graphiques (PNG uniquement, ReportLab n'intègre pas le SVG)
+        graphiques = {
+            nom: image for nom, image in template_data.get('graphiques', {}).items() if image['format'] == 'png'
+        }
+        if graphiques:
+            elements.append(Paragraph(escape(textes['graphiques']), styles['section']))
+            # La plus large des images occupe toute la largeur utile de la page
+            echelle = 170 * mm / max(largeur for largeur, _ in DIMENSIONS_GRAPHIQUES.values())
+            for nom, (largeur, hauteur) in DIMENSIONS_GRAPHIQUES.items():
+                if nom in graphiques:
+                    elements.append(Image(io.BytesIO(graphiques[nom]['contenu']), largeur * echelle, hauteur * echelle))
+                    elements.append(Spacer(1, 4 * mm))
+
+        # Résultats détaillés
+        elements.append(Paragraph(escape(textes['resultats']), styles['section']))
+        lignes = [[textes['indicateur'], textes['valeur'], textes['note'], textes['analyse']]]
+        for resultat in template_data['resultats']:
+            lignes.append([
+                Paragraph(escape(resultat['indicateur']), styles['cellule']),
+                resultat['valeur'],
+                resultat['note'],
+                Paragraph(escape(resultat['analyse']), styles['analyse'])
+            ])
+        table = Table(lignes, colWidths=[40 * mm, 27 * mm, 13 * mm, 90 * mm], repeatRows=1)
+        style_table = [
+            ('BACKGROUND', (0, 0), (-1, 0), BLEU_RAPPORT),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+            ('FONTNAME', (0, 0), (-1, -1), polices['normal']),
+            ('FONTNAME', (0, 0), (-1, 0), polices['gras']),
+            ('FONTNAME', (1, 1), (2, -1), polices['gras']),
+            ('ALIGN', (1, 1), (2, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dddddd')),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ]
+        for i, resultat in enumerate(template_data['resultats'], start=1):
+            style_table.append(('TEXTCOLOR', (2, i), (2, i), colors.HexColor(COULEURS_NOTES.get(resultat['note'], "#888888"))))
+        table.setStyle(TableStyle(style_table))
+        elements.append(table)
+
+        # Points forts, axes d'amélioration et recommandations
+        if template_data['points_forts']:
+            elements.append(Paragraph(escape(textes['points_forts']), styles['section']))
+            elements.extend(_liste(template_data['points_forts'], styles['normal']))
+        if template_data['axes_amelioration']:
+            elements.append(Paragraph(escape(textes['axes_amelioration']), styles['section']))
+            elements.extend(_liste(template_data['axes_amelioration'], styles['normal']))
+        if template_data['recommandations']:
+            elements.append(Paragraph(escape(textes['recommandations']), styles['section']))
+            elements.append(Paragraph(escape(textes['ordre_recommandations']), styles['analyse']))
+            elements.extend(_liste(template_data['recommandations'], styles['normal']))
+            if template_data['objectif_note_globale']:
+                elements.append(Paragraph(escape(template_data['objectif_note_globale']), styles['normal']))
+
+        # Conclusion
+        elements.append(Paragraph(escape(textes['conclusion']), styles['section']))
+        elements.append(Paragraph(escape(template_data['conclusion']), styles['normal']))
+
+        # Pied de page
+        elements.append(Spacer(1, 12 * mm))
+        elements.append(Paragraph(escape(textes['genere_le'].format(date=template_data['date_generation'])), styles['pied']))
+        elements.append(Paragraph(escape(textes['copyright']), styles['pied']))
+
+        doc.build(elements)
+        return buffer.getvalue()
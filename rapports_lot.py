@@ -0,0 +1,398 @@
+import json
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from cache_rapports import CacheRapports, cle_rapport
+from evaluations import Evaluations
+from metriques import REGISTRE
+from narratifs import LANGUE_PAR_DEFAUT, LANGUES, narratifs_portefeuille
+from notation import SEUILS
+from rapport import (MOTEUR_HTML, MOTEUR_REPORTLAB, PROFIL_STANDARD, PROFILS_RENDU, construire_donnees_modele,
+                     construire_graphiques, preparer_donnees_entite, rendre_html, rendre_pdf_reportlab, version_modele)
+from rendu_images import RenduImages
+from stockage import CHEMIN_BASE, charger_evaluations, ouvrir_base
+from travaux import chemin_resultat
+
+# Nombre de processus de rendu (un par cœur par défaut)
+NB_PROCESSUS = os.cpu_count() or 1
+
+# Nombre de rapports en cours par processus : borne la mémoire occupée par les PDF pas encore écrits
+RAPPORTS_EN_VOL_PAR_PROCESSUS = 2
+
+# Nombre d'entités dont les textes sont rédigés ensemble (borne la mémoire des textes d'un lot)
+TAILLE_BLOC_NARRATIFS = 1000
+
+# Service de rendu HTML, rendu des graphiques et cache des rapports du processus (créés à la première
+# utilisation). Dans un lot, les graphiques sont rendus par le processus principal, avec un seul
+# navigateur : les processus de travail ne démarrent pas de rendu d'images
+_service_rendu = None
+_rendu_images = None
+_cache_rapports = None
+
+# Rapports demandés (cache compris) et rendus effectivement, par moteur ; pour un lot ZIP, les mesures
+# des processus de travail sont renvoyées avec chaque rapport et enregistrées par le processus principal
+_RAPPORTS_DEMANDES = REGISTRE.compteur("di_rapports_demandes_total", "Rapports PDF demandés", ("moteur",))
+_RAPPORTS_RENDUS = REGISTRE.compteur("di_rapports_rendus_total", "Rapports PDF rendus (hors cache)", ("moteur",))
+_DUREES_RENDU = REGISTRE.histogramme("di_rendu_rapport_secondes", "Durée de rendu d'un rapport PDF (hors cache)",
+                                     ("moteur",))
+_RAPPORTS_ARCHIVES = REGISTRE.compteur("di_rapports_archives_total", "Rapports écrits dans une archive ZIP")
+
+
+def nom_fichier_rapport(position, nom_entreprise, annee, langue=LANGUE_PAR_DEFAUT):
+    """
+    Construit le nom (unique et stable) d'un rapport dans l'archive.
+
+    Args:
+        position: Position de l'entité dans le portefeuille
+        nom_entreprise, annee: Identité de l'entité
+        langue: Langue du rapport, ajoutée au nom si ce n'est pas la langue par défaut
+
+    Returns:
+        Un nom de fichier sans caractères spéciaux
+    """
+    nom = re.sub(r"[^\w\-]+", "_", str(nom_entreprise)).strip("_") or "entite"
+    suffixe = "" if langue == LANGUE_PAR_DEFAUT else f"_{langue}"
+    return f"{position:06d}_rapport_diversite_inclusion_{nom}_{annee}{suffixe}.pdf"
+
+
+def _obtenir_rendu_images():
+    global _rendu_images
+    if _rendu_images is None:
+        _rendu_images = RenduImages()
+    return _rendu_images
+
+
+def _obtenir_cache_rapports():
+    global _cache_rapports
+    if _cache_rapports is None:
+        _cache_rapports = CacheRapports()
+    return _cache_rapports
+
+
+def _enregistrer_rendu(moteur, duree):
+    _RAPPORTS_RENDUS.inc(moteur=moteur)
+    _DUREES_RENDU.observe(duree, moteur=moteur)
+
+
+def rendre_rapport(data, nom_entreprise, annee, moteur=MOTEUR_REPORTLAB, profil=PROFIL_STANDARD, service_rendu=None,
+                   rendu_images=None, cache=None, langue=LANGUE_PAR_DEFAUT, graphiques=None, mesures=None):
+    """
+    Rend le PDF d'une entité, ou le lit depuis le cache des rapports.
+
+    Les services non fournis sont ceux du processus courant, créés à la première utilisation.
+
+    Args:
+        data: Données produites par rapport.preparer_donnees_entite
+        nom_entreprise, annee: Identité de l'entité
+        moteur: MOTEUR_REPORTLAB (par défaut) ou MOTEUR_HTML
+        profil: Profil de rendu (clé de rapport.PROFILS_RENDU)
+        service_rendu: Service de rendu HTML (rendu_pdf.ServiceRendu)
+        rendu_images: Rendu des graphiques (rendu_images.RenduImages)
+        cache: Cache des rapports (cache_rapports.CacheRapports)
+        langue: Langue des textes du rapport (clé de narratifs.LANGUES)
+        graphiques: Images déjà produites par construire_graphiques (rendu_images n'est alors pas utilisé)
+        mesures: Dictionnaire optionnel ; s'il est fourni, les métriques du processus ne sont pas mises à
+                 jour et la durée d'un rendu hors cache y est notée (duree_rendu), pour être enregistrée
+                 par un autre processus
+
+    Returns:
+        Le contenu du PDF (bytes)
+    """
+    if cache is None:
+        cache = _obtenir_cache_rapports()
+    if graphiques is None and rendu_images is None:
+        rendu_images = _obtenir_rendu_images()
+    avec_graphiques = bool(graphiques) if graphiques is not None else rendu_images.disponible
+
+    # Un rapport identique (mêmes données, même modèle, même jour) n'est pas rendu à nouveau
+    cle = cle_rapport(data, nom_entreprise, annee, moteur, profil, langue, version_modele(), avec_graphiques,
+                      datetime.now().strftime('%Y-%m-%d'))
+
+    def fabrique():
+        debut = time.perf_counter()
+        pdf_data = _fabriquer()
+        duree = time.perf_counter() - debut
+        if mesures is None:
+            _enregistrer_rendu(moteur, duree)
+        else:
+            mesures["duree_rendu"] = duree
+        return pdf_data
+
+    def _fabriquer():
+        global _service_rendu
+        images = graphiques if graphiques is not None else construire_graphiques(data, rendu_images, moteur,
+                                                                                   profil=profil)
+        template_data = construire_donnees_modele(data, nom_entreprise, annee, images, langue)
+        if moteur == MOTEUR_REPORTLAB:
+            return rendre_pdf_reportlab(template_data, profil)
+
+        service = service_rendu
+        if service is None:
+            if _service_rendu is None:
+                from rendu_pdf import ServiceRendu
+                _service_rendu = ServiceRendu(nb_workers=1)
+            service = _service_rendu
+        if not service.disponible:
+            raise RuntimeError("wkhtmltopdf n'est pas installé")
+        from rendu_pdf import OPTIONS_PDF
+        html = cache.obtenir_ou_creer(cle, "html", lambda: rendre_html(template_data))
+        return service.rendre(html, {**OPTIONS_PDF, **PROFILS_RENDU[profil]["options_pdf"]})
+
+    if mesures is None:
+        _RAPPORTS_DEMANDES.inc(moteur=moteur)
+    return cache.obtenir_ou_creer(cle, "pdf", fabrique)
+
+
+def _initialiser_processus(repertoire_cache, taille_max_cache):
+    # Processus de travail démarré à neuf (spawn) : même cache des rapports que le processus principal
+    global _cache_rapports
+    _cache_rapports = CacheRapports(repertoire_cache, taille_max_cache)
+
+
+def _rendre_entite(tache):
+    """
+    Rend le PDF d'une entité (exécuté dans un processus de travail).
+
+    Returns:
+        Un tuple (nom du fichier, contenu du PDF, durée du rendu ou None si le PDF venait du cache)
+    """
+    nom_fichier, data, nom_entreprise, annee, moteur, profil, langue, graphiques = tache
+    mesures = {}
+    pdf_data = rendre_rapport(data, nom_entreprise, annee, moteur, profil, langue=langue, graphiques=graphiques,
+                              mesures=mesures)
+    return nom_fichier, pdf_data, mesures.get("duree_rendu")
+
+
+def _lire_journal(chemin_journal):
+    entrees = []
+    try:
+        with open(chemin_journal, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    entrees.append(json.loads(ligne))
+                except ValueError:
+                    # Dernière ligne incomplète (interruption pendant l'écriture)
+                    break
+    except OSError:
+        pass
+    return entrees
+
+
+def _ouvrir_archive(chemin_zip, chemin_journal, reprendre):
+    """
+    Ouvre l'archive en écriture ; en cas de reprise, conserve les rapports déjà écrits.
+
+    Chaque rapport écrit est consigné dans le journal avec sa position dans le fichier. À la reprise,
+    l'archive est tronquée après le dernier rapport consigné puis son répertoire central est reconstruit,
+    ce qui fonctionne même si le processus précédent a été tué brutalement.
+    """
+    entrees = _lire_journal(chemin_journal) if reprendre and os.path.exists(chemin_zip) else []
+    if not entrees:
+        fichier = open(chemin_zip, "wb")
+        open(chemin_journal, "w", encoding="utf-8").close()
+        return fichier, zipfile.ZipFile(fichier, "w", zipfile.ZIP_DEFLATED), set()
+
+    fichier = open(chemin_zip, "r+b")
+    fichier.truncate(entrees[-1]["fin"])
+    fichier.seek(entrees[-1]["fin"])
+    archive = zipfile.ZipFile(fichier, "w", zipfile.ZIP_DEFLATED)
+    for entree in entrees:
+        info = zipfile.ZipInfo(entree["nom"], tuple(entree["date_time"]))
+        info.compress_type = entree["compress_type"]
+        info.CRC = entree["crc"]
+        info.file_size = entree["taille"]
+        info.compress_size = entree["taille_compressee"]
+        info.header_offset = entree["offset"]
+        info.external_attr = entree["external_attr"]
+        archive.filelist.append(info)
+        archive.NameToInfo[info.filename] = info
+    return fichier, archive, {entree["nom"] for entree in entrees}
+
+
+def generer_rapports_zip(evaluations, chemin_zip, moteur=MOTEUR_REPORTLAB, seuils=SEUILS,
+                         nb_processus=NB_PROCESSUS, reprendre=True, progression=None, profil=PROFIL_STANDARD,
+                         langues=(LANGUE_PAR_DEFAUT,), rendu_images=None, cache=None):
+    """
+    Génère les rapports PDF de tout un portefeuille et les écrit au fil de l'eau dans une archive ZIP.
+
+    Les rapports sont rendus en parallèle sur plusieurs processus, démarrés à neuf (spawn) : un fork du
+    processus appelant, qui a d'autres threads (file des travaux, Streamlit, métriques), pourrait hériter
+    d'un verrou pris et se bloquer. Leurs graphiques sont rendus au fil
+    de l'eau par le processus principal, avec un seul navigateur partagé par tout le lot (un graphique
+    identique n'est rendu qu'une fois grâce au cache des images). Chaque PDF est écrit dans
+    l'archive dès qu'il est prêt puis libéré, de sorte que l'archive complète n'est jamais en mémoire.
+    Si une génération précédente a été interrompue, les rapports déjà présents sont conservés.
+
+    Args:
+        evaluations: DataFrame produit par notation.evaluer_portefeuille (ou lu depuis le portefeuille)
+        chemin_zip: Chemin de l'archive à produire
+        moteur: MOTEUR_REPORTLAB (par défaut) ou MOTEUR_HTML
+        seuils: Profil de seuils utilisé pour l'évaluation
+        nb_processus: Nombre de processus de rendu
+        reprendre: Si True, reprend une génération interrompue vers le même chemin
+        progression: Fonction optionnelle appelée avec (nb_faits, nb_total) après chaque rapport
+        profil: Profil de rendu (clé de rapport.PROFILS_RENDU) de tous les rapports du lot
+        langues: Langues des rapports : un rapport par entité et par langue (les catalogues de textes
+                 sont chargés une seule fois par processus)
+        rendu_images: Rendu des graphiques (rendu_images.RenduImages) ; par défaut celui du processus
+        cache: Cache des rapports (cache_rapports.CacheRapports) partagé avec les processus de rendu ;
+               par défaut celui du processus
+
+    Returns:
+        Un dictionnaire avec nb_rapports (générés), nb_repris (déjà présents), duree_s
+        et rapports_par_seconde
+    """
+    if moteur not in (MOTEUR_HTML, MOTEUR_REPORTLAB):
+        raise ValueError(f"Moteur de rendu inconnu : {moteur}")
+    if profil not in PROFILS_RENDU:
+        raise ValueError(f"Profil de rendu inconnu : {profil}")
+    langues = list(dict.fromkeys(langues))
+    if not langues or any(langue not in LANGUES for langue in langues):
+        raise ValueError(f"Langues inconnues : {langues}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(chemin_zip)), exist_ok=True)
+    chemin_journal = chemin_zip + ".journal"
+    fichier, archive, deja_faits = _ouvrir_archive(chemin_zip, chemin_journal, reprendre)
+
+    total = len(evaluations) * len(langues)
+    rendu_images = _obtenir_rendu_images() if rendu_images is None else rendu_images
+    cache = _obtenir_cache_rapports() if cache is None else cache
+
+    def generer_taches():
+        # Données d'une entité préparées une seule fois, quel que soit le nombre de langues
+        conteneur = Evaluations.depuis_dataframe(evaluations)
+        # Ordre des recommandations de toutes les entités, en une passe
+        priorites = conteneur.prioriser(seuils)
+        for position, evaluation in enumerate(conteneur):
+            if position % TAILLE_BLOC_NARRATIFS == 0:
+                # Textes du bloc d'entités suivant, rédigés en une passe par langue
+                bloc = evaluations.iloc[position:position + TAILLE_BLOC_NARRATIFS]
+                narratifs = {langue: narratifs_portefeuille(bloc, langue).to_dict("records") for langue in langues}
+            data = graphiques = None
+            for langue in langues:
+                nom = nom_fichier_rapport(position, evaluation.nom_entreprise, evaluation.annee, langue)
+                if nom in deja_faits:
+                    continue
+                if data is None:
+                    data = preparer_donnees_entite(evaluation, seuils, position, priorites)
+                    # Graphiques indépendants de la langue : rendus une fois par entité
+                    graphiques = construire_graphiques(data, rendu_images, moteur, profil=profil)
+                data_langue = {**data, "narratifs": narratifs[langue][position % TAILLE_BLOC_NARRATIFS]}
+                yield nom, data_langue, evaluation.nom_entreprise, evaluation.annee, moteur, profil, langue, graphiques
+
+    taches = generer_taches()
+
+    nb_faits = len(deja_faits)
+    nb_rapports = 0
+    debut = time.perf_counter()
+    try:
+        with open(chemin_journal, "a", encoding="utf-8") as journal, \
+                ProcessPoolExecutor(max_workers=max(1, nb_processus), mp_context=multiprocessing.get_context("spawn"),
+                                    initializer=_initialiser_processus,
+                                    initargs=(cache.repertoire, cache.taille_max_octets)) as executeur:
+            en_vol = set()
+            max_en_vol = max(1, nb_processus) * RAPPORTS_EN_VOL_PAR_PROCESSUS
+            epuise = False
+            while en_vol or not epuise:
+                # Alimenter les processus sans dépasser le nombre de rapports en vol
+                while not epuise and len(en_vol) < max_en_vol:
+                    tache = next(taches, None)
+                    if tache is None:
+                        epuise = True
+                    else:
+                        en_vol.add(executeur.submit(_rendre_entite, tache))
+                if not en_vol:
+                    break
+
+                termines, en_vol = wait(en_vol, return_when=FIRST_COMPLETED)
+                for futur in termines:
+                    nom_fichier, pdf_data, duree_rendu = futur.result()
+                    _RAPPORTS_DEMANDES.inc(moteur=moteur)
+                    if duree_rendu is not None:
+                        _enregistrer_rendu(moteur, duree_rendu)
+                    info = zipfile.ZipInfo(nom_fichier, time.localtime()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.external_attr = 0o644 << 16
+                    archive.writestr(info, pdf_data)
+                    fichier.flush()
+                    journal.write(json.dumps({
+                        "nom": nom_fichier,
+                        "fin": fichier.tell(),
+                        "offset": info.header_offset,
+                        "crc": info.CRC,
+                        "taille": info.file_size,
+                        "taille_compressee": info.compress_size,
+                        "compress_type": info.compress_type,
+                        "date_time": list(info.date_time),
+                        "external_attr": info.external_attr,
+                    }) + "\n")
+                    journal.flush()
+                    nb_rapports += 1
+                    nb_faits += 1
+                    _RAPPORTS_ARCHIVES.inc()
+                    if progression:
+                        progression(nb_faits, total)
+    finally:
+        archive.close()
+        fichier.close()
+
+    # Archive complète : le journal de reprise n'est plus utile
+    if nb_faits >= total:
+        try:
+            os.unlink(chemin_journal)
+        except OSError:
+            pass
+
+    duree = time.perf_counter() - debut
+    return {
+        "nb_rapports": nb_rapports,
+        "nb_repris": len(deja_faits),
+        "duree_s": duree,
+        "rapports_par_seconde": nb_rapports / duree if duree > 0 else 0.0,
+    }
+
+
+def traiter_lot(id_travail, parametres, suivi):
+    """
+    Traitement de la file des travaux (voir travaux.py) : génère l'archive des rapports d'une sélection
+    du portefeuille.
+
+    L'archive et son journal de reprise sont propres au travail : deux travaux de mêmes paramètres
+    n'écrivent jamais dans le même fichier, et seules les tentatives d'un même travail reprennent
+    l'archive (une seule à la fois, grâce au bail de la file des travaux).
+
+    Args:
+        id_travail: Identifiant du travail (nomme l'archive produite)
+        parametres: Dictionnaire avec filtres et moteur (et chemin_base, profil et langues, optionnels)
+        suivi: Objet travaux.Suivi, qui interrompt la génération si l'annulation est demandée
+
+    Returns:
+        Le chemin de l'archive produite
+    """
+    conn = ouvrir_base(parametres.get("chemin_base") or CHEMIN_BASE)
+    try:
+        evaluations = charger_evaluations(conn, parametres["filtres"])
+    finally:
+        conn.close()
+
+    langues = parametres.get("langues") or [LANGUE_PAR_DEFAUT]
+    pas = max(1, len(evaluations) * len(langues) // 100)
+
+    def publier_progression(nb_faits, nb_total):
+        # Une écriture dans la base des travaux par pour cent d'avancement au plus
+        if nb_faits % pas == 0 or nb_faits == nb_total:
+            suivi.progression(nb_faits / nb_total, f"{nb_faits} / {nb_total} rapports")
+
+    # En cas d'annulation ou d'erreur, l'archive reste reprenable : une nouvelle tentative (ou une relance)
+    # du même travail repart du dernier rapport écrit
+    chemin_zip = chemin_resultat(id_travail, "zip")
+    stats = generer_rapports_zip(evaluations, chemin_zip, parametres["moteur"],
+                                 progression=publier_progression, profil=parametres.get("profil", PROFIL_STANDARD),
+                                 langues=langues)
+    suivi.progression(1.0, f"{stats['nb_rapports'] + stats['nb_repris']} rapports générés en {stats['duree_s']:.1f} s")
+    return chemin_zip
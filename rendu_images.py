@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import threading
+
+from cache_rapports import CacheRapports, cle_rapport
+
+# Répertoire du cache des images de graphiques (partagé entre les processus)
+REPERTOIRE_CACHE_IMAGES = os.environ.get(
+    "DI_CACHE_IMAGES", os.path.join(tempfile.gettempdir(), "di_cache_images")
+)
+
+# Taille maximale du cache des images (en Mo)
+TAILLE_MAX_CACHE_IMAGES_MO = int(os.environ.get("DI_CACHE_IMAGES_MO", 100))
+
+# Délai maximal du rendu d'une image, en secondes
+DELAI_IMAGE = 30
+
+
+def trouver_chrome():
+    """
+    Recherche le navigateur utilisé par kaleido pour rendre les figures Plotly.
+
+    Returns:
+        Le chemin du navigateur, ou None s'il n'est pas installé
+    """
+    try:
+        from choreographer.browsers.chromium import Chromium
+    except ImportError:
+        return None
+    return Chromium.find_browser(skip_local=False)
+
+
+class RenduImages:
+    """
+    Rendu des figures Plotly en images statiques (PNG ou SVG) par un unique navigateur kaleido.
+
+    Le navigateur est démarré à la première image puis réutilisé pour toutes les suivantes. Chaque image
+    est mise en cache sur disque sous l'empreinte de sa spécification : des graphiques identiques
+    (par exemple dans un lot de rapports) ne sont rendus qu'une seule fois.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or CacheRapports(REPERTOIRE_CACHE_IMAGES, TAILLE_MAX_CACHE_IMAGES_MO * 1024 * 1024)
+        self._verrou = threading.Lock()
+        self._demarre = False
+        self._chemin_chrome = trouver_chrome()
+
+    @property
+    def disponible(self):
+        """True si kaleido dispose d'un navigateur pour rendre les images."""
+        return self._chemin_chrome is not None
+
+    def _demarrer(self):
+        if not self._demarre:
+            import kaleido
+            # MathJax désactivé : il serait téléchargé depuis un CDN à chaque démarrage
+            kaleido.start_sync_server(n=1, timeout=DELAI_IMAGE, mathjax=False, silence_warnings=True)
+            self._demarre = True
+
+    def rendre(self, spec_json, format_="png", largeur=700, hauteur=400, echelle=1):
+        """
+        Rend une figure en image, ou la lit depuis le cache.
+
+        Args:
+            spec_json: Spécification JSON de la figure (retournée par les fonctions de graphiques.py)
+            format_: "png" ou "svg"
+            largeur, hauteur: Dimensions de l'image en pixels
+            echelle: Facteur d'échelle (résolution) de l'image
+
+        Returns:
+            Le contenu de l'image (bytes), ou None si le rendu est impossible
+        """
+        if not self.disponible:
+            return None
+        cle = cle_rapport(spec_json, format_, largeur, hauteur, echelle)
+
+        def fabrique():
+            import kaleido
+            with self._verrou:
+                self._demarrer()
+                return kaleido.calc_fig_sync(
+                    json.loads(spec_json),
+                    opts={"format": format_, "width": largeur, "height": hauteur, "scale": echelle}
+                )
+
+        try:
+            return self.cache.obtenir_ou_creer(cle, format_, fabrique)
+        except Exception:
+            # Un graphique manquant ne doit pas empêcher la génération du rapport
+            return None
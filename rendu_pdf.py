@@ -0,0 +1,210 @@
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import pdfkit
+
+from metriques import REGISTRE
+
+# Chemins possibles de wkhtmltopdf (vérifiés une seule fois au démarrage du service)
+CHEMINS_WKHTMLTOPDF = [
+    'C:\\Program Files\\wkhtmltopdf\\bin\\wkhtmltopdf.exe',
+    'C:\\Program Files (x86)\\wkhtmltopdf\\bin\\wkhtmltopdf.exe',
+    '/usr/local/bin/wkhtmltopdf',
+    '/usr/bin/wkhtmltopdf'
+]
+
+# Configuration de pdfkit avec options optimisées
+OPTIONS_PDF = {
+    'page-size': 'A4',
+    'margin-top': '20mm',
+    'margin-right': '20mm',
+    'margin-bottom': '20mm',
+    'margin-left': '20mm',
+    'encoding': 'UTF-8',
+    'enable-local-file-access': None,
+    'dpi': 300,
+    'image-quality': 100,
+    'quiet': '',
+    'no-outline': None,
+    'print-media-type': None
+}
+
+# Nombre de workers de rendu (= nombre maximal de processus wkhtmltopdf simultanés)
+NB_WORKERS = int(os.environ.get("DI_RENDU_WORKERS", min(4, os.cpu_count() or 1)))
+
+# Nombre maximal de rendus en attente ; au-delà, les demandes sont refusées
+TAILLE_FILE = int(os.environ.get("DI_RENDU_FILE", 32))
+
+# Délai maximal d'attente d'un rendu (file d'attente comprise), en secondes
+DELAI_RENDU = 120
+
+# Nombre de mesures de latence conservées pour le calcul des percentiles
+TAILLE_HISTORIQUE = 500
+
+
+# Temps de rendu seul et temps total (attente dans la file comprise), tous services confondus
+_DUREES_WKHTMLTOPDF = REGISTRE.histogramme("di_rendu_wkhtmltopdf_secondes", "Durée d'un rendu wkhtmltopdf")
+_DUREES_ATTENTE_COMPRISE = REGISTRE.histogramme("di_rendu_wkhtmltopdf_total_secondes",
+                                                "Durée d'un rendu wkhtmltopdf, attente dans la file comprise")
+
+
+class FileRenduPleine(Exception):
+    """Levée quand la file de rendu est pleine (trop de demandes simultanées)."""
+
+
+def trouver_wkhtmltopdf():
+    """
+    Recherche l'exécutable wkhtmltopdf.
+
+    Returns:
+        Le chemin de l'exécutable, ou None s'il n'est pas installé
+    """
+    for path in CHEMINS_WKHTMLTOPDF:
+        if os.path.exists(path):
+            return path
+    return shutil.which("wkhtmltopdf")
+
+
+def est_pdf(contenu):
+    """
+    Vérifie qu'un contenu est un document PDF complet (en-tête %PDF- et marqueur de fin %%EOF).
+
+    Args:
+        contenu: Octets produits par un rendu
+
+    Returns:
+        True si le contenu a la structure d'un PDF, False sinon
+    """
+    return bool(contenu) and contenu.startswith(b"%PDF-") and b"%%EOF" in contenu[-1024:]
+
+
+def _percentile(valeurs, p):
+    if not valeurs:
+        return None
+    triees = sorted(valeurs)
+    rang = min(len(triees) - 1, max(0, round(p / 100 * (len(triees) - 1))))
+    return triees[rang]
+
+
+class ServiceRendu:
+    """
+    Service de rendu PDF à nombre de workers borné.
+
+    Les workers sont démarrés une seule fois et réutilisés pour toutes les demandes ; la recherche
+    de wkhtmltopdf et la configuration de pdfkit sont faites à la création du service. Le nombre
+    de processus wkhtmltopdf simultanés ne dépasse jamais nb_workers, et la file d'attente est
+    bornée à taille_file demandes.
+    """
+
+    def __init__(self, nb_workers=NB_WORKERS, taille_file=TAILLE_FILE, chemin_wkhtmltopdf=None):
+        self.chemin_wkhtmltopdf = chemin_wkhtmltopdf or trouver_wkhtmltopdf()
+        self.nb_workers = max(1, nb_workers)
+        self._file = queue.Queue(maxsize=taille_file)
+        self._verrou = threading.Lock()
+        self._latences_rendu = deque(maxlen=TAILLE_HISTORIQUE)
+        self._latences_totales = deque(maxlen=TAILLE_HISTORIQUE)
+        self._nb_rendus = 0
+        self._nb_echecs = 0
+        self._workers = []
+
+        self._configuration = None
+        if self.chemin_wkhtmltopdf:
+            self._configuration = pdfkit.configuration(wkhtmltopdf=self.chemin_wkhtmltopdf)
+            for i in range(self.nb_workers):
+                worker = threading.Thread(target=self._boucle_worker, name=f"rendu-pdf-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    @property
+    def disponible(self):
+        """True si wkhtmltopdf a été trouvé et que les workers sont démarrés."""
+        return self._configuration is not None
+
+    def soumettre(self, html, options=None):
+        """
+        Place une demande de rendu dans la file.
+
+        Args:
+            html: Document HTML complet
+            options: Options pdfkit (OPTIONS_PDF par défaut)
+
+        Returns:
+            Un Future dont le résultat est le contenu du PDF (bytes)
+
+        Raises:
+            FileRenduPleine: si la file d'attente est pleine
+        """
+        if not self.disponible:
+            raise RuntimeError("wkhtmltopdf n'est pas installé")
+        futur = Future()
+        try:
+            self._file.put_nowait((html, options or OPTIONS_PDF, futur, time.perf_counter()))
+        except queue.Full:
+            raise FileRenduPleine("Trop de rapports sont en cours de génération, veuillez réessayer dans un instant.")
+        return futur
+
+    def rendre(self, html, options=None, delai=DELAI_RENDU):
+        """
+        Rend un document HTML en PDF et attend le résultat.
+
+        Returns:
+            Le contenu du PDF (bytes)
+        """
+        return self.soumettre(html, options).result(timeout=delai)
+
+    def _rendre_pdf(self, html, options):
+        # Le HTML est envoyé sur l'entrée standard de wkhtmltopdf et le PDF est lu sur sa
+        # sortie standard : aucun fichier temporaire n'est écrit
+        return pdfkit.from_string(html, False, configuration=self._configuration, options=options)
+
+    def _boucle_worker(self):
+        while True:
+            html, options, futur, instant_soumission = self._file.get()
+            if not futur.set_running_or_notify_cancel():
+                self._file.task_done()
+                continue
+            debut = time.perf_counter()
+            try:
+                pdf_data = self._rendre_pdf(html, options)
+            except Exception as e:
+                with self._verrou:
+                    self._nb_echecs += 1
+                futur.set_exception(e)
+            else:
+                fin = time.perf_counter()
+                with self._verrou:
+                    self._nb_rendus += 1
+                    self._latences_rendu.append(fin - debut)
+                    self._latences_totales.append(fin - instant_soumission)
+                _DUREES_WKHTMLTOPDF.observe(fin - debut)
+                _DUREES_ATTENTE_COMPRISE.observe(fin - instant_soumission)
+                futur.set_result(pdf_data)
+            finally:
+                self._file.task_done()
+
+    def statistiques(self):
+        """
+        Retourne les compteurs et les latences du service (en secondes).
+
+        Returns:
+            Un dictionnaire avec nb_rendus, nb_echecs, profondeur_file, nb_workers,
+            rendu_p50, rendu_p95 (temps de rendu seul) et total_p50, total_p95 (attente comprise)
+        """
+        with self._verrou:
+            latences_rendu = list(self._latences_rendu)
+            latences_totales = list(self._latences_totales)
+            return {
+                "nb_rendus": self._nb_rendus,
+                "nb_echecs": self._nb_echecs,
+                "profondeur_file": self._file.qsize(),
+                "nb_workers": len(self._workers),
+                "rendu_p50": _percentile(latences_rendu, 50),
+                "rendu_p95": _percentile(latences_rendu, 95),
+                "total_p50": _percentile(latences_totales, 50),
+                "total_p95": _percentile(latences_totales, 95),
+            }
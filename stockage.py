@@ -0,0 +1,229 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from notation import INDICATEURS, NOTES
+
+# Base SQLite des évaluations enregistrées (portefeuille)
+CHEMIN_BASE = os.environ.get(
+    "DI_BASE_PORTEFEUILLE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "portefeuille.db")
+)
+
+COLONNES_VALEURS = [cle for cle, _, _ in INDICATEURS]
+COLONNES_NOTES = [f"note_{cle}" for cle, _, _ in INDICATEURS]
+COLONNES = (
+    ["nom_entreprise", "annee"] + COLONNES_VALEURS + COLONNES_NOTES
+    + ["score_global", "note_globale", "version_seuils", "date_evaluation"]
+)
+
+# Colonnes autorisées pour le tri (les noms sont insérés dans le SQL, jamais les valeurs)
+COLONNES_TRIABLES = ["id"] + COLONNES[:-1]
+
+
+def ouvrir_base(chemin=CHEMIN_BASE):
+    """
+    Ouvre (et crée si besoin) la base du portefeuille.
+
+    Args:
+        chemin: Chemin du fichier SQLite
+
+    Returns:
+        Une connexion sqlite3 utilisable depuis plusieurs threads
+    """
+    conn = sqlite3.connect(chemin, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    colonnes_sql = ",\n".join(
+        ["id INTEGER PRIMARY KEY AUTOINCREMENT", "nom_entreprise TEXT NOT NULL", "annee INTEGER"]
+        + [f"{c} REAL" for c in COLONNES_VALEURS]
+        + [f"{c} TEXT" for c in COLONNES_NOTES]
+        + ["score_global REAL", "note_globale TEXT", "version_seuils TEXT", "date_evaluation TEXT"]
+    )
+    conn.execute(f"CREATE TABLE IF NOT EXISTS evaluations (\n{colonnes_sql}\n)")
+    # Index sur les colonnes de filtrage et de tri les plus courantes
+    for colonne in ["nom_entreprise", "annee", "note_globale", "score_global"]:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_evaluations_{colonne} ON evaluations ({colonne})")
+    conn.commit()
+    return conn
+
+
+def enregistrer_evaluations(conn, evaluations, version_seuils):
+    """
+    Enregistre en une transaction les évaluations d'un portefeuille.
+
+    Args:
+        conn: Connexion ouverte par ouvrir_base
+        evaluations: DataFrame produit par notation.evaluer_portefeuille
+        version_seuils: Version du profil de seuils utilisé
+
+    Returns:
+        Le nombre de lignes enregistrées
+    """
+    lignes = evaluations.copy()
+    lignes["version_seuils"] = version_seuils
+    lignes["date_evaluation"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lignes = lignes[COLONNES].astype(object).where(lignes[COLONNES].notna(), None)
+
+    marqueurs = ", ".join("?" for _ in COLONNES)
+    with conn:
+        conn.executemany(
+            f"INSERT INTO evaluations ({', '.join(COLONNES)}) VALUES ({marqueurs})",
+            lignes.itertuples(index=False, name=None)
+        )
+    return len(lignes)
+
+
+def _construire_filtres(filtres):
+    """
+    Traduit un dictionnaire de filtres en clause WHERE paramétrée.
+
+    Filtres reconnus : entreprise (sous-chaîne), annees (liste), notes_globales (liste),
+    score_min, score_max, et note_<clé> (liste de notes pour un indicateur).
+    """
+    clauses = []
+    parametres = []
+    filtres = filtres or {}
+
+    if filtres.get("entreprise"):
+        clauses.append("nom_entreprise LIKE ?")
+        parametres.append(f"%{filtres['entreprise']}%")
+    if filtres.get("annees"):
+        clauses.append(f"annee IN ({', '.join('?' for _ in filtres['annees'])})")
+        parametres.extend(int(a) for a in filtres["annees"])
+    if filtres.get("notes_globales"):
+        clauses.append(f"note_globale IN ({', '.join('?' for _ in filtres['notes_globales'])})")
+        parametres.extend(filtres["notes_globales"])
+    if filtres.get("score_min") is not None:
+        clauses.append("score_global >= ?")
+        parametres.append(float(filtres["score_min"]))
+    if filtres.get("score_max") is not None:
+        clauses.append("score_global <= ?")
+        parametres.append(float(filtres["score_max"]))
+    for colonne in COLONNES_NOTES:
+        if filtres.get(colonne):
+            clauses.append(f"{colonne} IN ({', '.join('?' for _ in filtres[colonne])})")
+            parametres.extend(filtres[colonne])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, parametres
+
+
+def rechercher_evaluations(conn, filtres=None, tri="score_global", decroissant=True, page=1, taille_page=50):
+    """
+    Retourne une seule page d'évaluations, filtrée et triée par SQLite.
+
+    Args:
+        conn: Connexion ouverte par ouvrir_base
+        filtres: Dictionnaire de filtres (voir _construire_filtres)
+        tri: Colonne de tri (doit appartenir à COLONNES_TRIABLES)
+        decroissant: Sens du tri
+        page: Numéro de page (à partir de 1)
+        taille_page: Nombre de lignes par page
+
+    Returns:
+        Un tuple (DataFrame de la page, nombre total de lignes correspondant aux filtres)
+    """
+    if tri not in COLONNES_TRIABLES:
+        raise ValueError(f"Colonne de tri inconnue : {tri}")
+    where, parametres = _construire_filtres(filtres)
+
+    total = conn.execute(f"SELECT COUNT(*) FROM evaluations {where}", parametres).fetchone()[0]
+
+    sens = "DESC" if decroissant else "ASC"
+    page = max(1, int(page))
+    requete = (
+        f"SELECT id, {', '.join(COLONNES)} FROM evaluations {where} "
+        f"ORDER BY {tri} {sens}, id {sens} LIMIT ? OFFSET ?"
+    )
+    df_page = pd.read_sql_query(requete, conn, params=parametres + [int(taille_page), (page - 1) * int(taille_page)])
+    return df_page, total
+
+
+def charger_evaluations(conn, filtres=None):
+    """
+    Retourne toutes les évaluations correspondant aux filtres, dans l'ordre d'enregistrement.
+
+    Réservé aux traitements par lot (génération de rapports, exports) : l'affichage passe par
+    rechercher_evaluations, qui ne charge qu'une page.
+    """
+    where, parametres = _construire_filtres(filtres)
+    return pd.read_sql_query(
+        f"SELECT id, {', '.join(COLONNES)} FROM evaluations {where} ORDER BY id", conn, params=parametres
+    )
+
+
+def compter_evaluations(conn, filtres=None):
+    """
+    Retourne le nombre d'évaluations correspondant aux filtres.
+    """
+    where, parametres = _construire_filtres(filtres)
+    return conn.execute(f"SELECT COUNT(*) FROM evaluations {where}", parametres).fetchone()[0]
+
+
+def iterer_evaluations(conn, filtres=None, taille_bloc=10_000):
+    """
+    Parcourt les évaluations correspondant aux filtres, dans l'ordre d'enregistrement, par blocs.
+
+    Les lignes sont lues au fil du parcours (curseur SQLite) : la mémoire utilisée ne dépend que de
+    taille_bloc, pas du nombre d'évaluations.
+
+    Args:
+        conn: Connexion ouverte par ouvrir_base
+        filtres: Dictionnaire de filtres (voir _construire_filtres)
+        taille_bloc: Nombre de lignes par bloc
+
+    Returns:
+        Un itérateur de DataFrames (mêmes colonnes que charger_evaluations)
+    """
+    where, parametres = _construire_filtres(filtres)
+    return pd.read_sql_query(
+        f"SELECT id, {', '.join(COLONNES)} FROM evaluations {where} ORDER BY id", conn, params=parametres,
+        chunksize=taille_bloc
+    )
+
+
+def distribution_notes_globales(conn, filtres=None):
+    """
+    Calcule la distribution des notes globales (agrégation faite par SQLite).
+
+    Returns:
+        Un DataFrame Note/Nombre avec une ligne par note de A à E
+    """
+    where, parametres = _construire_filtres(filtres)
+    lignes = conn.execute(
+        f"SELECT note_globale, COUNT(*) FROM evaluations {where} GROUP BY note_globale", parametres
+    ).fetchall()
+    comptes = dict(lignes)
+    return pd.DataFrame({"Note": NOTES, "Nombre": [comptes.get(n, 0) for n in NOTES]})
+
+
+def matrice_notes_indicateurs(conn, filtres=None):
+    """
+    Calcule, pour chaque indicateur, le nombre d'entités ayant chaque note (carte de chaleur).
+
+    Returns:
+        Un DataFrame indexé par libellé d'indicateur, avec une colonne par note de A à E
+    """
+    where, parametres = _construire_filtres(filtres)
+    requete = " UNION ALL ".join(
+        f"SELECT '{cle}' AS indicateur, note_{cle} AS note, COUNT(*) AS nombre "
+        f"FROM evaluations {where} GROUP BY note_{cle}"
+        for cle, _, _ in INDICATEURS
+    )
+    lignes = conn.execute(requete, parametres * len(INDICATEURS)).fetchall()
+
+    matrice = pd.DataFrame(0, index=[cle for cle, _, _ in INDICATEURS], columns=NOTES)
+    for cle, note, nombre in lignes:
+        if note in NOTES:
+            matrice.loc[cle, note] = nombre
+    matrice.index = [libelle for _, libelle, _ in INDICATEURS]
+    return matrice
+
+
+def lister_annees(conn):
+    """
+    Retourne la liste triée des années présentes dans le portefeuille.
+    """
+    return [a for (a,) in conn.execute("SELECT DISTINCT annee FROM evaluations ORDER BY annee") if a is not None]
@@ -0,0 +1,30 @@
+import struct
+import zlib
+
+import pytest
+
+
+def _png_1x1():
+    def bloc(type_, donnees):
+        return (struct.pack(">I", len(donnees)) + type_ + donnees
+                + struct.pack(">I", zlib.crc32(type_ + donnees) & 0xFFFFFFFF))
+    return (b"\x89PNG\r\n\x1a\n" + bloc(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+            + bloc(b"IDAT", zlib.compress(b"\x00\xff\xff\xff")) + bloc(b"IEND", b""))
+
+
+class RenduImagesFactice:
+    """Rendu des graphiques qui se déclare disponible, sans navigateur."""
+
+    disponible = True
+
+    def __init__(self):
+        self.appels = []
+
+    def rendre(self, spec_json, format_="png", largeur=700, hauteur=400, echelle=1):
+        self.appels.append((format_, largeur, hauteur, echelle))
+        return _png_1x1() if format_ == "png" else b"<svg xmlns='http://www.w3.org/2000/svg'/>"
+
+
+@pytest.fixture
+def rendu_images_factice():
+    return RenduImagesFactice()
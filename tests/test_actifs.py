@@ -0,0 +1,112 @@
+import io
+import os
+
+import pytest
+
+import actifs
+from actifs import BudgetMedia, CacheActifs, obtenir_image
+
+
+class _ReponseFactice(io.BytesIO):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def telechargements(monkeypatch):
+    """Remplace urlopen : chaque appel est enregistré et renvoie des octets dérivés de l'URL."""
+    appels = []
+
+    def urlopen(url, timeout=None):
+        appels.append(url)
+        return _ReponseFactice(f"contenu de {url}".encode())
+
+    monkeypatch.setattr(actifs.urllib.request, "urlopen", urlopen)
+    return appels
+
+
+def test_fichier_local_modifie_est_relu(tmp_path):
+    fichier = tmp_path / "logo.svg"
+    fichier.write_bytes(b"<svg>v1</svg>")
+    cache = CacheActifs(repertoire=str(tmp_path / "cache"))
+    assert cache.obtenir(str(fichier)) == b"<svg>v1</svg>"
+
+    # Même taille : seule la date de modification distingue les deux versions
+    fichier.write_bytes(b"<svg>v2</svg>")
+    stat = os.stat(fichier)
+    os.utime(fichier, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.obtenir(str(fichier)) == b"<svg>v2</svg>"
+
+    # Une nouvelle instance (nouveau processus) lit aussi la version courante
+    fichier.write_bytes(b"<svg>version 3</svg>")
+    assert CacheActifs(repertoire=str(tmp_path / "cache")).obtenir(str(fichier)) == b"<svg>version 3</svg>"
+
+
+def test_fichier_local_hors_index(tmp_path):
+    fichier = tmp_path / "logo.svg"
+    fichier.write_bytes(b"<svg/>")
+    cache = CacheActifs(repertoire=str(tmp_path / "cache"))
+    cache.obtenir(str(fichier))
+    assert str(fichier) not in CacheActifs(repertoire=str(tmp_path / "cache"))._index
+
+
+def test_fichier_local_absent(tmp_path):
+    cache = CacheActifs(repertoire=str(tmp_path / "cache"))
+    assert cache.obtenir(str(tmp_path / "absent.svg")) is None
+
+
+def test_url_telechargee_une_seule_fois(tmp_path, telechargements):
+    url = "https://exemple.org/logo.svg?v=1"
+    repertoire = str(tmp_path / "cache")
+    cache = CacheActifs(repertoire=repertoire)
+    assert cache.obtenir(url) == f"contenu de {url}".encode()
+    assert cache.obtenir(url) == f"contenu de {url}".encode()
+    assert telechargements == [url]
+
+    # L'index persistant évite le téléchargement dans un autre processus, même hors ligne
+    autre = CacheActifs(repertoire=repertoire, hors_ligne=True)
+    assert autre.obtenir(url) == f"contenu de {url}".encode()
+    assert telechargements == [url]
+    assert any(nom.endswith(".svg") for nom in os.listdir(repertoire))
+
+
+def test_url_hors_ligne(tmp_path, telechargements):
+    cache = CacheActifs(repertoire=str(tmp_path / "cache"), hors_ligne=True)
+    assert cache.obtenir("https://exemple.org/logo.svg") is None
+    assert telechargements == []
+
+
+def test_url_en_erreur(tmp_path, monkeypatch):
+    def urlopen(url, timeout=None):
+        raise OSError("réseau indisponible")
+
+    monkeypatch.setattr(actifs.urllib.request, "urlopen", urlopen)
+    cache = CacheActifs(repertoire=str(tmp_path / "cache"))
+    assert cache.obtenir("https://exemple.org/logo.svg") is None
+
+
+def test_obtenir_image(tmp_path, monkeypatch, telechargements):
+    (tmp_path / "logo.svg").write_bytes(b"<svg/>")
+    monkeypatch.setattr(actifs, "REPERTOIRE_ASSETS", str(tmp_path))
+    monkeypatch.setattr(actifs, "IMAGES", {
+        "embarquee": {"fichier": "logo.svg", "url": "https://exemple.org/logo.svg"},
+        "manquante": {"fichier": "absent.png", "url": "https://exemple.org/photo.png"},
+    })
+    cache = CacheActifs(repertoire=str(tmp_path / "cache"))
+
+    assert obtenir_image(cache, "embarquee") == (b"<svg/>", ".svg")
+    assert telechargements == []
+    assert obtenir_image(cache, "manquante") == (b"contenu de https://exemple.org/photo.png", ".png")
+    assert obtenir_image(cache, "inconnue") == (None, None)
+
+
+def test_budget_media():
+    budget = BudgetMedia(octets_max=10)
+    assert budget.consommer(6)
+    assert not budget.consommer(5)
+    assert budget.octets_utilises == 6
+    assert budget.consommer(4)
+    assert not budget.consommer(1)
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from cache_rapports import CacheRapports, cle_rapport
+
+
+def _taille_repertoire(repertoire):
+    return sum(os.path.getsize(os.path.join(repertoire, nom)) for nom in os.listdir(repertoire)
+               if not nom.startswith(".") and not nom.endswith(".tmp"))
+
+
+def _dater(cache, cle, format_, instant):
+    os.utime(cache._chemin(f"{cle}.{format_}"), (instant, instant))
+
+
+def test_cle_stable_et_sensible_au_contenu():
+    assert cle_rapport({"a": 1, "b": 2}, "x") == cle_rapport({"b": 2, "a": 1}, "x")
+    assert cle_rapport({"a": 1}, "x") != cle_rapport({"a": 2}, "x")
+
+
+def test_obtenir_ou_creer(tmp_path):
+    cache = CacheRapports(str(tmp_path))
+    appels = []
+
+    def fabrique():
+        appels.append(1)
+        return "<html>é</html>"
+
+    assert cache.obtenir_ou_creer("k", "html", fabrique) == "<html>é</html>"
+    assert cache.obtenir_ou_creer("k", "html", fabrique) == "<html>é</html>"
+    assert cache.obtenir_ou_creer("k", "pdf", lambda: b"%PDF") == b"%PDF"
+    assert len(appels) == 1
+    statistiques = cache.statistiques()
+    assert (statistiques["nb_hits"], statistiques["nb_miss"], statistiques["nb_artefacts"]) == (1, 2, 2)
+
+
+def test_eviction_lru(tmp_path):
+    cache = CacheRapports(str(tmp_path), taille_max_octets=300)
+    for instant, cle in enumerate("abc", start=1):
+        cache.ecrire(cle, "pdf", b"x" * 100)
+        _dater(cache, cle, "pdf", instant * 1000)
+    assert cache.lire("a", "pdf") is not None
+
+    cache.ecrire("d", "pdf", b"x" * 100)
+
+    assert cache.lire("b", "pdf") is None
+    assert all(cache.lire(cle, "pdf") is not None for cle in "acd")
+    assert cache.statistiques()["taille_octets"] == 300
+
+
+def test_artefact_trop_grand_non_stocke(tmp_path):
+    cache = CacheRapports(str(tmp_path), taille_max_octets=10)
+    cache.ecrire("k", "pdf", b"x" * 11)
+    assert cache.lire("k", "pdf") is None
+
+
+def test_borne_commune_a_plusieurs_instances(tmp_path):
+    # Deux instances sur le même répertoire, comme deux processus : chacune voit les écritures de l'autre
+    premiere = CacheRapports(str(tmp_path), taille_max_octets=1000)
+    seconde = CacheRapports(str(tmp_path), taille_max_octets=1000)
+    for i in range(8):
+        premiere.ecrire(f"p{i}", "pdf", b"x" * 100)
+        seconde.ecrire(f"s{i}", "pdf", b"x" * 100)
+
+    assert _taille_repertoire(str(tmp_path)) <= 1000
+    assert premiere.lire("s7", "pdf") is not None
+    assert seconde.statistiques()["taille_octets"] == premiere.statistiques()["taille_octets"]
+
+
+def _remplir(repertoire, prefixe):
+    cache = CacheRapports(repertoire, taille_max_octets=5000)
+    for i in range(40):
+        cache.ecrire(f"{prefixe}{i}", "pdf", os.urandom(250))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="fork indisponible")
+def test_borne_respectee_entre_processus(tmp_path):
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("fork")) as executeur:
+        list(executeur.map(_remplir, [str(tmp_path)] * 4, "abcd"))
+
+    assert _taille_repertoire(str(tmp_path)) <= 5000
+
+
+def test_repertoire_inutilisable(tmp_path):
+    fichier = tmp_path / "fichier"
+    fichier.write_bytes(b"")
+    cache = CacheRapports(str(fichier / "cache"))
+    assert not cache.actif
+    assert cache.obtenir_ou_creer("k", "pdf", lambda: b"%PDF") == b"%PDF"
+    assert cache.statistiques()["nb_artefacts"] == 0
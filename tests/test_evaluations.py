@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import evaluations
+from evaluations import (A_AMELIORER, A_CONSOLIDER, CLES, FORTS, Classification, Evaluation, Evaluations,
+                         statistiques_cache_evaluations, vider_cache_evaluations)
+from notation import CODE_ABSENT, SEUILS, calculer_version_seuils, coder_portefeuille, evaluer_portefeuille
+
+# Notes E, E, D, D, A, C (dans l'ordre de notation.INDICATEURS)
+ENTITE = {"taux_feminisation": 24.0, "taux_femmes_cadres": 19.0, "taux_handicap": 3.5, "ecart_salaire": 10.0,
+          "equilibre_age": 90.0, "taux_absenteisme": 4.0}
+
+
+@pytest.fixture(autouse=True)
+def cache_vide():
+    vider_cache_evaluations()
+
+
+def test_evaluation():
+    evaluation = Evaluation.evaluer("ACME", 2024, ENTITE)
+    assert evaluation.notes == ("E", "E", "D", "D", "A", "C")
+    assert evaluation.score_global == pytest.approx(14 / 6)
+    assert evaluation.note_globale == "D"
+    assert evaluation.note("ecart_salaire") == "D" and evaluation.valeur("ecart_salaire") == 10.0
+
+
+def test_evaluation_memorisee():
+    version = calculer_version_seuils(SEUILS)
+    premiere = Evaluation.evaluer("A", 2024, ENTITE, version_seuils=version)
+    seconde = Evaluation.evaluer("B", 2023, {**ENTITE, "equilibre_age": 90}, version_seuils=version)
+    assert (seconde.nom_entreprise, seconde.annee, seconde.codes) == ("B", 2023, premiere.codes)
+    statistiques = statistiques_cache_evaluations()
+    assert (statistiques["nb_hits"], statistiques["nb_miss"], statistiques["nb_entrees"]) == (1, 1, 1)
+
+    # Autre profil de seuils : autre entrée
+    seuils = {**SEUILS, "equilibre_age": [95, 92, 91, 90]}
+    assert Evaluation.evaluer("A", 2024, ENTITE, seuils).note("equilibre_age") == "D"
+    assert statistiques_cache_evaluations()["nb_miss"] == 2
+
+    vider_cache_evaluations()
+    assert statistiques_cache_evaluations()["nb_entrees"] == 0
+
+
+def test_zero_negatif_meme_entree():
+    Evaluation.evaluer("A", 2024, {**ENTITE, "ecart_salaire": 0.0})
+    Evaluation.evaluer("A", 2024, {**ENTITE, "ecart_salaire": -0.0})
+    assert statistiques_cache_evaluations()["nb_hits"] == 1
+
+
+def test_classification():
+    classification = Evaluation.evaluer("ACME", 2024, ENTITE).classer()
+    assert classification.libelles(FORTS) == ["Équilibre des âges"]
+    assert classification.libelles(A_CONSOLIDER) == ["Taux d'absentéisme"]
+    assert classification.libelles(A_AMELIORER) == [
+        "Taux de féminisation global", "Taux de femmes cadres", "Taux d'emploi handicap", "Écart de salaire H/F"
+    ]
+
+
+def test_classification_note_absente():
+    classification = Classification(np.array([[0, 2, 4, CODE_ABSENT, 1, 3]], dtype=np.uint8))
+    assert len(classification) == 1
+    assert classification.masques[A_AMELIORER][0].tolist() == [False, False, True, False, False, True]
+    assert not any(masque[0, 3] for masque in classification.masques.values())
+
+
+def test_entites_faibles_sur_plusieurs_indicateurs():
+    # Codes : 0 = A ... 4 = E
+    codes = np.array([
+        [0, 0, 0, 4, 0, 3],  # à améliorer sur l'écart de salaire et l'absentéisme
+        [0, 0, 4, 3, 0, 0],  # à améliorer sur l'écart de salaire seulement
+        [3, 0, 0, 4, 1, 4],  # à améliorer sur les deux, point fort sur l'équilibre des âges
+        [0, 0, 0, CODE_ABSENT, 0, 4],  # écart de salaire absent : jamais à améliorer
+        [2, 2, 2, 2, 2, 2],
+    ], dtype=np.uint8)
+    classification = Classification(codes)
+
+    faibles = classification.entites(a_ameliorer=("ecart_salaire", "taux_absenteisme"))
+    assert faibles.tolist() == [0, 2]
+    assert classification.entites(a_ameliorer=("ecart_salaire",), forts=("equilibre_age",)).tolist() == [0, 1, 2]
+    assert classification.entites(a_ameliorer=("ecart_salaire",), forts=("taux_feminisation",)).tolist() == [0, 1]
+    assert classification.entites(a_consolider=tuple(CLES)).tolist() == [4]
+    assert classification.entites().tolist() == [0, 1, 2, 3, 4]
+
+    # Même résultat qu'un filtre ligne à ligne
+    attendues = [position for position, ligne in enumerate(codes) if ligne[3] in (3, 4) and ligne[5] in (3, 4)]
+    assert faibles.tolist() == attendues
+
+
+def test_priorites():
+    priorites = Evaluation.evaluer("ACME", 2024, ENTITE).prioriser(SEUILS)
+
+    # Effort 0.2 (E, E), puis effort 0.5 : les notes D avant la note C
+    assert priorites.cles(toutes=True) == ["taux_feminisation", "taux_femmes_cadres", "taux_handicap",
+                                           "ecart_salaire", "taux_absenteisme"]
+    assert priorites.cles() == ["taux_feminisation", "taux_femmes_cadres", "taux_handicap", "ecart_salaire"]
+    assert priorites.ecarts[0].tolist()[:4] == [1.0, 1.0, 0.5, 2.0]
+    assert np.isnan(priorites.ecarts[0, CLES.index("equilibre_age")])
+    # Score 14/6 : un palier suffit pour atteindre 2.5 (note C)
+    assert priorites.paliers_note_globale.tolist() == [1]
+    assert priorites.prioritaires().tolist() == [CLES.index("taux_feminisation")]
+
+
+def test_priorites_portefeuille():
+    rng = np.random.default_rng(2022)
+    donnees = pd.DataFrame({cle: rng.uniform(0, 100, 500) for cle in CLES})
+    donnees["nom_entreprise"], donnees["annee"] = "E", 2024
+    conteneur = Evaluations.depuis_dataframe(evaluer_portefeuille(donnees))
+    priorites = conteneur.prioriser(SEUILS)
+    prioritaires = priorites.prioritaires()
+
+    for position in range(len(conteneur)):
+        evaluation = conteneur[position]
+        seule = evaluation.prioriser(SEUILS)
+        assert seule.cles(toutes=True) == priorites.cles(position, toutes=True)
+        attendu = CLES.index(seule.cles()[0]) if seule.cles() else -1
+        assert prioritaires[position] == attendu
+        # Efforts croissants et, à effort égal, notes décroissantes
+        colonnes = priorites.positions(position, toutes=True)
+        cles_tri = [(priorites.efforts[position, c], -evaluation.codes[c]) for c in colonnes]
+        assert cles_tri == sorted(cles_tri)
+
+
+def test_aucun_levier():
+    meilleure = {"taux_feminisation": 50.0, "taux_femmes_cadres": 40.0, "taux_handicap": 7.0, "ecart_salaire": 1.0,
+                 "equilibre_age": 90.0, "taux_absenteisme": 2.0}
+    priorites = Evaluation.evaluer("A", 2024, meilleure).prioriser(SEUILS)
+    assert priorites.cles(toutes=True) == []
+    assert priorites.prioritaires().tolist() == [-1]
+    assert priorites.paliers_note_globale.tolist() == [0]
+
+
+def test_conteneur_aller_retour():
+    rng = np.random.default_rng(7)
+    donnees = pd.DataFrame({cle: rng.uniform(0, 100, 20) for cle in CLES})
+    donnees["nom_entreprise"], donnees["annee"] = [f"E{i}" for i in range(20)], 2024
+    evaluations = evaluer_portefeuille(donnees)
+    conteneur = Evaluations.depuis_dataframe(evaluations)
+
+    retour = conteneur.vers_dataframe()
+    pd.testing.assert_frame_equal(retour, evaluations[retour.columns].reset_index(drop=True), check_dtype=False)
+    assert Evaluations.evaluer(donnees).codes.tolist() == conteneur.codes.tolist()
+
+
+def test_evaluations_comptees_par_les_appelants():
+    compteur = evaluations._EVALUATIONS
+
+    def valeur():
+        return compteur._valeurs.get(("portefeuille",), 0)
+
+    donnees = pd.DataFrame([ENTITE] * 3)
+    donnees["nom_entreprise"], donnees["annee"] = ["A", "B", "C"], 2024
+    avant = valeur()
+    # Notation pure : le compteur appartient à ses appelants
+    coder_portefeuille(donnees)
+    assert valeur() == avant
+    Evaluations.evaluer(donnees)
+    assert valeur() == avant + 3
@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+import export_excel
+import stockage
+import travaux
+from export_excel import NOMS_FEUILLES, exporter_portefeuille_excel, traiter_export_excel
+from notation import INDICATEURS, evaluer_portefeuille
+from stockage import enregistrer_evaluations, ouvrir_base
+
+
+class SuiviFactice:
+    def __init__(self):
+        self.avancement = []
+
+    def progression(self, fraction, message=None):
+        self.avancement.append(fraction)
+
+
+@pytest.fixture
+def evaluations():
+    rng = np.random.default_rng(2022)
+    lignes = [
+        {"nom_entreprise": f"Entité {i}", "annee": 2020 + i % 4,
+         **{cle: float(rng.uniform(0, 100)) for cle, _, _ in INDICATEURS}}
+        for i in range(23)
+    ]
+    lignes[5]["ecart_salaire"] = np.nan
+    return evaluer_portefeuille(pd.DataFrame(lignes))
+
+
+@pytest.fixture
+def base(tmp_path, evaluations):
+    chemin = str(tmp_path / "portefeuille.db")
+    conn = ouvrir_base(chemin)
+    enregistrer_evaluations(conn, evaluations, "v1")
+    conn.close()
+    return chemin
+
+
+@pytest.fixture(autouse=True)
+def petits_blocs(tmp_path, monkeypatch):
+    # Plusieurs blocs même pour un petit portefeuille ; fichiers des travaux dans le répertoire du test
+    monkeypatch.setattr(export_excel, "TAILLE_BLOC", 7)
+    monkeypatch.setattr(travaux, "REPERTOIRE_TRAVAUX", str(tmp_path / "travaux"))
+
+
+def _contenu(chemin):
+    classeur = openpyxl.load_workbook(chemin, read_only=True)
+    return {nom: [list(ligne) for ligne in classeur[nom].iter_rows(values_only=True)] for nom in classeur.sheetnames}
+
+
+def test_export_dataframe(evaluations, tmp_path):
+    chemin = str(tmp_path / "export.xlsx")
+    avancement = []
+    exporter_portefeuille_excel(evaluations, chemin, lambda nb, total: avancement.append((nb, total)))
+
+    contenu = _contenu(chemin)
+    assert list(contenu) == NOMS_FEUILLES
+    synthese = contenu[NOMS_FEUILLES[0]]
+    assert synthese[0][:4] == ["Entreprise", "Année", "Score global", "Note globale"]
+    assert len(synthese) == 1 + len(evaluations)
+    assert [ligne[0] for ligne in synthese[1:]] == evaluations["nom_entreprise"].tolist()
+    assert [ligne[3] for ligne in synthese[1:]] == evaluations["note_globale"].tolist()
+
+    # Feuille d'un indicateur : valeur et note, cellules vides pour une valeur manquante
+    position = [cle for cle, _, _ in INDICATEURS].index("ecart_salaire")
+    feuille = contenu[NOMS_FEUILLES[1 + position]]
+    assert feuille[0] == ["Entreprise", "Année", "Valeur", "Note"]
+    assert feuille[6][2] is None
+    assert feuille[1][2] == pytest.approx(evaluations["ecart_salaire"].iloc[0])
+    assert avancement == [(7, 23), (14, 23), (21, 23), (23, 23)]
+
+
+def test_largeurs_sur_tous_les_blocs(evaluations, tmp_path):
+    # Nom le plus long dans le dernier bloc : la largeur tient compte de toutes les lignes
+    evaluations.loc[22, "nom_entreprise"] = "Entité au nom particulièrement long"
+    chemin = str(tmp_path / "export.xlsx")
+    exporter_portefeuille_excel(evaluations, chemin)
+    largeur = openpyxl.load_workbook(chemin)[NOMS_FEUILLES[0]].column_dimensions["A"].width
+    assert largeur >= len("Entité au nom particulièrement long") + 2
+
+
+def test_export_par_blocs_identique(evaluations, base, tmp_path):
+    chemin_df = str(tmp_path / "dataframe.xlsx")
+    exporter_portefeuille_excel(evaluations, chemin_df)
+
+    conn = ouvrir_base(base)
+    tailles = []
+
+    def blocs():
+        for bloc in stockage.iterer_evaluations(conn, None, 7):
+            tailles.append(len(bloc))
+            yield bloc
+
+    chemin_blocs = str(tmp_path / "blocs.xlsx")
+    exporter_portefeuille_excel(blocs(), chemin_blocs, nb_lignes=stockage.compter_evaluations(conn))
+    conn.close()
+
+    assert tailles == [7, 7, 7, 2]
+    assert _contenu(chemin_blocs) == _contenu(chemin_df)
+
+
+def test_trop_de_lignes(evaluations, tmp_path, monkeypatch):
+    monkeypatch.setattr(export_excel, "MAX_LIGNES_FEUILLE", 10)
+    with pytest.raises(ValueError):
+        exporter_portefeuille_excel(evaluations, str(tmp_path / "export.xlsx"))
+
+
+def test_travail_export(base, evaluations):
+    suivis = SuiviFactice(), SuiviFactice()
+    filtres = {"annees": [2021]}
+    chemins = [traiter_export_excel(id_travail, {"filtres": filtres, "chemin_base": base}, suivi)
+               for id_travail, suivi in zip((1, 2), suivis)]
+
+    # Mêmes filtres, travaux distincts : un classeur par travail
+    assert chemins[0] != chemins[1]
+    assert all(os.path.dirname(chemin) == travaux.REPERTOIRE_TRAVAUX for chemin in chemins)
+    attendus = evaluations.loc[evaluations["annee"] == 2021, "nom_entreprise"].tolist()
+    for chemin, suivi in zip(chemins, suivis):
+        assert [ligne[0] for ligne in _contenu(chemin)[NOMS_FEUILLES[0]][1:]] == attendus
+        assert suivi.avancement[-1] == 1.0
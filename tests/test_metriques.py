@@ -0,0 +1,112 @@
+import math
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+import metriques
+from metriques import Registre
+
+
+def _lignes(registre):
+    return registre.exposer().splitlines()
+
+
+def test_compteur_et_jauge():
+    registre = Registre()
+    compteur = registre.compteur("di_test_total", "Compteur de test", etiquettes=("type",))
+    compteur.inc(type="a")
+    compteur.inc(2, type="a")
+    compteur.inc(type="b")
+    registre.jauge("di_test_jauge", "Jauge de test").set(1.5)
+
+    lignes = _lignes(registre)
+    assert lignes[:2] == ["# HELP di_test_total Compteur de test", "# TYPE di_test_total counter"]
+    assert 'di_test_total{type="a"} 3' in lignes
+    assert 'di_test_total{type="b"} 1' in lignes
+    assert "# TYPE di_test_jauge gauge" in lignes
+    assert "di_test_jauge 1.5" in lignes
+
+
+def test_declaration_idempotente():
+    registre = Registre()
+    registre.compteur("di_test_total", "Compteur de test").inc()
+    registre.compteur("di_test_total", "Compteur de test").inc()
+    assert "di_test_total 2" in _lignes(registre)
+
+
+def test_histogramme_cumule():
+    registre = Registre()
+    histogramme = registre.histogramme("di_test_duree", "Durée de test", bornes=(0.1, 1))
+    for valeur in (0.05, 0.1, 0.5, 3):
+        histogramme.observe(valeur)
+
+    lignes = _lignes(registre)
+    assert 'di_test_duree_bucket{le="0.1"} 2' in lignes
+    assert 'di_test_duree_bucket{le="1"} 3' in lignes
+    assert 'di_test_duree_bucket{le="+Inf"} 4' in lignes
+    assert "di_test_duree_sum 3.65" in lignes
+    assert "di_test_duree_count 4" in lignes
+
+
+def test_etiquettes_echappees():
+    registre = Registre()
+    registre.jauge("di_test_jauge", "Jauge de test", etiquettes=("nom",)).set(1, nom='a"b\\c\nd')
+    assert 'di_test_jauge{nom="a\\"b\\\\c\\nd"} 1' in _lignes(registre)
+
+
+@pytest.mark.parametrize("valeur, attendu", [
+    (math.nan, "NaN"),
+    (math.inf, "+Inf"),
+    (-math.inf, "-Inf"),
+    (np.float64("nan"), "NaN"),
+    (np.float64("-inf"), "-Inf"),
+    (0.25, "0.25"),
+    (7, "7"),
+])
+def test_valeurs_non_finies(valeur, attendu):
+    registre = Registre()
+    registre.jauge("di_test_jauge", "Jauge de test", fonction=lambda: valeur)
+    assert f"di_test_jauge {attendu}" in _lignes(registre)
+
+
+def test_fonction_en_echec_omise():
+    registre = Registre()
+
+    def echec():
+        raise RuntimeError("indisponible")
+
+    registre.jauge("di_test_echec", "Jauge en échec", fonction=echec)
+    registre.jauge("di_test_dict", "Jauge par étiquette", etiquettes=("file",), fonction=lambda: {("x",): 4})
+    texte = registre.exposer()
+    assert "di_test_echec" not in texte
+    assert 'di_test_dict{file="x"} 4' in texte.splitlines()
+
+
+def test_endpoint():
+    adresse = metriques.demarrer_serveur(hote="127.0.0.1", port=0)
+    assert adresse is not None
+    base = f"http://{adresse[0]}:{adresse[1]}"
+    metriques.signaler_session("session-test")
+
+    with urllib.request.urlopen(f"{base}/metrics", timeout=5) as reponse:
+        assert reponse.status == 200
+        assert reponse.headers["Content-Type"] == metriques.TYPE_CONTENU
+        texte = reponse.read().decode("utf-8")
+    assert "# TYPE di_sessions_actives gauge" in texte
+    assert "di_memoire_processus_octets " in texte
+
+    with pytest.raises(urllib.error.HTTPError) as erreur:
+        urllib.request.urlopen(f"{base}/autre", timeout=5)
+    assert erreur.value.code == 404
+
+
+def test_memoire_sans_proc_ni_resource(monkeypatch):
+    # Windows : ni /proc ni module resource
+    def ouvrir(*args, **kwargs):
+        raise OSError("pas de /proc")
+
+    monkeypatch.setattr(metriques, "open", ouvrir, raising=False)
+    monkeypatch.setattr(metriques, "resource", None)
+    assert metriques._memoire_processus() == 0
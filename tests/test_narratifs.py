@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluations import Evaluations
+from narratifs import LANGUES, catalogue, narratifs_portefeuille
+from notation import INDICATEURS, SEUILS, evaluer_portefeuille
+from rapport import construire_donnees_modele, preparer_donnees_entite
+
+
+@pytest.fixture
+def portefeuille():
+    rng = np.random.default_rng(2022)
+    lignes = [{"nom_entreprise": f"E{i}", "annee": 2024,
+               **{cle: float(rng.uniform(0, 100)) for cle, _, _ in INDICATEURS}} for i in range(50)]
+    lignes[0]["taux_handicap"] = 0.0
+    return evaluer_portefeuille(pd.DataFrame(lignes))
+
+
+@pytest.mark.parametrize("langue", list(LANGUES))
+def test_textes_identiques_a_ceux_d_une_entite(portefeuille, langue):
+    textes = catalogue(langue)
+    narratifs = narratifs_portefeuille(portefeuille, langue)
+
+    for position, ligne in enumerate(portefeuille.to_dict("records")):
+        for cle, _, _ in INDICATEURS:
+            note = ligne[f"note_{cle}"]
+            assert narratifs[f"analyse_{cle}"].iloc[position] == textes.analyse(cle, ligne[cle], note)
+            assert narratifs[f"recommandations_{cle}"].iloc[position] == textes.recommandations(cle, note, defaut="")
+        assert narratifs["conclusion"].iloc[position] == textes.conclusion(ligne["note_globale"])
+    assert narratifs["analyse_taux_handicap"].iloc[0] == textes.analyse_donnees_absentes
+
+
+def test_valeur_manquante_sans_texte_chiffre(portefeuille):
+    portefeuille.loc[portefeuille.index[1], "ecart_salaire"] = np.nan
+    narratifs = narratifs_portefeuille(portefeuille)
+    assert narratifs["analyse_ecart_salaire"].iloc[1] == catalogue().analyse_donnees_absentes
+
+
+@pytest.mark.parametrize("langue", list(LANGUES))
+def test_rapport_identique_avec_les_textes_du_portefeuille(portefeuille, langue):
+    conteneur = Evaluations.depuis_dataframe(portefeuille)
+    priorites = conteneur.prioriser(SEUILS)
+    narratifs = narratifs_portefeuille(portefeuille, langue).to_dict("records")
+
+    for position, evaluation in enumerate(conteneur):
+        data = preparer_donnees_entite(evaluation, SEUILS, position, priorites)
+        attendu = construire_donnees_modele(data, "E", 2024, langue=langue)
+        obtenu = construire_donnees_modele({**data, "narratifs": narratifs[position]}, "E", 2024, langue=langue)
+        attendu.pop("date_generation"), obtenu.pop("date_generation")
+        assert obtenu == attendu
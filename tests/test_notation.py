@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from evaluations import Evaluation
+from notation import (CODE_ABSENT, INDICATEURS, NOTES, SEUILS, attribuer_note, codes_vers_chiffres, codes_vers_lettres,
+                      coder_valeurs, evaluer_portefeuille, lettres_vers_codes)
+
+CLES = [cle for cle, _, _ in INDICATEURS]
+
+
+def _portefeuille(lignes):
+    return pd.DataFrame([{"nom_entreprise": f"E{i}", "annee": 2024, **ligne} for i, ligne in enumerate(lignes)])
+
+
+def _bonne_entite():
+    # Note A sur tous les indicateurs
+    return {"taux_feminisation": 45.0, "taux_femmes_cadres": 40.0, "taux_handicap": 7.0, "ecart_salaire": 1.0,
+            "equilibre_age": 90.0, "taux_absenteisme": 2.0}
+
+
+@pytest.mark.parametrize("cle,ordre_croissant", [(cle, ordre) for cle, _, ordre in INDICATEURS])
+def test_coder_valeurs_identique_a_attribuer_note(cle, ordre_croissant):
+    seuils = SEUILS[cle]
+    # Seuils exacts, valeurs intermédiaires, extrêmes et valeur manquante
+    valeurs = sorted(set(seuils) | {s + d for s in seuils for d in (-0.5, 0.5)} | {-1e9, 0.0, 1e9})
+    valeurs.append(np.nan)
+    attendues = [attribuer_note(valeur, seuils, ordre_croissant) for valeur in valeurs]
+    assert list(codes_vers_lettres(coder_valeurs(valeurs, seuils, ordre_croissant))) == attendues
+
+
+@pytest.mark.parametrize("ordre_croissant", [True, False])
+def test_valeur_manquante_notee_e(ordre_croissant):
+    assert codes_vers_lettres(coder_valeurs([np.nan], [1, 2, 3, 4], ordre_croissant))[0] == "E"
+
+
+@pytest.mark.parametrize("cle", ["taux_feminisation", "ecart_salaire", "taux_absenteisme"])
+def test_portefeuille_valeur_manquante_ne_fait_pas_monter_la_note(cle):
+    complete = _bonne_entite()
+    incomplete = {**complete, cle: np.nan}
+    resultat = evaluer_portefeuille(_portefeuille([complete, incomplete]))
+
+    assert resultat[f"note_{cle}"].tolist() == ["A", "E"]
+    assert resultat["score_global"].iloc[1] < resultat["score_global"].iloc[0]
+
+
+def test_portefeuille_identique_a_l_evaluation_d_une_entite():
+    rng = np.random.default_rng(2022)
+    lignes = [{cle: float(rng.uniform(0, 100)) for cle in CLES} for _ in range(200)]
+    lignes[0]["ecart_salaire"] = np.nan
+    lignes[1]["taux_handicap"] = np.nan
+    resultat = evaluer_portefeuille(_portefeuille(lignes))
+
+    for position, ligne in enumerate(lignes):
+        evaluation = Evaluation.evaluer(f"E{position}", 2024, ligne)
+        assert [resultat[f"note_{cle}"].iloc[position] for cle in CLES] == list(evaluation.notes)
+        assert resultat["score_global"].iloc[position] == pytest.approx(evaluation.score_global)
+        assert resultat["note_globale"].iloc[position] == evaluation.note_globale
+
+
+def test_tables_de_correspondance():
+    codes = np.array([0, 1, 2, 3, 4, CODE_ABSENT], dtype=np.uint8)
+    assert list(codes_vers_lettres(codes)) == NOTES + [""]
+    assert list(codes_vers_chiffres(codes)) == [5, 4, 3, 2, 1, 0]
+    assert list(lettres_vers_codes(NOTES + [None, "Z"])) == [0, 1, 2, 3, 4, CODE_ABSENT, CODE_ABSENT]
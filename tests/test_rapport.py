@@ -0,0 +1,75 @@
+import pytest
+
+from cache_rapports import CacheRapports
+from evaluations import Evaluation
+from notation import SEUILS
+import rapport
+from rapport import (MOTEUR_HTML, MOTEUR_REPORTLAB, PROFILS_RENDU, construire_donnees_modele, construire_graphiques,
+                     preparer_donnees_entite, rendre_html, rendre_pdf_reportlab, version_modele)
+from rapports_lot import rendre_rapport
+
+INDICATEURS = {
+    "taux_feminisation": 42.0, "taux_femmes_cadres": 31.0, "taux_handicap": 3.5, "ecart_salaire": 6.0,
+    "equilibre_age": 72.0, "taux_absenteisme": 5.0,
+}
+
+
+@pytest.fixture
+def donnees():
+    return preparer_donnees_entite(Evaluation.evaluer("ACME", 2024, INDICATEURS), SEUILS)
+
+
+@pytest.mark.parametrize("profil", list(PROFILS_RENDU))
+@pytest.mark.parametrize("moteur", [MOTEUR_HTML, MOTEUR_REPORTLAB])
+def test_construire_graphiques_avec_rendu_disponible(donnees, profil, moteur, rendu_images_factice):
+    rendu = rendu_images_factice
+    graphiques = construire_graphiques(donnees, rendu, moteur, profil=profil)
+
+    assert set(graphiques) == {"jauge", "radar", "barres"}
+    format_attendu = PROFILS_RENDU[profil]["format_graphiques"] if moteur == MOTEUR_HTML else "png"
+    assert {g["format"] for g in graphiques.values()} == {format_attendu}
+    if format_attendu == "png":
+        assert {appel[3] for appel in rendu.appels} == {PROFILS_RENDU[profil]["echelle_graphiques"]}
+
+
+def test_construire_graphiques_sans_rendu(donnees):
+    assert construire_graphiques(donnees, None, MOTEUR_HTML) == {}
+
+
+def test_rapport_reportlab_avec_graphiques(donnees, rendu_images_factice):
+    graphiques = construire_graphiques(donnees, rendu_images_factice, MOTEUR_REPORTLAB)
+    pdf = rendre_pdf_reportlab(construire_donnees_modele(donnees, "ACME", 2024, graphiques))
+    assert pdf.startswith(b"%PDF")
+
+
+def test_rapport_html_avec_graphiques(donnees, rendu_images_factice):
+    graphiques = construire_graphiques(donnees, rendu_images_factice, MOTEUR_HTML)
+    html = rendre_html(construire_donnees_modele(donnees, "ACME", 2024, graphiques))
+    assert "ACME" in html
+
+
+def test_rendre_rapport_servi_par_le_cache(donnees, tmp_path, rendu_images_factice):
+    cache = CacheRapports(str(tmp_path))
+    rendu = rendu_images_factice
+    premier = rendre_rapport(donnees, "ACME", 2024, MOTEUR_REPORTLAB, rendu_images=rendu, cache=cache)
+    second = rendre_rapport(donnees, "ACME", 2024, MOTEUR_REPORTLAB, rendu_images=rendu, cache=cache)
+
+    assert premier.startswith(b"%PDF") and second == premier
+    assert (cache.nb_miss, cache.nb_hits) == (1, 1)
+    assert len(rendu.appels) == 3
+
+
+def test_version_modele_couvre_notes_et_graphiques(monkeypatch):
+    signatures = []
+    monkeypatch.setattr(rapport, "_empreinte_sources", signatures.append)
+    version_modele()
+
+    fichiers = {chemin.replace("\\", "/").rsplit("/", 1)[-1] for chemin, _ in signatures[0]}
+    assert {"notation.py", "graphiques.py", "rendu_images.py"} <= fichiers
+
+
+def test_donnees_entite_sans_textes_rediges(donnees):
+    # Points forts et axes d'amélioration sont rédigés au rendu : ils n'entrent pas dans la clé du cache
+    assert not {"points_forts", "axes_amelioration"} & set(donnees)
+    modele = construire_donnees_modele(donnees, "ACME", 2024)
+    assert modele["points_forts"] and modele["axes_amelioration"]
@@ -0,0 +1,185 @@
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rapports_lot
+import travaux
+from cache_rapports import CacheRapports
+from notation import INDICATEURS, evaluer_portefeuille
+from rapports_lot import generer_rapports_zip, nom_fichier_rapport, traiter_lot
+from stockage import enregistrer_evaluations, ouvrir_base
+
+
+class Interruption(Exception):
+    pass
+
+
+def interrompre(nb_faits, nb_total):
+    raise Interruption()
+
+
+@pytest.fixture
+def portefeuille():
+    rng = np.random.default_rng(2022)
+    lignes = [
+        {"nom_entreprise": f"Entité {i}", "annee": 2024,
+         **{cle: float(rng.uniform(0, 100)) for cle, _, _ in INDICATEURS}}
+        for i in range(6)
+    ]
+    return evaluer_portefeuille(pd.DataFrame(lignes))
+
+
+@pytest.fixture(autouse=True)
+def isolation(tmp_path, monkeypatch):
+    # Cache des rapports propre au test (hérité par les processus de travail) ; aucun navigateur démarré
+    monkeypatch.setattr(rapports_lot, "_cache_rapports", CacheRapports(str(tmp_path / "cache")))
+
+    def interdit(*args, **kwargs):
+        raise AssertionError("rendu des graphiques démarré hors du processus principal")
+
+    monkeypatch.setattr(rapports_lot, "RenduImages", interdit)
+
+
+def _noms_attendus(portefeuille, langues=("fr",)):
+    return {nom_fichier_rapport(position, ligne.nom_entreprise, ligne.annee, langue)
+            for position, ligne in enumerate(portefeuille.itertuples()) for langue in langues}
+
+
+def test_archive_complete(portefeuille, tmp_path, rendu_images_factice):
+    chemin = str(tmp_path / "lot.zip")
+    bilan = generer_rapports_zip(portefeuille, chemin, nb_processus=2, rendu_images=rendu_images_factice,
+                                 langues=("fr", "en"))
+
+    assert bilan["nb_rapports"] == 12 and bilan["nb_repris"] == 0
+    with zipfile.ZipFile(chemin) as archive:
+        assert archive.testzip() is None
+        assert set(archive.namelist()) == _noms_attendus(portefeuille, ("fr", "en"))
+        assert all(archive.read(nom).startswith(b"%PDF") for nom in archive.namelist())
+    assert not os.path.exists(chemin + ".journal")
+    # Graphiques rendus par le processus principal, une fois par entité quelle que soit la langue
+    assert len(rendu_images_factice.appels) == 3 * len(portefeuille)
+
+
+def test_reprise_apres_interruption(portefeuille, tmp_path, rendu_images_factice):
+    chemin = str(tmp_path / "lot.zip")
+
+    def interrompre_au_troisieme(nb_faits, nb_total):
+        if nb_faits == 3:
+            raise Interruption()
+
+    with pytest.raises(Interruption):
+        generer_rapports_zip(portefeuille, chemin, nb_processus=1, rendu_images=rendu_images_factice,
+                             progression=interrompre_au_troisieme)
+    assert os.path.exists(chemin + ".journal")
+    # Processus tué pendant l'écriture du rapport suivant : octets sans entrée dans le journal
+    with open(chemin, "ab") as f:
+        f.write(b"PK\x03\x04 rapport incomplet")
+
+    avancement = []
+    bilan = generer_rapports_zip(portefeuille, chemin, nb_processus=1, rendu_images=rendu_images_factice,
+                                 progression=lambda nb_faits, nb_total: avancement.append((nb_faits, nb_total)))
+
+    assert (bilan["nb_repris"], bilan["nb_rapports"]) == (3, 3)
+    assert avancement == [(4, 6), (5, 6), (6, 6)]
+    with zipfile.ZipFile(chemin) as archive:
+        assert archive.testzip() is None
+        assert set(archive.namelist()) == _noms_attendus(portefeuille)
+    assert not os.path.exists(chemin + ".journal")
+
+
+def test_sans_reprise_l_archive_est_refaite(portefeuille, tmp_path, rendu_images_factice):
+    chemin = str(tmp_path / "lot.zip")
+    with pytest.raises(Interruption):
+        generer_rapports_zip(portefeuille, chemin, nb_processus=1, rendu_images=rendu_images_factice,
+                             progression=interrompre)
+
+    bilan = generer_rapports_zip(portefeuille, chemin, nb_processus=1, rendu_images=rendu_images_factice,
+                                 reprendre=False)
+    assert (bilan["nb_repris"], bilan["nb_rapports"]) == (0, 6)
+
+
+def test_parametres_invalides(portefeuille, tmp_path):
+    with pytest.raises(ValueError):
+        generer_rapports_zip(portefeuille, str(tmp_path / "lot.zip"), moteur="inconnu")
+    with pytest.raises(ValueError):
+        generer_rapports_zip(portefeuille, str(tmp_path / "lot.zip"), langues=("xx",))
+
+
+def test_textes_rediges_par_blocs(portefeuille, tmp_path, rendu_images_factice, monkeypatch):
+    appels = []
+    narratifs_portefeuille = rapports_lot.narratifs_portefeuille
+
+    def narratifs_comptes(evaluations, langue):
+        appels.append((len(evaluations), langue))
+        return narratifs_portefeuille(evaluations, langue)
+
+    monkeypatch.setattr(rapports_lot, "narratifs_portefeuille", narratifs_comptes)
+    monkeypatch.setattr(rapports_lot, "TAILLE_BLOC_NARRATIFS", 4)
+    generer_rapports_zip(portefeuille, str(tmp_path / "lot.zip"), nb_processus=1, rendu_images=rendu_images_factice,
+                         langues=("fr", "en"))
+
+    assert appels == [(4, "fr"), (4, "en"), (2, "fr"), (2, "en")]
+
+
+class SuiviFactice:
+    def __init__(self, interrompre_apres=None):
+        self.interrompre_apres = interrompre_apres
+        self.nb_appels = 0
+
+    def progression(self, fraction, message=None):
+        self.nb_appels += 1
+        if self.nb_appels == self.interrompre_apres:
+            raise Interruption()
+
+
+def test_travaux_de_memes_parametres(portefeuille, tmp_path, rendu_images_factice, monkeypatch):
+    chemin_base = str(tmp_path / "portefeuille.db")
+    conn = ouvrir_base(chemin_base)
+    enregistrer_evaluations(conn, portefeuille, "v1")
+    conn.close()
+    monkeypatch.setattr(travaux, "REPERTOIRE_TRAVAUX", str(tmp_path / "travaux"))
+    monkeypatch.setattr(rapports_lot, "_rendu_images", rendu_images_factice)
+    monkeypatch.setattr(rapports_lot, "NB_PROCESSUS", 1)
+    parametres = {"filtres": {}, "moteur": "reportlab", "chemin_base": chemin_base}
+
+    # Travail 1 interrompu après son premier rapport, travail 2 (mêmes paramètres) complet
+    with pytest.raises(Interruption):
+        traiter_lot(1, parametres, SuiviFactice(interrompre_apres=1))
+    chemin_2 = traiter_lot(2, parametres, SuiviFactice())
+
+    # Nouvelle tentative du travail 1 : reprend sa propre archive, sans toucher à celle du travail 2
+    suivi = SuiviFactice()
+    chemin_1 = traiter_lot(1, parametres, suivi)
+    assert chemin_1 != chemin_2
+    assert suivi.nb_appels == 5 + 1
+    for chemin in (chemin_1, chemin_2):
+        with zipfile.ZipFile(chemin) as archive:
+            assert archive.testzip() is None
+            assert set(archive.namelist()) == _noms_attendus(portefeuille)
+
+
+def test_processus_demarres_a_neuf_et_mesures_rapatriees(portefeuille, tmp_path, rendu_images_factice, monkeypatch):
+    methodes = []
+    get_context = rapports_lot.multiprocessing.get_context
+
+    def contexte(methode=None):
+        methodes.append(methode)
+        return get_context(methode)
+
+    monkeypatch.setattr(rapports_lot.multiprocessing, "get_context", contexte)
+
+    def valeur(metrique):
+        return metrique._valeurs.get(("reportlab",), 0)
+
+    demandes, rendus = valeur(rapports_lot._RAPPORTS_DEMANDES), valeur(rapports_lot._RAPPORTS_RENDUS)
+    generer_rapports_zip(portefeuille, str(tmp_path / "lot.zip"), nb_processus=2, rendu_images=rendu_images_factice)
+    # Même lot une seconde fois : rapports servis par le cache partagé avec les processus de travail
+    generer_rapports_zip(portefeuille, str(tmp_path / "lot_bis.zip"), nb_processus=2,
+                         rendu_images=rendu_images_factice)
+
+    assert methodes == ["spawn", "spawn"]
+    assert valeur(rapports_lot._RAPPORTS_DEMANDES) - demandes == 12
+    assert valeur(rapports_lot._RAPPORTS_RENDUS) - rendus == 6
@@ -0,0 +1,101 @@
+import io
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from rendu_pdf import FileRenduPleine, ServiceRendu, est_pdf
+
+
+class ServiceFactice(ServiceRendu):
+    """Service dont le convertisseur simule wkhtmltopdf : le HTML donne la durée du rendu ou "echec"."""
+
+    def __init__(self, **kwargs):
+        self.debloque = threading.Event()
+        self.debloque.set()
+        self.demarres = []
+        # Exécutable existant : pdfkit se configure et les workers démarrent sans wkhtmltopdf
+        super().__init__(chemin_wkhtmltopdf=sys.executable, **kwargs)
+
+    def _rendre_pdf(self, html, options):
+        self.demarres.append(html)
+        self.debloque.wait(5)
+        if html == "echec":
+            raise RuntimeError("wkhtmltopdf en erreur")
+        time.sleep(float(html))
+        return b"%PDF-" + html.encode()
+
+
+def attendre(condition, delai=5):
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_est_pdf():
+    tampon = io.BytesIO()
+    document = canvas.Canvas(tampon)
+    document.drawString(10, 10, "Test")
+    document.save()
+    assert est_pdf(tampon.getvalue())
+    # Sortie d'un script de substitution, document tronqué, rendu vide
+    assert not est_pdf(b"%PDF-1.4 fake\n")
+    assert not est_pdf(tampon.getvalue()[:-200])
+    assert not est_pdf(b"")
+    assert not est_pdf(None)
+
+
+def test_rendu():
+    service = ServiceFactice(nb_workers=2)
+    assert service.disponible
+    assert service.rendre("0") == b"%PDF-0"
+
+
+def test_delai_depasse():
+    service = ServiceFactice(nb_workers=1)
+    service.debloque.clear()
+    with pytest.raises(TimeoutError):
+        service.rendre("0", delai=0.05)
+    service.debloque.set()
+    # Le rendu abandonné par l'appelant se termine et libère le worker
+    assert service.rendre("0", delai=5) == b"%PDF-0"
+
+
+def test_file_pleine():
+    service = ServiceFactice(nb_workers=1, taille_file=1)
+    service.debloque.clear()
+    en_cours = service.soumettre("0")
+    assert attendre(lambda: service.demarres == ["0"])
+    en_attente = service.soumettre("0.0")
+    assert service.statistiques()["profondeur_file"] == 1
+    with pytest.raises(FileRenduPleine):
+        service.soumettre("0")
+
+    service.debloque.set()
+    assert en_cours.result(timeout=5) == b"%PDF-0" and en_attente.result(timeout=5) == b"%PDF-0.0"
+    assert service.statistiques()["nb_rendus"] == 2
+
+
+def test_statistiques():
+    service = ServiceFactice(nb_workers=1)
+    assert service.statistiques()["rendu_p50"] is None
+
+    # 9 rendus immédiats et 1 rendu lent : le lent est le 95e percentile, pas la médiane
+    for html in ["0"] * 9 + ["0.2"]:
+        service.rendre(html)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            service.rendre("echec")
+
+    statistiques = service.statistiques()
+    assert (statistiques["nb_rendus"], statistiques["nb_echecs"]) == (10, 2)
+    assert (statistiques["nb_workers"], statistiques["profondeur_file"]) == (1, 0)
+    assert statistiques["rendu_p50"] < 0.1 and statistiques["rendu_p95"] >= 0.2
+    assert statistiques["total_p50"] >= statistiques["rendu_p50"]
+    assert statistiques["total_p95"] >= statistiques["rendu_p95"]
@@ -0,0 +1,201 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import travaux
+from travaux import ANNULE, ECHEC, EN_ATTENTE, EN_COURS, TERMINE, FileTravaux, LimiteTravauxAtteinte
+
+
+@pytest.fixture(autouse=True)
+def scrutation_rapide(monkeypatch):
+    monkeypatch.setattr(travaux, "INTERVALLE_SCRUTATION", 0.01)
+
+
+@pytest.fixture
+def chemin(tmp_path):
+    return str(tmp_path / "travaux.db")
+
+
+def attendre(condition, delai=5):
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def attendre_statut(file, id_travail, statuts):
+    assert attendre(lambda: file.etat(id_travail)["statut"] in statuts), file.etat(id_travail)
+    return file.etat(id_travail)
+
+
+def test_travail_execute(chemin):
+    def traitement(id_travail, parametres, suivi):
+        suivi.progression(0.5, "à mi-chemin")
+        return f"resultat_{parametres['n']}"
+
+    file = FileTravaux({"essai": traitement}, chemin=chemin)
+    id_travail = file.soumettre("u", "essai", {"n": 7})
+    etat = attendre_statut(file, id_travail, [TERMINE])
+
+    assert etat["resultat"] == "resultat_7"
+    assert etat["progression"] == 1
+    assert etat["message"] == "à mi-chemin"
+    assert etat["proprietaire"] is None
+    assert file.statistiques() == {("essai", TERMINE): 1}
+
+
+def test_type_inconnu(chemin):
+    file = FileTravaux({"essai": lambda *args: None}, chemin=chemin)
+    with pytest.raises(ValueError):
+        file.soumettre("u", "autre", {})
+
+
+def test_echecs_puis_abandon(chemin):
+    appels = []
+
+    def traitement(id_travail, parametres, suivi):
+        appels.append(id_travail)
+        raise RuntimeError("panne")
+
+    file = FileTravaux({"essai": traitement}, chemin=chemin, max_tentatives=3, delai_relance=0.01)
+    id_travail = file.soumettre("u", "essai", {})
+    etat = attendre_statut(file, id_travail, [ECHEC])
+
+    assert etat["message"] == "panne"
+    assert etat["tentatives"] == 3 and len(appels) == 3
+
+    file.relancer(id_travail)
+    assert attendre_statut(file, id_travail, [ECHEC])["tentatives"] == 3
+    assert len(appels) == 6
+
+
+def test_relances_espacees(chemin):
+    appels = []
+
+    def traitement(id_travail, parametres, suivi):
+        appels.append(time.monotonic())
+        raise RuntimeError("panne")
+
+    file = FileTravaux({"essai": traitement}, chemin=chemin, max_tentatives=3, delai_relance=0.2)
+    id_travail = file.soumettre("u", "essai", {})
+    assert attendre(lambda: len(appels) == 1)
+    etat = attendre_statut(file, id_travail, [EN_ATTENTE])
+    assert etat["disponible_a"] > time.time()
+    attendre_statut(file, id_travail, [ECHEC])
+
+    # Délai doublé à chaque tentative : 0,2 s puis 0,4 s
+    assert appels[1] - appels[0] >= 0.2 and appels[2] - appels[1] >= 0.4
+
+
+def test_plafond_par_utilisateur(chemin, monkeypatch):
+    monkeypatch.setattr(travaux, "MAX_EN_ATTENTE_PAR_UTILISATEUR", 2)
+    bloque = threading.Event()
+    file = FileTravaux({"essai": lambda *args: bloque.wait(5)}, chemin=chemin)
+    file.soumettre("u", "essai", {})
+    file.soumettre("u", "essai", {})
+    with pytest.raises(LimiteTravauxAtteinte):
+        file.soumettre("u", "essai", {})
+    file.soumettre("v", "essai", {})
+    bloque.set()
+
+
+def test_annulation(chemin):
+    demarre, bloque = threading.Event(), threading.Event()
+
+    def traitement(id_travail, parametres, suivi):
+        demarre.set()
+        bloque.wait(5)
+        suivi.progression(0.9)
+
+    file = FileTravaux({"essai": traitement}, chemin=chemin, nb_workers=1)
+    en_cours = file.soumettre("u", "essai", {})
+    assert demarre.wait(5)
+    en_attente = file.soumettre("v", "essai", {})
+    file.annuler(en_attente)
+    file.annuler(en_cours)
+    bloque.set()
+
+    assert attendre_statut(file, en_cours, [ANNULE, TERMINE])["statut"] == ANNULE
+    assert file.etat(en_attente)["statut"] == ANNULE
+
+
+def test_travail_d_un_processus_vivant_non_repris(chemin):
+    demarre, bloque = threading.Event(), threading.Event()
+    executions = []
+
+    def traitement(id_travail, parametres, suivi):
+        executions.append(id_travail)
+        demarre.set()
+        bloque.wait(5)
+        return "fait"
+
+    # Deux files sur la même base, comme deux processus Streamlit lancés par le menu
+    premiere = FileTravaux({"essai": traitement}, chemin=chemin, duree_bail=0.3)
+    id_travail = premiere.soumettre("u", "essai", {})
+    assert demarre.wait(5)
+    seconde = FileTravaux({"essai": traitement}, chemin=chemin, duree_bail=0.3)
+
+    # Plusieurs durées de bail : le bail est renouvelé par la première file, qui garde le travail
+    time.sleep(1)
+    assert executions == [id_travail]
+    assert seconde.etat(id_travail)["proprietaire"] == premiere.proprietaire
+    bloque.set()
+    assert attendre_statut(seconde, id_travail, [TERMINE])["resultat"] == "fait"
+    assert executions == [id_travail]
+
+
+def test_travail_d_un_processus_arrete_repris(chemin):
+    file = FileTravaux({"essai": lambda *args: "repris"}, chemin=chemin, nb_workers=0)
+    with sqlite3.connect(chemin, isolation_level=None) as conn:
+        id_travail = conn.execute(
+            "INSERT INTO travaux (utilisateur, type, parametres, statut, tentatives, proprietaire, bail_expire) "
+            "VALUES ('u', 'essai', '{}', ?, 1, 'machine:1:arrete', ?)",
+            (EN_COURS, time.time() - 1)
+        ).lastrowid
+
+    etat = attendre_statut(file, id_travail, [TERMINE])
+    assert etat["resultat"] == "repris" and etat["tentatives"] == 2
+
+
+def test_base_sans_bail_migree(chemin):
+    with sqlite3.connect(chemin, isolation_level=None) as conn:
+        conn.execute(
+            "CREATE TABLE travaux (id INTEGER PRIMARY KEY AUTOINCREMENT, utilisateur TEXT NOT NULL, "
+            "type TEXT NOT NULL, parametres TEXT NOT NULL, statut TEXT NOT NULL, progression REAL DEFAULT 0, "
+            "message TEXT, resultat TEXT, tentatives INTEGER DEFAULT 0, annulation_demandee INTEGER DEFAULT 0, "
+            "cree_le TEXT, demarre_le TEXT, termine_le TEXT)"
+        )
+        conn.execute("INSERT INTO travaux (utilisateur, type, parametres, statut) VALUES ('u', 'essai', '{}', ?)",
+                      (EN_COURS,))
+        conn.execute("INSERT INTO travaux (utilisateur, type, parametres, statut) VALUES ('v', 'autre', '{}', ?)",
+                      (EN_COURS,))
+
+    file = FileTravaux({"essai": lambda *args: "ok"}, chemin=chemin)
+    assert attendre_statut(file, 1, [TERMINE])["resultat"] == "ok"
+    # Type non traité par cette file : laissé au processus qui sait le traiter
+    assert file.etat(2)["statut"] == EN_COURS
+
+
+def test_travail_repris_ailleurs_non_ecrase(chemin):
+    demarre, bloque = threading.Event(), threading.Event()
+
+    def traitement(id_travail, parametres, suivi):
+        demarre.set()
+        bloque.wait(5)
+        return "tardif"
+
+    file = FileTravaux({"essai": traitement}, chemin=chemin)
+    id_travail = file.soumettre("u", "essai", {})
+    assert demarre.wait(5)
+    # Bail perdu (processus suspendu) : le travail a été repris par un autre processus, qui l'exécute
+    with sqlite3.connect(chemin, isolation_level=None) as conn:
+        conn.execute("UPDATE travaux SET proprietaire = 'ailleurs', bail_expire = ? WHERE id = ?",
+                     (time.time() + 60, id_travail))
+    bloque.set()
+    time.sleep(0.2)
+    etat = file.etat(id_travail)
+    assert (etat["statut"], etat["proprietaire"], etat["resultat"]) == (EN_COURS, "ailleurs", None)
@@ -0,0 +1,358 @@
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import closing
+from datetime import datetime
+
+# Base SQLite de la file des travaux (partagée par les applications et conservée entre les redémarrages)
+CHEMIN_BASE_TRAVAUX = os.environ.get(
+    "DI_BASE_TRAVAUX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "travaux.db")
+)
+
+# Répertoire des fichiers produits par les travaux
+REPERTOIRE_TRAVAUX = os.environ.get(
+    "DI_REPERTOIRE_TRAVAUX", os.path.join(tempfile.gettempdir(), "di_travaux")
+)
+
+# Nombre de travaux exécutés simultanément par processus
+NB_WORKERS_TRAVAUX = int(os.environ.get("DI_TRAVAUX_WORKERS", 2))
+
+# Nombre maximal de travaux exécutés simultanément pour un même utilisateur
+MAX_EN_COURS_PAR_UTILISATEUR = int(os.environ.get("DI_TRAVAUX_PAR_UTILISATEUR", 1))
+
+# Nombre maximal de travaux non terminés (en attente ou en cours) pour un même utilisateur
+MAX_EN_ATTENTE_PAR_UTILISATEUR = 10
+
+# Nombre d'exécutions d'un travail avant de le déclarer en échec
+MAX_TENTATIVES = 3
+
+# Délai avant la nouvelle tentative d'un travail en échec, en secondes : il double à chaque tentative
+# (1 fois le délai après le premier échec, 2 fois après le deuxième, ...)
+DELAI_RELANCE = float(os.environ.get("DI_TRAVAUX_DELAI_RELANCE_S", 5))
+
+# Délai entre deux recherches de travail quand la file est vide, en secondes
+INTERVALLE_SCRUTATION = 0.5
+
+# Durée du bail d'un travail en cours, en secondes : le processus qui l'exécute le renouvelle tant
+# qu'il est vivant ; un travail dont le bail a expiré (processus arrêté) est remis en attente
+DUREE_BAIL = float(os.environ.get("DI_TRAVAUX_BAIL_S", 60))
+
+# Statuts d'un travail
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+TERMINE = "termine"
+ECHEC = "echec"
+ANNULE = "annule"
+STATUTS_FINAUX = [TERMINE, ECHEC, ANNULE]
+
+
+def chemin_resultat(id_travail, extension):
+    """
+    Retourne le chemin du fichier produit par un travail (le répertoire est créé si besoin).
+    """
+    os.makedirs(REPERTOIRE_TRAVAUX, exist_ok=True)
+    return os.path.join(REPERTOIRE_TRAVAUX, f"travail_{id_travail}.{extension}")
+
+
+class LimiteTravauxAtteinte(Exception):
+    """Levée quand un utilisateur a déjà trop de travaux en attente."""
+
+
+class TravailAnnule(Exception):
+    """Levée dans un travail dont l'annulation a été demandée."""
+
+
+class Suivi:
+    """
+    Permet à un travail en cours de publier son avancement et de détecter une demande d'annulation.
+    """
+
+    def __init__(self, file, id_travail):
+        self._file = file
+        self.id_travail = id_travail
+
+    def progression(self, fraction, message=None):
+        """
+        Enregistre l'avancement du travail.
+
+        Args:
+            fraction: Avancement entre 0 et 1
+            message: Texte optionnel affiché à l'utilisateur
+
+        Raises:
+            TravailAnnule: si l'annulation du travail a été demandée
+        """
+        with self._file._connexion() as conn:
+            conn.execute(
+                "UPDATE travaux SET progression = ?, message = COALESCE(?, message) WHERE id = ?",
+                (float(fraction), message, self.id_travail)
+            )
+            annulation = conn.execute(
+                "SELECT annulation_demandee FROM travaux WHERE id = ?", (self.id_travail,)
+            ).fetchone()[0]
+        if annulation:
+            raise TravailAnnule()
+
+
+class FileTravaux:
+    """
+    File de travaux en arrière-plan, persistée dans SQLite.
+
+    Les travaux sont exécutés par des threads démarrés une seule fois. Chaque processus n'exécute que
+    les types de travaux pour lesquels il a un traitement, ce qui permet à plusieurs applications de
+    partager la même base. Un travail en cours appartient au processus qui l'a réservé, qui renouvelle
+    son bail (DUREE_BAIL) ; un travail dont le bail a expiré, parce que son processus s'est arrêté, est
+    repris par n'importe quel processus qui sait le traiter. Les travaux en cours dans un autre
+    processus vivant ne sont jamais repris. Un travail en échec est retenté après un délai qui double
+    à chaque tentative (DELAI_RELANCE), pour laisser à une panne passagère le temps de se résorber.
+
+    Un traitement est une fonction traitement(id_travail, parametres, suivi) qui retourne le chemin
+    du fichier produit ; elle peut appeler suivi.progression() pour publier son avancement.
+    """
+
+    def __init__(self, traitements, chemin=CHEMIN_BASE_TRAVAUX, nb_workers=NB_WORKERS_TRAVAUX,
+                 max_en_cours_par_utilisateur=MAX_EN_COURS_PAR_UTILISATEUR, max_tentatives=MAX_TENTATIVES,
+                 duree_bail=DUREE_BAIL, delai_relance=DELAI_RELANCE):
+        self.traitements = dict(traitements)
+        self.chemin = chemin
+        self.max_en_cours_par_utilisateur = max_en_cours_par_utilisateur
+        self.max_tentatives = max_tentatives
+        self.duree_bail = duree_bail
+        self.delai_relance = delai_relance
+        # Propriétaire des travaux réservés par cette file (machine, processus, instance)
+        self.proprietaire = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._verrou_reservation = threading.Lock()
+
+        with self._connexion() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS travaux (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    utilisateur TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    parametres TEXT NOT NULL,
+                    statut TEXT NOT NULL,
+                    progression REAL DEFAULT 0,
+                    message TEXT,
+                    resultat TEXT,
+                    tentatives INTEGER DEFAULT 0,
+                    annulation_demandee INTEGER DEFAULT 0,
+                    cree_le TEXT,
+                    demarre_le TEXT,
+                    termine_le TEXT,
+                    proprietaire TEXT,
+                    bail_expire REAL,
+                    disponible_a REAL
+                )
+            """)
+            # Base créée par une version sans bail ou sans délai de relance
+            colonnes = {ligne["name"] for ligne in conn.execute("PRAGMA table_info(travaux)")}
+            for colonne, type_colonne in (("proprietaire", "TEXT"), ("bail_expire", "REAL"), ("disponible_a", "REAL")):
+                if colonne not in colonnes:
+                    conn.execute(f"ALTER TABLE travaux ADD COLUMN {colonne} {type_colonne}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_travaux_statut ON travaux (statut, type)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_travaux_utilisateur ON travaux (utilisateur, statut)")
+
+        self._workers = []
+        for i in range(max(1, nb_workers)):
+            worker = threading.Thread(target=self._boucle_worker, name=f"travaux-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        threading.Thread(target=self._boucle_bail, name="travaux-bail", daemon=True).start()
+
+    def _connexion(self):
+        # Une connexion par opération (fermée en sortie) : les threads ne partagent pas de connexion SQLite
+        conn = sqlite3.connect(self.chemin, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return closing(conn)
+
+    def soumettre(self, utilisateur, type_, parametres):
+        """
+        Ajoute un travail à la file.
+
+        Args:
+            utilisateur: Identifiant de l'utilisateur (pour le plafond de travaux par utilisateur)
+            type_: Type du travail (clé de traitements)
+            parametres: Paramètres du traitement, sérialisables en JSON
+
+        Returns:
+            L'identifiant du travail
+
+        Raises:
+            LimiteTravauxAtteinte: si l'utilisateur a déjà trop de travaux non terminés
+        """
+        if type_ not in self.traitements:
+            raise ValueError(f"Type de travail inconnu : {type_}")
+        with self._connexion() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            nb_actifs = conn.execute(
+                "SELECT COUNT(*) FROM travaux WHERE utilisateur = ? AND statut IN (?, ?)",
+                (utilisateur, EN_ATTENTE, EN_COURS)
+            ).fetchone()[0]
+            if nb_actifs >= MAX_EN_ATTENTE_PAR_UTILISATEUR:
+                conn.execute("ROLLBACK")
+                raise LimiteTravauxAtteinte(
+                    f"Vous avez déjà {nb_actifs} travaux en cours ou en attente, veuillez patienter."
+                )
+            id_travail = conn.execute(
+                "INSERT INTO travaux (utilisateur, type, parametres, statut, cree_le) VALUES (?, ?, ?, ?, ?)",
+                (utilisateur, type_, json.dumps(parametres), EN_ATTENTE, datetime.now().isoformat(timespec="seconds"))
+            ).lastrowid
+            conn.execute("COMMIT")
+        return id_travail
+
+    def annuler(self, id_travail):
+        """
+        Annule un travail : immédiatement s'il est en attente, à sa prochaine étape s'il est en cours.
+        """
+        with self._connexion() as conn:
+            conn.execute(
+                "UPDATE travaux SET statut = ?, termine_le = ? WHERE id = ? AND statut = ?",
+                (ANNULE, datetime.now().isoformat(timespec="seconds"), id_travail, EN_ATTENTE)
+            )
+            conn.execute("UPDATE travaux SET annulation_demandee = 1 WHERE id = ? AND statut = ?", (id_travail, EN_COURS))
+
+    def relancer(self, id_travail):
+        """
+        Remet en attente un travail en échec ou annulé (les tentatives sont remises à zéro).
+        """
+        with self._connexion() as conn:
+            conn.execute(
+                "UPDATE travaux SET statut = ?, tentatives = 0, annulation_demandee = 0, progression = 0, "
+                "message = NULL, termine_le = NULL, disponible_a = NULL WHERE id = ? AND statut IN (?, ?)",
+                (EN_ATTENTE, id_travail, ECHEC, ANNULE)
+            )
+
+    def etat(self, id_travail):
+        """
+        Retourne l'état d'un travail.
+
+        Returns:
+            Un dictionnaire (statut, progression, message, resultat, tentatives, ...) ou None
+        """
+        with self._connexion() as conn:
+            ligne = conn.execute("SELECT * FROM travaux WHERE id = ?", (id_travail,)).fetchone()
+        if ligne is None:
+            return None
+        etat = dict(ligne)
+        etat["parametres"] = json.loads(etat["parametres"])
+        return etat
+
+    def statistiques(self):
+        """
+        Retourne le nombre de travaux par type et par statut (tous utilisateurs confondus).
+
+        Returns:
+            Un dictionnaire {(type, statut): nombre}
+        """
+        with self._connexion() as conn:
+            lignes = conn.execute("SELECT type, statut, COUNT(*) FROM travaux GROUP BY type, statut").fetchall()
+        return {(type_, statut): nombre for type_, statut, nombre in lignes}
+
+    def _reserver(self):
+        """
+        Réserve le plus ancien travail en attente, disponible (délai de relance écoulé), dont l'utilisateur
+        n'a pas atteint son plafond.
+
+        Les travaux en cours dont le bail a expiré (processus arrêté) sont d'abord remis en attente.
+        """
+        types = list(self.traitements)
+        maintenant = time.time()
+        with self._verrou_reservation, self._connexion() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Bail absent : travail réservé par une version sans bail, dont le processus est arrêté
+            conn.execute(
+                f"UPDATE travaux SET statut = ?, proprietaire = NULL, bail_expire = NULL "
+                f"WHERE statut = ? AND type IN ({','.join('?' * len(types))}) "
+                f"AND (bail_expire IS NULL OR bail_expire < ?)",
+                [EN_ATTENTE, EN_COURS] + types + [maintenant]
+            )
+            ligne = conn.execute(
+                f"""
+                SELECT t.id, t.type, t.parametres, t.tentatives FROM travaux t
+                WHERE t.statut = ? AND t.type IN ({','.join('?' * len(types))})
+                  AND (t.disponible_a IS NULL OR t.disponible_a <= ?)
+                  AND (SELECT COUNT(*) FROM travaux e WHERE e.utilisateur = t.utilisateur AND e.statut = ?) < ?
+                ORDER BY t.id LIMIT 1
+                """,
+                [EN_ATTENTE] + types + [maintenant, EN_COURS, self.max_en_cours_par_utilisateur]
+            ).fetchone()
+            if ligne is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE travaux SET statut = ?, tentatives = tentatives + 1, message = NULL, demarre_le = ?, "
+                "proprietaire = ?, bail_expire = ? WHERE id = ?",
+                (EN_COURS, datetime.now().isoformat(timespec="seconds"), self.proprietaire,
+                 maintenant + self.duree_bail, ligne["id"])
+            )
+            conn.execute("COMMIT")
+        return ligne
+
+    def _renouveler_baux(self):
+        with self._connexion() as conn:
+            conn.execute(
+                "UPDATE travaux SET bail_expire = ? WHERE statut = ? AND proprietaire = ?",
+                (time.time() + self.duree_bail, EN_COURS, self.proprietaire)
+            )
+
+    def _boucle_bail(self):
+        # Renouvellement des baux des travaux en cours, bien avant leur expiration
+        while True:
+            time.sleep(self.duree_bail / 3)
+            try:
+                self._renouveler_baux()
+            except sqlite3.Error:
+                continue
+
+    def _terminer(self, id_travail, statut, message=None, resultat=None):
+        # Sans nouveau message, le dernier message publié par le travail est conservé. Un travail repris
+        # par un autre processus (bail expiré) n'appartient plus à cette file : son état n'est pas modifié
+        with self._connexion() as conn:
+            conn.execute(
+                "UPDATE travaux SET statut = ?, message = COALESCE(?, message), resultat = ?, termine_le = ?, "
+                "progression = CASE WHEN ? = ? THEN 1 ELSE progression END, proprietaire = NULL, bail_expire = NULL "
+                "WHERE id = ? AND proprietaire = ?",
+                (statut, message, resultat, datetime.now().isoformat(timespec="seconds"), statut, TERMINE, id_travail,
+                 self.proprietaire)
+            )
+
+    def _boucle_worker(self):
+        while True:
+            try:
+                travail = self._reserver()
+            except sqlite3.Error:
+                travail = None
+            if travail is None:
+                time.sleep(INTERVALLE_SCRUTATION)
+                continue
+
+            id_travail = travail["id"]
+            try:
+                resultat = self.traitements[travail["type"]](
+                    id_travail, json.loads(travail["parametres"]), Suivi(self, id_travail)
+                )
+            except TravailAnnule:
+                self._terminer(id_travail, ANNULE, "Travail annulé")
+            except Exception as e:
+                # Nouvelle tentative, sauf si le plafond est atteint ou que l'annulation a été demandée,
+                # après un délai qui double à chaque tentative
+                with self._connexion() as conn:
+                    nb_relances = conn.execute(
+                        "UPDATE travaux SET statut = ?, message = ?, proprietaire = NULL, bail_expire = NULL, "
+                        "disponible_a = ? + ? * (1 << (tentatives - 1)) "
+                        "WHERE id = ? AND proprietaire = ? AND tentatives < ? AND annulation_demandee = 0",
+                        (EN_ATTENTE, f"Nouvelle tentative après une erreur : {e}", time.time(), self.delai_relance,
+                         id_travail, self.proprietaire, self.max_tentatives)
+                    ).rowcount
+                if not nb_relances:
+                    self._terminer(id_travail, ECHEC, str(e))
+            else:
+                self._terminer(id_travail, TERMINE, resultat=resultat)
+
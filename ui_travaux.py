@@ -0,0 +1,91 @@
+import os
+import uuid
+
+import streamlit as st
+
+from travaux import ANNULE, ECHEC, EN_ATTENTE, EN_COURS, STATUTS_FINAUX, TERMINE
+
+# Intervalle de rafraîchissement de l'avancement d'un travail, en secondes
+INTERVALLE_RAFRAICHISSEMENT = 1
+
+LIBELLES_STATUTS = {
+    EN_ATTENTE: "En attente",
+    EN_COURS: "En cours",
+    TERMINE: "Terminé",
+    ECHEC: "Échec",
+    ANNULE: "Annulé",
+}
+
+
+def identifiant_utilisateur():
+    """
+    Identifie l'utilisateur pour le plafond de travaux : l'adresse e-mail s'il est authentifié,
+    sinon un identifiant propre à la session.
+
+    Sans authentification, le plafond est donc un plafond par session (par onglet) et non par personne :
+    ouvrir un autre onglet le contourne. Il sert alors à répartir équitablement les workers entre
+    les sessions ; la charge totale reste bornée par le nombre de workers (DI_TRAVAUX_WORKERS). Pour
+    un plafond par personne, activer l'authentification de Streamlit (st.login).
+    """
+    try:
+        if st.user.is_logged_in:
+            return st.user.email
+    except Exception:
+        # Authentification non configurée
+        pass
+    if "identifiant_utilisateur" not in st.session_state:
+        st.session_state["identifiant_utilisateur"] = uuid.uuid4().hex
+    return st.session_state["identifiant_utilisateur"]
+
+
+def _afficher_etat(file, id_travail, nom_fichier, mime, libelle_telechargement):
+    etat = file.etat(id_travail)
+    if etat is None:
+        return None
+
+    statut = etat["statut"]
+    texte = LIBELLES_STATUTS[statut] + (f" — {etat['message']}" if etat["message"] else "")
+    if statut in (EN_ATTENTE, EN_COURS):
+        st.progress(min(1.0, etat["progression"] or 0.0), text=texte)
+        if st.button("Annuler", key=f"annuler_travail_{id_travail}"):
+            file.annuler(id_travail)
+    elif statut == TERMINE:
+        st.success(texte)
+        if etat["resultat"] and os.path.exists(etat["resultat"]):
+            with open(etat["resultat"], "rb") as f:
+                st.download_button(label=libelle_telechargement, data=f, file_name=nom_fichier, mime=mime,
+                                   key=f"telecharger_travail_{id_travail}")
+    else:
+        (st.error if statut == ECHEC else st.warning)(texte)
+        if st.button("Relancer", key=f"relancer_travail_{id_travail}"):
+            file.relancer(id_travail)
+            st.rerun()
+    return statut
+
+
+@st.fragment(run_every=INTERVALLE_RAFRAICHISSEMENT)
+def _suivre_travail(file, id_travail, nom_fichier, mime, libelle_telechargement):
+    statut = _afficher_etat(file, id_travail, nom_fichier, mime, libelle_telechargement)
+    if statut in STATUTS_FINAUX:
+        # Travail fini : réexécution complète pour arrêter le rafraîchissement périodique
+        st.rerun()
+
+
+def afficher_travail(file, id_travail, nom_fichier, mime, libelle_telechargement):
+    """
+    Affiche l'état d'un travail de la file : avancement (rafraîchi sans bloquer la session) et bouton
+    d'annulation tant qu'il n'est pas fini, puis bouton de téléchargement ou de relance.
+
+    Args:
+        file: Instance de travaux.FileTravaux
+        id_travail: Identifiant du travail
+        nom_fichier, mime: Nom et type du fichier proposé au téléchargement
+        libelle_telechargement: Libellé du bouton de téléchargement
+    """
+    etat = file.etat(id_travail)
+    if etat is None:
+        return
+    if etat["statut"] in STATUTS_FINAUX:
+        _afficher_etat(file, id_travail, nom_fichier, mime, libelle_telechargement)
+    else:
+        _suivre_travail(file, id_travail, nom_fichier, mime, libelle_telechargement)
@@ -6,7 +6,7 @@ from reportlab.lib.pagesizes import A4, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-import tempfile
+import io
 import os
 from datetime import datetime
 
@@ -37,12 +37,12 @@ heading_style = ParagraphStyle(
 
 # Fonction pour générer le PDF
 def generate_pdf(data, company_name, year):
-    # Créer un fichier temporaire
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+    # Tampon en mémoire pour le PDF (aucun fichier temporaire)
+    buffer = io.BytesIO()
     
     # Configuration du document
     doc = SimpleDocTemplate(
-        temp_file.name,
+        buffer,
         pagesize=landscape(A4),
         rightMargin=30,
         leftMargin=30,
@@ -213,7 +213,7 @@ def generate_pdf(data, company_name, year):
     
     # Génération du PDF
     doc.build(elements)
-    return temp_file.name
+    return buffer.getvalue()
 
 # Interface Streamlit
 st.title("📊 Évaluation de la Diversité et Inclusion V2")
@@ -291,15 +291,13 @@ if uploaded_file is not None:
         
         # Génération du PDF
         if st.button("📄 Générer le rapport PDF"):
-            pdf_path = generate_pdf(data, company_name, year)
-            with open(pdf_path, 'rb') as f:
-                st.download_button(
-                    label="📥 Télécharger le rapport PDF",
-                    data=f,
-                    file_name=f"rapport_diversite_{company_name}_{year}.pdf",
-                    mime="application/pdf"
-                )
-            os.unlink(pdf_path)  # Suppression du fichier temporaire
+            pdf_data = generate_pdf(data, company_name, year)
+            st.download_button(
+                label="📥 Télécharger le rapport PDF",
+                data=pdf_data,
+                file_name=f"rapport_diversite_{company_name}_{year}.pdf",
+                mime="application/pdf"
+            )
     
     except Exception as e:
         st.error(f"Une erreur est survenue lors du traitement du fichier : {str(e)}")
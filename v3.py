@@ -6,7 +6,7 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-import tempfile
+import io
 import os
 import plotly.express as px
 import plotly.graph_objects as go
@@ -189,9 +189,9 @@ def create_indicators_radar(data):
     return fig
 
 def generate_pdf(data, company_name, year):
-    # Création d'un fichier temporaire pour le PDF
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-        doc = SimpleDocTemplate(tmp.name, pagesize=letter)
+    # Tampon en mémoire pour le PDF (aucun fichier temporaire)
+    with io.BytesIO() as buffer:
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
         
         # Titre
@@ -301,7 +301,7 @@ def generate_pdf(data, company_name, year):
         
         # Génération du PDF
         doc.build(elements)
-        return tmp.name
+        return buffer.getvalue()
 
 # Interface Streamlit
 st.title("📊 Évaluation Diversité et Inclusion V3")
@@ -597,17 +597,15 @@ elif page == "Rapport":
         st.header("4. Génération du rapport")
         
         if st.button("📄 Générer le rapport PDF"):
-            pdf_path = generate_pdf(
+            pdf_data = generate_pdf(
                 st.session_state['data'],
                 st.session_state['company_name'],
                 st.session_state['year']
             )
             
-            with open(pdf_path, "rb") as file:
-                st.download_button(
-                    label="📥 Télécharger le rapport PDF",
-                    data=file,
-                    file_name=f"rapport_diversite_inclusion_{st.session_state['company_name']}_{st.session_state['year']}.pdf",
-                    mime="application/pdf"
-                )
-            os.unlink(pdf_path) 
\ No newline at end of file
+            st.download_button(
+                label="📥 Télécharger le rapport PDF",
+                data=pdf_data,
+                file_name=f"rapport_diversite_inclusion_{st.session_state['company_name']}_{st.session_state['year']}.pdf",
+                mime="application/pdf"
+            )
\ No newline at end of file
@@ -13,7 +13,6 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-import tempfile
 import os
 from datetime import datetime
 
@@ -170,8 +169,9 @@ heading_style = ParagraphStyle(
 )
 
 def generate_pdf(data, company_name, year):
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-        doc = SimpleDocTemplate(tmp.name, pagesize=letter)
+    # Tampon en mémoire pour le PDF (aucun fichier temporaire)
+    with io.BytesIO() as buffer:
+        doc = SimpleDocTemplate(buffer, pagesize=letter)
         elements = []
         
         # Titre
@@ -269,7 +269,7 @@ def generate_pdf(data, company_name, year):
         ))
         
         doc.build(elements)
-        return tmp.name
+        return buffer.getvalue()
 
 # Interface Streamlit
 st.markdown("## 📌 Explication des indicateurs")
@@ -483,20 +483,15 @@ if st.button("Calculer les résultats"):
             }
             
             # Génération du PDF
-            pdf_path = generate_pdf(data, nom_entreprise, annee)
+            pdf_data = generate_pdf(data, nom_entreprise, annee)
             
-            # Lecture et téléchargement du PDF
-            with open(pdf_path, "rb") as file:
-                pdf_data = file.read()
-                st.download_button(
-                    label="📥 Télécharger le rapport PDF",
-                    data=pdf_data,
-                    file_name=f"rapport_diversite_inclusion_{nom_entreprise}_{annee}.pdf",
-                    mime="application/pdf"
-                )
-            
-            # Nettoyage du fichier temporaire
-            os.unlink(pdf_path)
+            # Téléchargement du PDF
+            st.download_button(
+                label="📥 Télécharger le rapport PDF",
+                data=pdf_data,
+                file_name=f"rapport_diversite_inclusion_{nom_entreprise}_{annee}.pdf",
+                mime="application/pdf"
+            )
             
             st.success("Le rapport PDF a été généré avec succès !")
             